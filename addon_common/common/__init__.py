@@ -59,4 +59,5 @@ if bpy.app.version >= (3, 2, 0):
     from . import drawing as _
     from . import logger as _
     from . import profiler as _
-    from . import ui_core as _
+    # note: ui_core is not imported here, as it is heavy.  it populates its globals
+    #       when first imported (ex: by CookieCutter)
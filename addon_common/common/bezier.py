@@ -20,8 +20,10 @@ Created by Jonathan Denning, Jonathan Williamson
 '''
 
 import math
+from bisect import bisect_left
 
-from mathutils import Vector, Matrix
+import numpy as np
+from mathutils import Vector
 
 from .maths import Point, Vec
 from .utils import iter_running_sum
@@ -49,65 +51,75 @@ def compute_cubic_error(v0, v1, v2, v3, l_v, l_t):
     ))
 
 
+def compute_cubic_basis(l_t):
+    ''' returns (n,4) array of cubic Bernstein weights, one row per t in l_t '''
+    t0 = np.asarray(l_t, dtype=np.float64)
+    t1 = 1 - t0
+    return np.stack((t1**3, 3*t0*t1**2, 3*t0**2*t1, t0**3), axis=1)
+
+
+def _fit_cubicbezier_basis(basis, values):
+    '''
+    least-squares fit of cubic bezier control points to values ((n,) or (n,k) array),
+    given (n,4) Bernstein basis.  solves all k columns together with a single basis.
+    returns (errors, controls), where errors has an error (sqrt of summed squared
+    residuals) per column and controls has the 4 control values per column.
+    returns (None, None) if the system is singular.
+    '''
+    try:
+        controls = np.linalg.solve(basis.T @ basis, basis.T @ values)
+    except np.linalg.LinAlgError:
+        return (None, None)
+    errors = np.sqrt(np.sum((basis @ controls - values)**2, axis=0))
+    return (errors, controls)
+
+
 def fit_cubicbezier(l_v, l_t):
     #########################################################
     # http://nbviewer.ipython.org/gist/anonymous/5688579
+    # normal equations of least-squares fit, (BᵀB) x = Bᵀv, where B is the Bernstein basis
 
-    # make the summation functions for A (16 of them)
-    A_fns = [
-        lambda l_t: sum([2*t**0*(t-1)**6 for t in l_t]),
-        lambda l_t: sum([-6*t**1*(t-1)**5 for t in l_t]),
-        lambda l_t: sum([6*t**2*(t-1)**4 for t in l_t]),
-        lambda l_t: sum([-2*t**3*(t-1)**3 for t in l_t]),
-
-        lambda l_t: sum([-6*t**1*(t-1)**5 for t in l_t]),
-        lambda l_t: sum([18*t**2*(t-1)**4 for t in l_t]),
-        lambda l_t: sum([-18*t**3*(t-1)**3 for t in l_t]),
-        lambda l_t: sum([6*t**4*(t-1)**2 for t in l_t]),
-
-        lambda l_t: sum([6*t**2*(t-1)**4 for t in l_t]),
-        lambda l_t: sum([-18*t**3*(t-1)**3 for t in l_t]),
-        lambda l_t: sum([18*t**4*(t-1)**2 for t in l_t]),
-        lambda l_t: sum([-6*t**5*(t-1)**1 for t in l_t]),
-
-        lambda l_t: sum([-2*t**3*(t-1)**3 for t in l_t]),
-        lambda l_t: sum([6*t**4*(t-1)**2 for t in l_t]),
-        lambda l_t: sum([-6*t**5*(t-1)**1 for t in l_t]),
-        lambda l_t: sum([2*t**6*(t-1)**0 for t in l_t])
-    ]
-
-    # make the summation functions for b (4 of them)
-    b_fns = [
-        lambda l_t, l_v: sum(v * (-2 * (t**0) * ((t-1)**3))
-                             for t, v in zip(l_t, l_v)),
-        lambda l_t, l_v: sum(v * (6 * (t**1) * ((t-1)**2))
-                             for t, v in zip(l_t, l_v)),
-        lambda l_t, l_v: sum(v * (-6 * (t**2) * ((t-1)**1))
-                             for t, v in zip(l_t, l_v)),
-        lambda l_t, l_v: sum(v * (2 * (t**3) * ((t-1)**0))
-                             for t, v in zip(l_t, l_v)),
-    ]
-
-    # compute the data we will put into matrix A
-    A_values = [fn(l_t) for fn in A_fns]
-    # fill the A matrix with data
-    A_matrix = Matrix(tuple(zip(*[iter(A_values)]*4)))
-    try:
-        A_inv = A_matrix.inverted()
-    except:
+    errors, controls = _fit_cubicbezier_basis(compute_cubic_basis(l_t), np.asarray(l_v, dtype=np.float64))
+    if errors is None:
         return (float('inf'), l_v[0], l_v[0], l_v[0], l_v[0])
+    v0, v1, v2, v3 = controls.tolist()
+    return (float(errors), v0, v1, v2, v3)
 
-    # compute the data we will put into the b vector
-    b_values = [fn(l_t, l_v) for fn in b_fns]
-    # fill the b vector with data
-    b_vector = Vector(b_values)
 
-    # solve for the unknowns in vector x
-    v0, v1, v2, v3 = A_inv @ b_vector
+def fit_cubicbezier_points(l_co, l_t):
+    '''
+    fits a single cubic bezier to all three axes of points l_co at parameters l_t.
+    returns (err, p0, p1, p2, p3), where err is the sum of per-axis errors
+    '''
+    co = np.asarray(l_co, dtype=np.float64).reshape((-1, 3))
+    errors, controls = _fit_cubicbezier_basis(compute_cubic_basis(l_t), co)
+    if errors is None:
+        p0 = Point(co[0].tolist())
+        return (float('inf'), p0, p0, p0, p0)
+    p0, p1, p2, p3 = (Point(p) for p in controls.tolist())
+    return (float(errors.sum()), p0, p1, p2, p3)
 
-    err = compute_cubic_error(v0, v1, v2, v3, l_v, l_t) #/ len(l_v)
 
-    return (err, v0, v1, v2, v3)
+def _find_split_index(co, l_t):
+    '''
+    finds index (at least 5 from either end, with t in [0.4,0.6]) where the sequence
+    bends the most, measured by the dot of normalized directions to the 4th neighbors.
+    returns -1 if there is no such index
+    '''
+    inds = np.arange(5, len(co) - 5)
+    if not len(inds): return -1
+    ts = l_t[inds]
+    inds = inds[(ts >= 0.4) & (ts <= 0.6)]
+    if not len(inds): return -1
+    d0 = co[inds] - co[inds - 4]
+    d1 = co[inds + 4] - co[inds]
+    l0 = np.linalg.norm(d0, axis=1)
+    l1 = np.linalg.norm(d1, axis=1)
+    # zero-length directions normalize to zero vectors (dot of 0), same as mathutils
+    d0 /= np.where(l0 > 0, l0, 1)[:,None]
+    d1 /= np.where(l1 > 0, l1, 1)[:,None]
+    dots = np.einsum('ij,ij->i', d0, d1)
+    return int(inds[np.argmin(dots)])
 
 
 def fit_cubicbezier_spline(
@@ -121,6 +133,10 @@ def fit_cubicbezier_spline(
     that best fits the given points l_co
     where t0 and t3 are the passed-in t0 and t3
     and p0,p1,p2,p3 are the control points of bezier
+
+    sub-sequences are fit iteratively (depth-first, left before right) rather than
+    recursively, so the returned beziers are in sequence order.  as before, the split
+    sub-sequences are fit with the default split settings.
     '''
     count = len(l_co)
     if t3 == -1:
@@ -131,83 +147,97 @@ def fit_cubicbezier_spline(
         p0, p3 = l_co[0], l_co[-1]
         diff = p3 - p0
         return [(t0, t3, p0, p0+diff*0.33, p0+diff*0.66, p3)]
+    co = np.asarray(l_co, dtype=np.float64).reshape((-1, 3))
     if count == 3:
-        new_co = [
-            l_co[0],
-            Point.average(l_co[:2]),
-            l_co[1],
-            Point.average(l_co[1:]),
-            l_co[2]
-        ]
-        return fit_cubicbezier_spline(
-            new_co, error_scale,
-            depth=depth,
-            t0=t0, t3=t3,
-            allow_split=allow_split, force_split=force_split
-        )
-    l_d = [0] + [(v0-v1).length for v0, v1 in zip(l_co[:-1], l_co[1:])]
-    l_ad = [s for d, s in iter_running_sum(l_d)]
-    dist = sum(l_d)
-    if dist <= 0:
-        # print(spc + 'fit_cubicbezier_spline: returning []')
-        return []  # [(t0,t3,l_co[0],l_co[0],l_co[0],l_co[0])]
-    l_t = [ad/dist for ad in l_ad]
-
-    ex, x0, x1, x2, x3 = fit_cubicbezier([co[0] for co in l_co], l_t)
-    ey, y0, y1, y2, y3 = fit_cubicbezier([co[1] for co in l_co], l_t)
-    ez, z0, z1, z2, z3 = fit_cubicbezier([co[2] for co in l_co], l_t)
-    tot_error = ex+ey+ez
-    #print(f'error={tot_error}  max={error_scale}  force={force_split}  allow={allow_split}') #, l=4)
-
-    if not force_split:
-        do_not_split = tot_error < error_scale
-        do_not_split |= depth == max_depth_split
-        do_not_split |= len(l_co) <= min_count_split
-        do_not_split |= not allow_split
-        if do_not_split:
-            p0, p1 = Point((x0, y0, z0)), Point((x1, y1, z1))
-            p2, p3 = Point((x2, y2, z2)), Point((x3, y3, z3))
-            return [(t0, t3, p0, p1, p2, p3)]
-
-    # too much error in fit.  split sequence in two, and fit each sub-sequence
-
-    # find a good split point
-    ind_split = -1
-    mindot = 1.0
-    for ind in range(5, len(l_co)-5):
-        if l_t[ind] < 0.4:
+        # upsample to 5 points, which is too few to split
+        co = np.stack((co[0], (co[0]+co[1])/2, co[1], (co[1]+co[2])/2, co[2]))
+        min_count_split, max_depth_split = 15, 4
+
+    # cumulative chord lengths of entire sequence, so sub-sequences only need to offset and rescale
+    l_ad = np.concatenate(([0.0], np.cumsum(np.linalg.norm(co[1:] - co[:-1], axis=1))))
+
+    ret = []
+    # stack of (i0, i3, t0, t3, depth, allow_split, force_split, min_count_split, max_depth_split)
+    # where i0 and i3 are the (inclusive) bounds of sub-sequence in co
+    stack = [(0, len(co)-1, t0, t3, depth, allow_split, force_split, min_count_split, max_depth_split)]
+    while stack:
+        i0, i3, t0, t3, depth, allow_split, force_split, min_count_split, max_depth_split = stack.pop()
+        sub_co = co[i0:i3+1]
+        dist = l_ad[i3] - l_ad[i0]
+        if dist <= 0:
+            # print(spc + 'fit_cubicbezier_spline: no length')
             continue
-        if l_t[ind] > 0.6:
-            break
-        # if l_ad[ind] < 0.1: continue
-        # if l_ad[ind] > dist-0.1: break
-
-        v0 = l_co[ind-4]
-        v1 = l_co[ind+0]
-        v2 = l_co[ind+4]
-        d0 = (v1-v0).normalized()
-        d1 = (v2-v1).normalized()
-        dot01 = d0.dot(d1)
-        if ind_split == -1 or dot01 < mindot:
-            ind_split = ind
-            mindot = dot01
-
-    if ind_split == -1:
-        # did not find a good splitting point!
-        p0, p1, p2, p3 = Point((x0, y0, z0)), Point(
-            (x1, y1, z1)), Point((x2, y2, z2)), Point((x3, y3, z3))
-        #p0,p3 = Point(l_co[0]),Point(l_co[-1])
-        return [(t0, t3, p0, p1, p2, p3)]
-
-    #print(spc + 'splitting at %d' % ind_split)
-
-    l_co0, l_co1 = l_co[:ind_split+1], l_co[ind_split:]   # share split point
-    tsplit = ind_split  # / (len(l_co)-1)
-    bezier0 = fit_cubicbezier_spline(
-        l_co0, error_scale, depth=depth+1, t0=t0, t3=tsplit)
-    bezier1 = fit_cubicbezier_spline(
-        l_co1, error_scale, depth=depth+1, t0=tsplit, t3=t3)
-    return bezier0 + bezier1
+        l_t = (l_ad[i0:i3+1] - l_ad[i0]) / dist
+
+        tot_error, p0, p1, p2, p3 = fit_cubicbezier_points(sub_co, l_t)
+        #print(f'error={tot_error}  max={error_scale}  force={force_split}  allow={allow_split}') #, l=4)
+
+        if not force_split:
+            do_not_split = tot_error < error_scale
+            do_not_split |= depth == max_depth_split
+            do_not_split |= len(sub_co) <= min_count_split
+            do_not_split |= not allow_split
+            if do_not_split:
+                ret.append((t0, t3, p0, p1, p2, p3))
+                continue
+
+        # too much error in fit.  split sequence in two, and fit each sub-sequence
+        ind_split = _find_split_index(sub_co, l_t)
+        if ind_split == -1:
+            # did not find a good splitting point!
+            ret.append((t0, t3, p0, p1, p2, p3))
+            continue
+
+        #print(spc + 'splitting at %d' % ind_split)
+
+        # share split point.  push right half first so left half is fit first
+        tsplit = ind_split  # / (len(l_co)-1)
+        stack.append((i0+ind_split, i3, tsplit, t3, depth+1, True, False, 15, 4))
+        stack.append((i0, i0+ind_split, t0, tsplit, depth+1, True, False, 15, 4))
+    return ret
+
+
+class ArcLengthTable:
+    '''
+    arc-length lookup table of a curve sampled at non-decreasing parameters ts, stored as
+    arrays.  ds[i] is the length of the segment ending at sample i (ds[0] is 0).
+    lookups between parameter and length are binary searches over the sorted arrays.
+    '''
+
+    def __init__(self, ts, ps, ds=None):
+        self.ts = np.asarray(ts, dtype=np.float64)
+        self.ps = np.asarray(ps, dtype=np.float64)
+        if ds is None:
+            ds = np.concatenate(([0.0], np.linalg.norm(self.ps[1:] - self.ps[:-1], axis=1)))
+        self.ds = np.asarray(ds, dtype=np.float64)
+        self.lengths = np.cumsum(self.ds)
+        self.totlength = float(self.lengths[-1]) if len(self.lengths) else 0.0
+
+    def __len__(self): return len(self.ts)
+
+    def length_at_t(self, t):
+        return float(np.interp(t, self.ts, self.lengths))
+
+    def t_at_length(self, length):
+        return float(np.interp(length, self.lengths, self.ts))
+
+    def ts_at_lengths(self, lengths):
+        return np.interp(lengths, self.lengths, self.ts).tolist()
+
+    def nearest_indices(self, points):
+        points = np.asarray(points, dtype=np.float64).reshape((-1, self.ps.shape[1]))
+        d2 = ((points[:,None,:] - self.ps[None,:,:])**2).sum(axis=2)
+        return np.argmin(d2, axis=1)
+
+    def t_at_point(self, point):
+        return float(self.ts[self.nearest_indices([point])[0]])
+
+    def ts_at_points(self, points):
+        return self.ts[self.nearest_indices(points)].tolist()
+
+    def as_tessellation(self):
+        ''' returns list of (t, point, d) tuples '''
+        return [(t, Point(p), d) for t, p, d in zip(self.ts.tolist(), self.ps.tolist(), self.ds.tolist())]
 
 
 class CubicBezier:
@@ -243,18 +273,15 @@ class CubicBezier:
             return CubicBezier(p0, p0, p0, p0)
         l_t = [ad/dist for ad in l_ad]
 
-        ex, x0, x1, x2, x3 = fit_cubicbezier([pt[0] for pt in pts_list], l_t)
-        ey, y0, y1, y2, y3 = fit_cubicbezier([pt[1] for pt in pts_list], l_t)
-        ez, z0, z1, z2, z3 = fit_cubicbezier([pt[2] for pt in pts_list], l_t)
-        p0 = Point((x0, y0, z0))
-        p1 = Point((x1, y1, z1))
-        p2 = Point((x2, y2, z2))
-        p3 = Point((x3, y3, z3))
+        _, p0, p1, p2, p3 = fit_cubicbezier_points(pts_list, l_t)
         return CubicBezier(p0, p1, p2, p3)
 
     def __init__(self, p0, p1, p2, p3):
         self.p0, self.p1, self.p2, self.p3 = p0, p1, p2, p3
-        self.tessellation = []
+        # memoized euclidean arc-length tables, as (control key, {sample count: table})
+        self._arclength_tables = (None, {})
+        # tessellation settings and table, as (split, fn_dist, control key, table)
+        self._tessellation = (self.split_default, None, None, None)
 
     def __iter__(self): return iter([self.p0, self.p1, self.p2, self.p3])
 
@@ -277,6 +304,37 @@ class CubicBezier:
         b0, b1, b2 = compute_quadratic_weights(t)
         return q0*b0 + q1*b1 + q2*b2
 
+    def eval_array(self, ts):
+        ''' evaluates curve at all ts, returning (n,3) array '''
+        controls = np.array([tuple(p) for p in self.points()], dtype=np.float64)
+        return compute_cubic_basis(ts) @ controls
+
+    def _control_key(self):
+        # control points are mutated in place (ex: dragging handles), so key on their values
+        return (*self.p0, *self.p1, *self.p2, *self.p3)
+
+    def _build_arclength_table(self, count, fn_dist=None):
+        ts = np.linspace(0.0, 1.0, count)
+        ps = self.eval_array(ts)
+        if fn_dist is None:
+            return ArcLengthTable(ts, ps)
+        pts = [Point(p) for p in ps.tolist()]
+        ds = [0] + [fn_dist(p, q) for p, q in zip(pts[:-1], pts[1:])]
+        return ArcLengthTable(ts, ps, ds)
+
+    def get_arclength_table(self, count):
+        '''
+        returns euclidean arc-length table of count uniformly spaced samples in t.
+        tables are built lazily and kept until control points move
+        '''
+        key = self._control_key()
+        if self._arclength_tables[0] != key:
+            self._arclength_tables = (key, {})
+        tables = self._arclength_tables[1]
+        if count not in tables:
+            tables[count] = self._build_arclength_table(count)
+        return tables[count]
+
     def subdivide(self, iters=1):
         if iters == 0:
             return [self]
@@ -330,8 +388,10 @@ class CubicBezier:
         l = self.subdivide_linesegments(fn_dist, max_linearity=max_linearity)
         return sum(fn_dist(cb.p0, cb.p3) for cb in l)
 
-    def approximate_length_uniform(self, fn_dist, split=None):
+    def approximate_length_uniform(self, fn_dist=None, split=None):
         split = split or self.split_default
+        if fn_dist is None:
+            return self.get_arclength_table(split + 1).totlength
         p = self.p0
         d = 0
         for i in range(split):
@@ -340,8 +400,10 @@ class CubicBezier:
             p = q
         return d
 
-    def approximate_t_at_interval_uniform(self, interval, fn_dist, split=None):
+    def approximate_t_at_interval_uniform(self, interval, fn_dist=None, split=None):
         split = split or self.split_default
+        if fn_dist is None:
+            return self.get_arclength_table(split + 1).t_at_length(interval)
         p = self.p0
         d = 0
         for i in range(split):
@@ -354,19 +416,21 @@ class CubicBezier:
         return 1
 
     def approximate_ts_at_intervals_uniform(
-        self, intervals, fn_dist, split=None
+        self, intervals, fn_dist=None, split=None
     ):
+        if fn_dist is None:
+            split = split or self.split_default
+            return self.get_arclength_table(split + 1).ts_at_lengths(intervals)
         a = self.approximate_t_at_interval_uniform
 
         def approx(i): return a(i, fn_dist, split=None)
         return [approx(interval) for interval in intervals]
 
-    def get_tessellate_uniform(self, fn_dist, split=None):
+    def get_tessellate_uniform(self, fn_dist=None, split=None):
         split = split or self.split_default
-        ts = [i/(split-1) for i in range(split)]
-        ps = [self.eval(t) for t in ts]
-        ds = [0] + [fn_dist(p, q) for p, q in zip(ps[:-1], ps[1:])]
-        return [(t, p, d) for t, p, d in zip(ts, ps, ds)]
+        if fn_dist is None:
+            return self.get_arclength_table(split).as_tessellation()
+        return self._build_arclength_table(split, fn_dist).as_tessellation()
 
     def tessellate_uniform_points(self, segments=None):
         segments = segments or self.segments_default
@@ -376,28 +440,52 @@ class CubicBezier:
 
     #########################################
     #                                       #
-    # the following code **requires** that  #
-    # self.tessellate_uniform() is called   #
-    # beforehand!                           #
+    # the following code uses the settings  #
+    # of the last self.tessellate_uniform() #
+    # call (or the defaults).  tessellation #
+    # is rebuilt only when control points   #
+    # move.                                 #
     #                                       #
     #########################################
 
-    def tessellate_uniform(self, fn_dist, split=None):
-        self.tessellation = self.get_tessellate_uniform(fn_dist, split=split)
-
-    def approximate_t_at_point_tessellation(self, point, fn_dist):
+    def tessellate_uniform(self, fn_dist=None, split=None):
+        split = split or self.split_default
+        _split, _fn_dist, key, table = self._tessellation
+        if (_split, _fn_dist) != (split, fn_dist):
+            key, table = None, None
+        self._tessellation = (split, fn_dist, key, table)
+
+    def get_tessellation(self):
+        ''' returns ArcLengthTable of tessellation '''
+        split, fn_dist, key, table = self._tessellation
+        if fn_dist is None:
+            return self.get_arclength_table(split)
+        ckey = self._control_key()
+        if key != ckey:
+            table = self._build_arclength_table(split, fn_dist)
+            self._tessellation = (split, fn_dist, ckey, table)
+        return table
+
+    @property
+    def tessellation(self):
+        return self.get_tessellation().as_tessellation()
+
+    def approximate_t_at_point_tessellation(self, point, fn_dist=None):
+        table = self.get_tessellation()
+        if fn_dist is None:
+            return table.t_at_point(point)
         bd, bt = None, None
-        for t, q, _ in self.tessellation:
+        for t, q, _ in table.as_tessellation():
             d = fn_dist(point, q)
             if bd is None or d < bd:
                 bd, bt = d, t
         return bt
 
     def approximate_totlength_tessellation(self):
-        return sum(self.approximate_lengths_tessellation())
+        return self.get_tessellation().totlength
 
     def approximate_lengths_tessellation(self):
-        return [d for _, _, d in self.tessellation]
+        return self.get_tessellation().ds.tolist()
 
 
 class CubicBezierSpline:
@@ -425,7 +513,8 @@ class CubicBezierSpline:
         assert type(cbs) is list, "expected list"
         self.cbs = cbs
         self.inds = inds
-        self.tessellation = []
+        # memoized tessellation, as (bezier tables, spline table)
+        self._tessellation = (None, None)
 
     def copy(self):
         return CubicBezierSpline(
@@ -490,21 +579,36 @@ class CubicBezierSpline:
             t = t - idx
         return self.cbs[idx].eval_derivative(t)
 
-    def approximate_totlength_uniform(self, fn_dist, split=None):
+    def approximate_totlength_uniform(self, fn_dist=None, split=None):
         return sum(self.approximate_lengths_uniform(fn_dist, split=split))
 
-    def approximate_lengths_uniform(self, fn_dist, split=None):
+    def approximate_lengths_uniform(self, fn_dist=None, split=None):
         return [
             cb.approximate_length_uniform(fn_dist, split=split)
             for cb in self.cbs
         ]
 
     def approximate_ts_at_intervals_uniform(
-        self, intervals, fn_dist, split=None
+        self, intervals, fn_dist=None, split=None
     ):
         lengths = self.approximate_lengths_uniform(fn_dist, split=split)
         totlength = sum(lengths)
         ts = []
+        if fn_dist is None:
+            # binary search for bezier containing interval, then lookup t in its table
+            ends = np.cumsum(lengths).tolist()
+            for interval in intervals:
+                if interval < 0:
+                    ts.append(0)
+                    continue
+                if interval >= totlength:
+                    ts.append(len(self.cbs))
+                    continue
+                i = bisect_left(ends, interval)
+                t = self.cbs[i].approximate_t_at_interval_uniform(
+                    interval - (ends[i] - lengths[i]), split=split)
+                ts.append(i + t)
+            return ts
         for interval in intervals:
             if interval < 0:
                 ts.append(0)
@@ -533,72 +637,75 @@ class CubicBezierSpline:
 
     #########################################
     #                                       #
-    # the following code **requires** that  #
-    # self.tessellate_uniform() is called   #
-    # beforehand!                           #
+    # the following code uses the settings  #
+    # of the last self.tessellate_uniform() #
+    # call (or the defaults).  tessellation #
+    # is rebuilt only when control points   #
+    # move.                                 #
     #                                       #
     #########################################
 
-    def tessellate_uniform(self, fn_dist, split=None):
-        self.tessellation.clear()
-        for i, cb in enumerate(self.cbs):
-            cb_tess = cb.get_tessellate_uniform(fn_dist, split=split)
-            self.tessellation.append(cb_tess)
+    def tessellate_uniform(self, fn_dist=None, split=None):
+        for cb in self.cbs:
+            cb.tessellate_uniform(fn_dist, split=split)
+
+    def get_tessellation(self):
+        '''
+        returns ArcLengthTable of tessellations of all beziers joined, where t of
+        bezier i is offset by i
+        '''
+        tables = [cb.get_tessellation() for cb in self.cbs]
+        prev_tables, table = self._tessellation
+        if prev_tables is None or len(prev_tables) != len(tables) or any(a is not b for a, b in zip(prev_tables, tables)):
+            if tables:
+                table = ArcLengthTable(
+                    np.concatenate([i + t.ts for i, t in enumerate(tables)]),
+                    np.concatenate([t.ps for t in tables]),
+                    np.concatenate([t.ds for t in tables]),
+                )
+            else:
+                table = ArcLengthTable(np.zeros((0,)), np.zeros((0, 3)), np.zeros((0,)))
+            self._tessellation = (tables, table)
+        return table
+
+    @property
+    def tessellation(self):
+        return [cb.tessellation for cb in self.cbs]
 
     def approximate_totlength_tessellation(self):
-        return sum(self.approximate_lengths_tessellation())
+        return self.get_tessellation().totlength
 
     def approximate_lengths_tessellation(self):
-        return [sum(d for _, _, d in cb_tess) for cb_tess in self.tessellation]
+        return [cb.approximate_totlength_tessellation() for cb in self.cbs]
 
     def approximate_ts_at_intervals_tessellation(self, intervals):
-        lengths = self.approximate_lengths_tessellation()
-        totlength = sum(lengths)
+        table = self.get_tessellation()
         ts = []
         for interval in intervals:
             if interval < 0:
                 ts.append(0)
-                continue
-            if interval >= totlength:
+            elif interval >= table.totlength:
                 ts.append(len(self.cbs))
-                continue
-            for i, length in enumerate(lengths):
-                if interval > length:
-                    interval -= length
-                    continue
-                cb_tess = self.tessellation[i]
-                for t, p, d in cb_tess:
-                    if interval > d:
-                        interval -= d
-                        continue
-                    ts.append(i+t)
-                    break
-                else:
-                    assert False
-                break
             else:
-                assert False
-        return ts
-
-    def approximate_ts_at_points_tessellation(self, points, fn_dist):
-        ts = []
-        for p in points:
-            bd, bt = None, None
-            for i, cb_tess in enumerate(self.tessellation):
-                for t, q, _ in cb_tess:
-                    d = fn_dist(p, q)
-                    if bd is None or d < bd:
-                        bd, bt = d, i+t
-            ts.append(bt)
+                ts.append(table.t_at_length(interval))
         return ts
 
-    def approximate_t_at_point_tessellation(self, point, fn_dist):
+    def approximate_ts_at_points_tessellation(self, points, fn_dist=None):
+        if fn_dist is None:
+            if not self.cbs: return [None for _ in points]
+            return self.get_tessellation().ts_at_points([tuple(p) for p in points])
+        return [self.approximate_t_at_point_tessellation(p, fn_dist) for p in points]
+
+    def approximate_t_at_point_tessellation(self, point, fn_dist=None):
+        if not self.cbs: return None
+        table = self.get_tessellation()
+        if fn_dist is None:
+            return table.t_at_point(point)
         bd, bt = None, None
-        for i, cb_tess in enumerate(self.tessellation):
-            for t, q, _ in cb_tess:
-                d = fn_dist(point, q)
-                if bd is None or d < bd:
-                    bd, bt = d, i+t
+        for t, q, _ in table.as_tessellation():
+            d = fn_dist(point, q)
+            if bd is None or d < bd:
+                bd, bt = d, t
         return bt
 
 
@@ -21,10 +21,13 @@ Created by Jonathan Denning, Jonathan Williamson
 
 import re
 import random
-from math import sqrt, acos, cos, sin, floor, ceil, isinf, sqrt, pi, isnan
+from collections import OrderedDict
+from math import sqrt, acos, cos, sin, floor, ceil, isinf, pi, isnan
 from typing import List
 from itertools import chain
 
+import numpy as np
+
 import gpu
 from mathutils import Matrix, Vector, Quaternion
 from bmesh.types import BMVert
@@ -958,24 +961,37 @@ class XForm:
             (0, 0, 0, 1),
             )))
 
+    # derived matrices for recently used transforms, least recently used first
+    _mats_cache = OrderedDict()
+    _mats_cache_size = 256
+
     @staticmethod
     def get_mats(mx: Matrix):
-        smat, d = str(mx), XForm.get_mats.__dict__
-        if smat not in d:
-            m = {
-                'mx_p': None, 'imx_p': None,
-                'mx_d': None, 'imx_d': None,
-                'mx_n': None, 'imx_n': None
-            }
-            m[ 'mx_p'] = Matrix(mx)
-            m[ 'mx_t'] = mx.transposed()
-            m['imx_p'] = mx.inverted_safe()
-            m[ 'mx_d'] = mx.to_3x3()
-            m['imx_d'] = m['mx_d'].inverted_safe()
-            m[ 'mx_n'] = m['imx_d'].transposed()
-            m['imx_n'] = m['mx_d'].transposed()
-            d[smat] = m
-        return d[smat]
+        key, d = tuple(x for r in mx for x in r), XForm._mats_cache
+        m = d.get(key)
+        if m is not None:
+            d.move_to_end(key)
+            return m
+        m = {
+            'mx_p': None, 'imx_p': None,
+            'mx_d': None, 'imx_d': None,
+            'mx_n': None, 'imx_n': None
+        }
+        m[ 'mx_p'] = Matrix(mx)
+        m[ 'mx_t'] = mx.transposed()
+        m['imx_p'] = mx.inverted_safe()
+        m[ 'mx_d'] = mx.to_3x3()
+        m['imx_d'] = m['mx_d'].inverted_safe()
+        m[ 'mx_n'] = m['imx_d'].transposed()
+        m['imx_n'] = m['mx_d'].transposed()
+        # transposed NumPy versions, for batch conversions (row vectors on left)
+        m[ 'np_p'] = np.array(m[ 'mx_p'], dtype=np.float64).T
+        m['inp_p'] = np.array(m['imx_p'], dtype=np.float64).T
+        m[ 'np_n'] = np.array(m[ 'mx_n'], dtype=np.float64).T
+        m['inp_n'] = np.array(m['imx_n'], dtype=np.float64).T
+        d[key] = m
+        if len(d) > XForm._mats_cache_size: d.popitem(last=False)
+        return m
 
     @stats_wrapper
     def __init__(self, mx: Matrix=None, *, rows=None):
@@ -994,6 +1010,9 @@ class XForm:
         self.mx_d, self.imx_d = mats['mx_d'], mats['imx_d']
         self.mx_n, self.imx_n = mats['mx_n'], mats['imx_n']
         self.mx_t = mats['mx_t']
+        self.np_p, self.inp_p = mats['np_p'], mats['inp_p']
+        self.np_n, self.inp_n = mats['np_n'], mats['inp_n']
+        self.is_identity = (self.mx_p == Matrix.Identity(4))
 
         self.fn_l2w_typed = {
             Ray: self.l2w_ray,
@@ -1124,6 +1143,24 @@ class XForm:
     def l2w_bmvert(self, bmv: BMVert) -> Point: return Point(self.mx_p @ bmv.co)
     def w2l_bmvert(self, bmv: BMVert) -> Point: return Point(self.imx_p @ bmv.co)
 
+    # batch conversions: take and return (n,3) NumPy arrays, one matrix multiply for all rows
+
+    @staticmethod
+    def _xform_points(points, mx):
+        points = np.asarray(points, dtype=np.float64).reshape((-1, 3))
+        v = points @ mx[:3] + mx[3]
+        return v[:,:3] / v[:,3:]
+
+    @staticmethod
+    def _xform_normals(normals, mx):
+        # same as l2w_normal / w2l_normal, results are not renormalized
+        return np.asarray(normals, dtype=np.float64).reshape((-1, 3)) @ mx
+
+    def l2w_points(self, points) -> np.ndarray:  return self._xform_points(points, self.np_p)
+    def w2l_points(self, points) -> np.ndarray:  return self._xform_points(points, self.inp_p)
+    def l2w_normals(self, normals) -> np.ndarray: return self._xform_normals(normals, self.np_n)
+    def w2l_normals(self, normals) -> np.ndarray: return self._xform_normals(normals, self.inp_n)
+
     @staticmethod
     def to_gpubuffer(mat):
         return gpu.types.Buffer('FLOAT', [len(mat), len(mat)], mat)
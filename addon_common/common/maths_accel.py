@@ -23,13 +23,15 @@ import re
 import random
 from math import sqrt, acos, cos, sin, floor, ceil, isinf, sqrt, pi, isnan, isfinite
 from typing import List
-from itertools import chain
+from itertools import chain, product
 from concurrent.futures import ProcessPoolExecutor
 
+import numpy as np
+
 import gpu
 from mathutils import Matrix, Vector, Quaternion
 from bmesh.types import BMVert
-from mathutils.geometry import intersect_line_plane, intersect_point_tri
+from mathutils.geometry import intersect_line_plane, intersect_point_tri, intersect_point_tri_2d
 
 from .maths import zero_threshold, BBox2D, Point2D, clamp, Vec2D, Vec, mid
 
@@ -75,6 +77,10 @@ class Accel2D:
         verts = [ co for e in edges for co in e.verts ]
         return Accel2D(label, verts, edges, [], Point_to_Point2Ds)
 
+    def _insert_vert(self, vert):
+        for pt in self.Point_to_Point2Ds(vert.co, vert.normal):
+            self._put(self.compute_ij(pt), vert)
+
     def _insert_edge(self, edge):
         pts_list = zip(*[ self.Point_to_Point2Ds(v.co, v.normal) for v in edge.verts ])
         for co0, co1 in pts_list:
@@ -84,18 +90,35 @@ class Accel2D:
                 for j in range(minj, maxj + 1):
                     self._put((i, j), edge)
 
+    def _insert_face(self, face):
+        ''' returns (spread, size i, size j) of largest bin range covered by face, for debugging '''
+        max_spread = (1, 1, 1)
+        for f_pts in zip(*[ self.Point_to_Point2Ds(v.co, v.normal) for v in face.verts ]):
+            bbox2 = BBox2D((self.compute_ij(pt) for pt in f_pts))
+            mini, minj, maxi, maxj = int(bbox2.mx), int(bbox2.my), int(bbox2.Mx), int(bbox2.My)
+            sizei, sizej = maxi - mini + 1, maxj - minj + 1
+            if (spread := sizei*sizej) > max_spread[0]: max_spread = (spread, sizei, sizej)
+            for i in range(mini, maxi + 1):
+                for j in range(minj, maxj + 1):
+                    self._put((i, j), face)
+        return max_spread
+
     @profiler.function
     def __init__(self, label, verts, edges, faces, Point_to_Point2Ds):
-        self.verts = list(verts) if verts else []
-        self.edges = list(edges) if edges else []
-        self.faces = list(faces) if faces else []
+        self.verts = set(verts) if verts else set()
+        self.edges = set(edges) if edges else set()
+        self.faces = set(faces) if faces else set()
         self.Point_to_Point2Ds = Point_to_Point2Ds
 
-        vert_type, edge_type, face_type = ( type(elems[0] if elems else None) for elems in [self.verts, self.edges, self.faces] )
-        self._is_vert = lambda elem: isinstance(elem, vert_type)
-        self._is_edge = lambda elem: isinstance(elem, edge_type)
-        self._is_face = lambda elem: isinstance(elem, face_type)
+        self._vert_type, self._edge_type, self._face_type = ( type(next(iter(elems), None)) for elems in [self.verts, self.edges, self.faces] )
+        self._is_vert = lambda elem: isinstance(elem, self._vert_type)
+        self._is_edge = lambda elem: isinstance(elem, self._edge_type)
+        self._is_face = lambda elem: isinstance(elem, self._face_type)
         self.bins = {}
+        self.elem_bins = {}     # elem -> set of bins (ij) containing elem, for removing / updating elems
+        self.delta_count = 0    # number of elems inserted / removed since built
+
+        verts, edges, faces = self.verts, self.edges, self.faces
 
         # collect all involved pts so we can find bbox
         with time_it('collect', enabled=Accel2D.DEBUG):
@@ -137,17 +160,9 @@ class Accel2D:
         with time_it('insert edges and faces', enabled=Accel2D.DEBUG):
             for e in edges:
                 self._insert_edge(e)
-            for ef in faces:
-                ef_pts_list = zip(*[Point_to_Point2Ds(v.co, v.normal) for v in ef.verts])
-                for ef_pts in ef_pts_list:
-                    tot_inserted += 1
-                    bbox2 = BBox2D((self.compute_ij(pt) for pt in ef_pts))
-                    mini, minj, maxi, maxj = int(bbox2.mx), int(bbox2.my), int(bbox2.Mx), int(bbox2.My)
-                    sizei, sizej = maxi - mini + 1, maxj - minj + 1
-                    if (spread := sizei*sizej) > max_spread[0]: max_spread = (spread, sizei, sizej)
-                    for i in range(mini, maxi + 1):
-                        for j in range(minj, maxj + 1):
-                            self._put((i, j), ef)
+            for f in faces:
+                tot_inserted += 1
+                max_spread = max(max_spread, self._insert_face(f))
 
         if Accel2D.DEBUG:
             # debug reporting
@@ -183,6 +198,44 @@ class Accel2D:
         # assert 0 <= ij[0] < self.bin_len and 0 <= ij[1] < self.bin_len, f'{ij} is outside {self.bin_len}x{self.bin_len}'
         if ij in self.bins: self.bins[ij].add(o)
         else:               self.bins[ij] = { o }
+        if o in self.elem_bins: self.elem_bins[o].add(ij)
+        else:                   self.elem_bins[o] = { ij }
+
+    ###########################################################
+    # delta updates
+    # elems projecting outside the bbox computed when built are clamped into the border bins,
+    # so queries stay correct, but bins can fill up.  see delta_count for when to rebuild
+
+    def insert_vert(self, vert):
+        if self._vert_type is type(None): self._vert_type = type(vert)
+        self.verts.add(vert)
+        self._insert_vert(vert)
+        self.delta_count += 1
+
+    def insert_edge(self, edge):
+        if self._edge_type is type(None): self._edge_type = type(edge)
+        self.edges.add(edge)
+        self._insert_edge(edge)
+        self.delta_count += 1
+
+    def insert_face(self, face):
+        if self._face_type is type(None): self._face_type = type(face)
+        self.faces.add(face)
+        self._insert_face(face)
+        self.delta_count += 1
+
+    def remove(self, elem):
+        ''' removes vert, edge, or face from all bins (elem need not be valid) '''
+        ijs = self.elem_bins.pop(elem, None)
+        if ijs is None: return
+        for ij in ijs:
+            b = self.bins[ij]
+            b.discard(elem)
+            if not b: del self.bins[ij]
+        self.verts.discard(elem)
+        self.edges.discard(elem)
+        self.faces.discard(elem)
+        self.delta_count += 1
 
     def _get(self, ij):
         return self.bins[ij] if ij in self.bins else set()
@@ -193,6 +246,11 @@ class Accel2D:
             t: {o for o in objs if o.is_valid}
             for (t, objs) in self.bins.items()
         }
+        self.elem_bins = {
+            o: ijs
+            for (o, ijs) in self.elem_bins.items()
+            if o.is_valid
+        }
 
     @profiler.function
     def get(self, v2d, within, *, fn_filter=None):
@@ -222,3 +280,223 @@ class Accel2D:
     def get_faces(self, v2d, within):
         return self.get(v2d, within, fn_filter=self._is_face)
 
+
+
+class SegmentGrid2D:
+    '''
+    uniform 2D grid (sparse, dict of bins) of line segments, for finding the segments near a
+    query segment.  the bins that a query segment passes through are found by walking the
+    grid (DDA), so a query only touches bins along the segment rather than every segment.
+    segments are given as (key, p0, p1) with p0 and p1 as Point2D.
+    '''
+
+    def __init__(self, segments, *, cell_size=None):
+        self.bins = {}
+        segments = [(k, p0, p1) for (k, p0, p1) in segments if p0 is not None and p1 is not None]
+        if cell_size is None:
+            # about the average segment length, so each segment falls into only a few bins
+            total = sum((p1 - p0).length for (_, p0, p1) in segments)
+            cell_size = total / len(segments) if segments else 1.0
+        self.cell_size = max(cell_size, 1.0)
+        for segment in segments:
+            _, p0, p1 = segment
+            for ij in self._iter_line_cells(p0, p1):
+                if ij in self.bins: self.bins[ij].append(segment)
+                else:               self.bins[ij] = [segment]
+
+    def compute_ij(self, v2d):
+        cs = self.cell_size
+        return (floor(v2d.x / cs), floor(v2d.y / cs))
+
+    def _iter_line_cells(self, p0, p1):
+        # Amanatides-Woo traversal of the bins between p0 and p1
+        cs = self.cell_size
+        x0, y0, x1, y1 = p0.x / cs, p0.y / cs, p1.x / cs, p1.y / cs
+        i, j = floor(x0), floor(y0)
+        i1, j1 = floor(x1), floor(y1)
+        dx, dy = x1 - x0, y1 - y0
+        si, sj = (1 if dx > 0 else -1), (1 if dy > 0 else -1)
+        tdx = abs(1 / dx) if dx else float('inf')
+        tdy = abs(1 / dy) if dy else float('inf')
+        tmx = ((i + 1 - x0) if dx > 0 else (x0 - i)) * tdx if dx else float('inf')
+        tmy = ((j + 1 - y0) if dy > 0 else (y0 - j)) * tdy if dy else float('inf')
+        yield (i, j)
+        for _ in range(abs(i1 - i) + abs(j1 - j)):
+            if tmx < tmy: i, tmx = i + si, tmx + tdx
+            else:         j, tmy = j + sj, tmy + tdy
+            yield (i, j)
+
+    def get(self, p0, p1, within=0):
+        '''
+        returns list of segments (key, p0, p1) stored in bins that are within `within` of the
+        bins that segment p0-p1 passes through (a superset of segments within `within` of p0-p1)
+        '''
+        if p0 is None or p1 is None: return []
+        if not all(isfinite(v) for v in (p0.x, p0.y, p1.x, p1.y)): return []
+        r = ceil(within / self.cell_size)
+        touched_bins, touched, found = set(), set(), []
+        for (i, j) in self._iter_line_cells(p0, p1):
+            for di in range(-r, r + 1):
+                for dj in range(-r, r + 1):
+                    ij = (i + di, j + dj)
+                    if ij in touched_bins: continue
+                    touched_bins.add(ij)
+                    for segment in self.bins.get(ij, ()):
+                        if id(segment) in touched: continue
+                        touched.add(id(segment))
+                        found.append(segment)
+        return found
+
+
+class TriangleIndex2D:
+    '''
+    uniform 2D grid (sparse, dict of bins) of projected polygons (fan triangulated), for
+    point-location queries.  each polygon has a key (ex: BMFace) and a depth (ex: distance
+    along view forward), and queries return keys of polygons containing the point in
+    front-to-back order.  polygons can be inserted after creation (ex: new faces).
+    '''
+
+    def __init__(self, polygons=None, *, cell_size=None):
+        polygons = [(k, [pt for pt in pts if pt], d) for (k, pts, d) in (polygons or [])]
+        polygons = [(k, pts, d) for (k, pts, d) in polygons if len(pts) >= 3]
+        if cell_size is None:
+            # about the average polygon size, so each polygon falls into only a few bins
+            sizes = [
+                max(max(pt.x for pt in pts) - min(pt.x for pt in pts), max(pt.y for pt in pts) - min(pt.y for pt in pts))
+                for (_, pts, _) in polygons
+            ]
+            cell_size = sum(sizes) / len(sizes) if sizes else 16.0
+        self.cell_size = max(cell_size, 1.0)
+        self.bins = {}
+        for (key, pts, depth) in polygons:
+            self._insert(key, pts, depth)
+
+    def compute_ij(self, v2d):
+        cs = self.cell_size
+        return (floor(v2d.x / cs), floor(v2d.y / cs))
+
+    def insert(self, key, pts, depth):
+        pts = [pt for pt in pts if pt]
+        if len(pts) >= 3: self._insert(key, pts, depth)
+
+    def _insert(self, key, pts, depth):
+        pt0 = pts[0]
+        for pt1, pt2 in zip(pts[1:-1], pts[2:]):
+            tri = (depth, key, pt0, pt1, pt2)
+            i0, j0 = self.compute_ij(Point2D((min(pt0.x, pt1.x, pt2.x), min(pt0.y, pt1.y, pt2.y))))
+            i1, j1 = self.compute_ij(Point2D((max(pt0.x, pt1.x, pt2.x), max(pt0.y, pt1.y, pt2.y))))
+            for i in range(i0, i1 + 1):
+                for j in range(j0, j1 + 1):
+                    if (i, j) in self.bins: self.bins[(i, j)].append(tri)
+                    else:                   self.bins[(i, j)] = [tri]
+
+    def get(self, v2d, *, fn_filter=None):
+        ''' returns keys of polygons containing v2d, in front-to-back (increasing depth) order '''
+        if v2d is None or not (isfinite(v2d.x) and isfinite(v2d.y)): return []
+        hits = {}
+        for (depth, key, pt0, pt1, pt2) in self.bins.get(self.compute_ij(v2d), ()):
+            if key in hits and hits[key] <= depth: continue
+            if fn_filter and not fn_filter(key): continue
+            if intersect_point_tri_2d(v2d, pt0, pt1, pt2): hits[key] = depth
+        return sorted(hits, key=hits.get)
+
+    def get_first(self, v2d, *, fn_filter=None):
+        ''' returns key of front-most polygon containing v2d, or None '''
+        return next(iter(self.get(v2d, fn_filter=fn_filter)), None)
+
+
+class PointHash:
+    '''
+    uniform grid spatial hash (sparse, dict of bins) of points in any number of dimensions,
+    for finding the points within a distance of a query point.  with cell size about the
+    query distance, each query only touches the 3^d bins around it, so expected O(1).
+    points are given as a sequence of tuples, and queries return indices into points.
+    '''
+
+    def __init__(self, points, cell_size, *, indices=None):
+        self.points = [tuple(pt) for pt in points]
+        self.dims = len(self.points[0]) if self.points else 0
+        self.cell_size = cell_size
+        self.bins = {}
+        for i in (range(len(self.points)) if indices is None else indices):
+            ijk = self.compute_ijk(self.points[i])
+            if ijk in self.bins: self.bins[ijk].append(i)
+            else:                self.bins[ijk] = [i]
+
+    def compute_ijk(self, pt):
+        cs = self.cell_size
+        return tuple(floor(v / cs) for v in pt)
+
+    def get(self, pt, within):
+        ''' returns indices of (inserted) points within `within` of pt '''
+        r = max(1, ceil(within / self.cell_size))
+        within2 = within * within
+        points, found = self.points, []
+        ijk = self.compute_ijk(pt)
+        for offset in product(range(-r, r + 1), repeat=self.dims):
+            for i in self.bins.get(tuple(a + b for (a, b) in zip(ijk, offset)), ()):
+                if sum((a - b) ** 2 for (a, b) in zip(points[i], pt)) <= within2:
+                    found.append(i)
+        return found
+
+
+def compute_weld_map(points, dist, *, sources=None, targets=None, clamp_axes=(), clamp_dist=0.0):
+    '''
+    finds which points weld (merge) into which, for points within dist of each other.
+    sources (points that can be merged away) and targets (points that can be merged into)
+    are bool masks, defaulting to all points.  a source and a target within dist of each
+    other are linked, and points are clustered transitively over these links (union-find).
+    the anchors of a cluster are its targets that are not sources.  each source of the
+    cluster merges into its nearest anchor, or, if the cluster has no anchors, into the
+    lowest index target of the cluster.  so, no linked pair of points is left unmerged,
+    and there are no chains (points that are merged into are never merged away).
+    points within clamp_dist of the plane of a clamp axis (ex: symmetry planes) are moved
+    onto that plane first, so points close to the plane weld on the plane.
+    returns (merge_map, points), where merge_map[i] is the index of the point that point i
+    merges into (i if point i is kept), and points are the (clamped) points as (n,d) array.
+    runs in O(n) expected time (see PointHash)
+    '''
+    points = np.array(points, dtype=np.float64)
+    count = len(points)
+    merge_map = np.arange(count)
+    if not count: return (merge_map, points.reshape((0, 3)))
+    for axis in clamp_axes:
+        points[np.abs(points[:,axis]) <= clamp_dist, axis] = 0.0
+    if not dist > 0: return (merge_map, points)
+
+    sources = np.ones(count, dtype=bool) if sources is None else np.asarray(sources, dtype=bool)
+    targets = np.ones(count, dtype=bool) if targets is None else np.asarray(targets, dtype=bool)
+    pts = points.tolist()
+    grid = PointHash(pts, dist, indices=np.flatnonzero(targets).tolist())
+
+    # cluster linked points with union-find (path halving)
+    parent = list(range(count))
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+    linked = set()
+    for i in np.flatnonzero(sources).tolist():
+        for j in grid.get(pts[i], dist):
+            if j == i: continue
+            linked.add(i)
+            linked.add(j)
+            ri, rj = find(i), find(j)
+            if ri != rj: parent[max(ri, rj)] = min(ri, rj)
+    clusters = {}
+    for i in sorted(linked):
+        clusters.setdefault(find(i), []).append(i)
+
+    sources, targets = sources.tolist(), targets.tolist()
+    mm = merge_map.tolist()
+    for cluster in clusters.values():
+        anchors = [j for j in cluster if targets[j] and not sources[j]] or [next(j for j in cluster if targets[j])]
+        anchors_set = set(anchors)
+        for i in cluster:
+            if not sources[i] or i == anchors[0]: continue
+            pt = pts[i]
+            # nearest anchor is usually within dist, so check those first before all anchors of cluster
+            near = [j for j in grid.get(pt, dist) if j in anchors_set]
+            mm[i] = min(near or anchors, key=lambda j: (sum((a - b) ** 2 for (a, b) in zip(pts[j], pt)), j))
+    return (np.array(mm, dtype=np.int64), points)
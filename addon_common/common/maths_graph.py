@@ -0,0 +1,84 @@
+'''
+Copyright (C) 2023 CG Cookie
+http://cgcookie.com
+hello@cgcookie.com
+
+Created by Jonathan Denning, Jonathan Williamson
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+import numpy as np
+
+
+'''
+Array-based graph helpers, where a graph is given as a node count and an (m,2) array of
+node index pairs (ex: mesh edges as vert index pairs).
+'''
+
+
+def as_pairs(pairs):
+    pairs = np.asarray(pairs, dtype=np.int64)
+    return pairs.reshape((-1, 2))
+
+
+def label_components(count, pairs):
+    '''
+    returns array of count labels, where two nodes have the same label iff they are connected.
+    each label is the smallest node index in its component.
+
+    union-find done in bulk: every pass hooks the root of the larger label onto the root of
+    the smaller label for all pairs at once, then flattens the trees with pointer jumping
+    '''
+    labels = np.arange(count, dtype=np.int64)
+    pairs = as_pairs(pairs)
+    if not count or not len(pairs): return labels
+    a, b = pairs[:,0], pairs[:,1]
+    while True:
+        la, lb = labels[a], labels[b]
+        differ = la != lb
+        if not differ.any(): break
+        la, lb = la[differ], lb[differ]
+        lmin = np.minimum(la, lb)
+        np.minimum.at(labels, la, lmin)
+        np.minimum.at(labels, lb, lmin)
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels): break
+            labels = jumped
+        a, b = a[differ], b[differ]
+    return labels
+
+
+def group_labels(labels):
+    ''' returns list of index arrays, one per label (ordered by label) '''
+    labels = np.asarray(labels)
+    if not len(labels): return []
+    order = np.argsort(labels, kind='stable')
+    splits = np.flatnonzero(np.diff(labels[order])) + 1
+    return np.split(order, splits)
+
+
+def build_csr(count, pairs):
+    '''
+    returns (offsets, neighbors) adjacency in compressed sparse row form, where neighbors of
+    node i are neighbors[offsets[i]:offsets[i+1]].  pairs are treated as undirected
+    '''
+    pairs = as_pairs(pairs)
+    src = np.concatenate((pairs[:,0], pairs[:,1]))
+    dst = np.concatenate((pairs[:,1], pairs[:,0]))
+    order = np.argsort(src, kind='stable')
+    offsets = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=count), out=offsets[1:])
+    return (offsets, dst[order])
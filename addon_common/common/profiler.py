@@ -21,9 +21,13 @@ Created by Jonathan Denning, Jonathan Williamson, and Patrick Moore
 
 from functools import wraps
 import os
+import sys
+import json
 import time
 import inspect
+import threading
 import contextlib
+from collections import deque
 
 from .blender import get_path_from_addon_root
 from .globals import Globals
@@ -31,6 +35,119 @@ from .globals import Globals
 def clamp(v, m, M):
     return max(m, min(M, v))
 
+
+class ProfilerTimeline:
+    '''
+    Records begin/end events into a fixed-size ring buffer.  Each event is a
+    tuple (phase, name, timestamp, thread id), where phase is 'B' or 'E'.
+    Oldest events fall off the end once the buffer is full, so leaving the
+    timeline on for a whole session costs a bounded amount of memory.
+
+    Exports to Chrome Trace Event JSON (chrome://tracing, Perfetto) or to
+    speedscope evented profiles.
+    '''
+
+    def __init__(self, size=100_000):
+        self.resize(size)
+
+    def resize(self, size):
+        self.size = max(1, int(size))
+        self.events = deque(maxlen=self.size)
+        self.start_time = time.perf_counter()
+
+    def clear(self):
+        self.events.clear()
+        self.start_time = time.perf_counter()
+
+    def begin(self, name):
+        # deque.append is atomic, so no lock is needed when called from worker threads
+        self.events.append(('B', name, time.perf_counter(), threading.get_ident()))
+
+    def end(self, name):
+        self.events.append(('E', name, time.perf_counter(), threading.get_ident()))
+
+    def _balanced_events(self):
+        # ring buffer may have dropped the begin event of some end events, and
+        # some begin events may not have ended yet.  drop unmatched end events,
+        # and close still-open begin events at the time of the last event
+        events = list(self.events)
+        if not events: return []
+        last_time = max(ts for (_, _, ts, _) in events)
+        balanced = []
+        stacks = {}
+        for (ph, name, ts, tid) in events:
+            stack = stacks.setdefault(tid, [])
+            if ph == 'B':
+                stack.append(name)
+                balanced.append((ph, name, ts, tid))
+            elif stack and stack[-1] == name:
+                stack.pop()
+                balanced.append((ph, name, ts, tid))
+        for tid, stack in stacks.items():
+            for name in reversed(stack):
+                balanced.append(('E', name, last_time, tid))
+        return balanced
+
+    def to_chrome_trace(self):
+        pid = os.getpid()
+        trace_events = [{
+            'name': name,
+            'ph':   ph,
+            'ts':   (ts - self.start_time) * 1_000_000,  # microseconds
+            'pid':  pid,
+            'tid':  tid,
+        } for (ph, name, ts, tid) in self._balanced_events()]
+        trace_events += [{
+            'name': 'thread_name',
+            'ph':   'M',
+            'pid':  pid,
+            'tid':  thread.ident,
+            'args': {'name': thread.name},
+        } for thread in threading.enumerate()]
+        return {
+            'traceEvents':     trace_events,
+            'displayTimeUnit': 'ms',
+        }
+
+    def to_speedscope(self, name='RetopoFlow'):
+        frames, frame_index = [], {}
+        profiles = {}
+        for (ph, fname, ts, tid) in self._balanced_events():
+            if fname not in frame_index:
+                frame_index[fname] = len(frames)
+                frames.append({'name': fname})
+            t = ts - self.start_time
+            profile = profiles.setdefault(tid, {
+                'type':       'evented',
+                'name':       f'{name} (thread {tid})',
+                'unit':       'seconds',
+                'startValue': t,
+                'endValue':   t,
+                'events':     [],
+            })
+            profile['events'].append({
+                'type':  'O' if ph == 'B' else 'C',
+                'frame': frame_index[fname],
+                'at':    t,
+            })
+            profile['endValue'] = t
+        return {
+            '$schema':  'https://www.speedscope.app/file-format-schema.json',
+            'name':     name,
+            'exporter': 'addon_common.profiler',
+            'shared':   {'frames': frames},
+            'profiles': list(profiles.values()),
+        }
+
+    def export(self, filename, fmt='chrome'):
+        match fmt:
+            case 'chrome':     data = self.to_chrome_trace()
+            case 'speedscope': data = self.to_speedscope()
+            case _:            assert False, f'Unknown profiler timeline format "{fmt}"'
+        with open(filename, 'wt') as f:
+            json.dump(data, f)
+        return filename
+
 class ProfilerHelper:
     def __init__(self, pr, text):
         full_text = (pr.stack[-1].full_text+'^' if pr.stack else '') + text
@@ -49,6 +166,7 @@ class ProfilerHelper:
         self._is_done = False
         self.pr.d_start[self.full_text] = time.time()
         self.pr.stack.append(self)
+        if Profiler._timeline: Profiler.timeline.begin(text)
 
     def __del__(self):
         if Profiler._broken:
@@ -88,6 +206,7 @@ class ProfilerHelper:
         st = self.pr.d_start[self.full_text]
         en = time.time()
         delta = en-st
+        if Profiler._timeline: Profiler.timeline.end(self.text)
         self.update(self.full_text, delta, key_parent=self.parent_text)
         self.update('~~ All Calls ~~', delta)
         self.update(self.all_call, delta, key_parent=self.parent_all_call)
@@ -96,6 +215,15 @@ class ProfilerHelper:
         del self.pr.d_start[self.full_text]
         self.pr.clear_handler()
 
+class TimelineHelper:
+    # lightweight helper used when only the timeline is enabled
+    __slots__ = ('text',)
+    def __init__(self, text):
+        self.text = text
+        Profiler.timeline.begin(text)
+    def done(self):
+        Profiler.timeline.end(self.text)
+
 class ProfilerHelper_Ignore:
     def __init__(self, *args, **kwargs): pass
     def done(self): pass
@@ -110,6 +238,11 @@ class Profiler:
     _broken = False
     _clear = False
 
+    # timeline (ring buffer) mode.  can be enabled without the full profiler
+    _timeline = False
+    _timeline_filename = 'Profiler_trace.json'
+    timeline = ProfilerTimeline()
+
     @staticmethod
     def set_profiler_enabled(v):
         Profiler._enabled = v
@@ -118,6 +251,26 @@ class Profiler:
     def get_profiler_enabled():
         return Profiler._enabled
 
+    @staticmethod
+    def set_profiler_timeline(v, size=None):
+        # note: functions decorated with @profiler.function are only wrapped if
+        # profiler or timeline is enabled at the time they are decorated
+        Profiler._timeline = v
+        if size is not None and size != Profiler.timeline.size:
+            Profiler.timeline.resize(size)
+
+    @staticmethod
+    def get_profiler_timeline():
+        return Profiler._timeline
+
+    @staticmethod
+    def set_profiler_timeline_filename(path):
+        Profiler._timeline_filename = path
+
+    @staticmethod
+    def get_profiler_timeline_filename():
+        return Profiler._timeline_filename
+
     @staticmethod
     def set_profiler_filename(path):
         Profiler._filename = path
@@ -163,10 +316,14 @@ class Profiler:
         if Profiler._broken:
             print('Profiler broken. Ignoring')
             return profilerhelper_ignore
-        if not Profiler._enabled:
-            return profilerhelper_ignore
         if not enabled:
             return profilerhelper_ignore
+        if not Profiler._enabled:
+            if not Profiler._timeline:
+                return profilerhelper_ignore
+            frame = inspect.currentframe()
+            for _ in range(n_backs): frame = frame.f_back
+            return TimelineHelper(text or frame.f_code.co_name)
 
         frame = inspect.currentframe()
         for _ in range(n_backs): frame = frame.f_back
@@ -190,7 +347,7 @@ class Profiler:
 
     @contextlib.contextmanager
     def code(self, *args, enabled=True, **kwargs):
-        if not Profiler._enabled or not enabled:
+        if not (Profiler._enabled or Profiler._timeline) or not enabled:
             yield None
             return
         try:
@@ -211,7 +368,7 @@ class Profiler:
 
 
     def function(self, fn):
-        if not Profiler._enabled:
+        if not (Profiler._enabled or Profiler._timeline):
             return fn
 
         frame = inspect.currentframe().f_back
@@ -224,13 +381,22 @@ class Profiler:
             fnname = clsname + '.' + fnname
         space = ' '*(30-len(fnname))
         text = '%s%s (%s:%d)' % (fnname, space, filename, linenum)
+        timeline_text = '%s (%s:%d)' % (fnname, filename, linenum)
 
         def wrapper(*args, **kwargs):
             # assert not Profiler._broken
             if Profiler._broken:
                 return fn(*args, **kwargs)
             if not Profiler._enabled:
-                return fn(*args, **kwargs)
+                if not Profiler._timeline:
+                    return fn(*args, **kwargs)
+                # timeline only: record begin/end without the stats bookkeeping
+                timeline = Profiler.timeline
+                timeline.begin(timeline_text)
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    timeline.end(timeline_text)
 
             pr = self._start(text=text, addFile=False)
             ret = None
@@ -310,9 +476,317 @@ class Profiler:
         filename = get_path_from_addon_root(Profiler._filename)
         open(filename, 'wt').write(self.strout())
 
+    def export_timeline(self, filename=None, fmt='chrome'):
+        # fmt: 'chrome' (chrome://tracing, Perfetto) or 'speedscope' (speedscope.app)
+        if not filename:
+            filename = get_path_from_addon_root(Profiler._timeline_filename)
+        filename = Profiler.timeline.export(filename, fmt=fmt)
+        print(f'Profiler: exported timeline ({len(Profiler.timeline.events)} events) to {filename}')
+        return filename
+
+    def clear_timeline(self):
+        Profiler.timeline.clear()
+
 profiler = Profiler()
 Globals.set(profiler)
 
+
+class SamplingProfiler:
+    '''
+    Statistical profiler.  A background thread periodically captures the
+    Python stack of a target thread (main thread by default) using
+    sys._current_frames(), so no code needs to be decorated and the profiled
+    code pays no per-call bookkeeping.
+
+    Samples are aggregated by a context label (ex: FSM state / tool name)
+    returned by the context fn, which is called from the sampling thread and
+    must therefore be cheap and only read state.
+
+    Exports collapsed / folded stacks (flamegraph.pl, speedscope, inferno)
+    or speedscope sampled profiles (one profile per context).
+    '''
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._context_fn = None
+        self._code_names = {}
+        self.samples = {}       # (context, stack tuple) -> count
+        self.clear()
+
+    def clear(self):
+        # clear in place, as the sampling thread might be running
+        self.samples.clear()
+        self.sample_count = 0
+        self.start_time = time.time()
+
+    def set_context_fn(self, fn):
+        self._context_fn = fn
+
+    def set_interval(self, interval):
+        self.interval = max(0.0005, float(interval))
+
+    @property
+    def is_running(self):
+        return self._thread is not None
+
+    def start(self, thread_id=None):
+        if self._thread: return
+        if thread_id is None: thread_id = threading.main_thread().ident
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(thread_id,),
+            name='SamplingProfiler',
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self):
+        if not self._thread: return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+
+    def _code_name(self, code):
+        name = self._code_names.get(code)
+        if name is None:
+            name = f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+            self._code_names[code] = name
+        return name
+
+    def _run(self, thread_id):
+        current_frames = sys._current_frames
+        code_name = self._code_name
+        while not self._stop_event.wait(self.interval):
+            frame = current_frames().get(thread_id)
+            if frame is None: continue
+            stack = []
+            while frame is not None:
+                stack.append(code_name(frame.f_code))
+                frame = frame.f_back
+            del frame
+            context = 'unknown'
+            if self._context_fn:
+                try:
+                    context = self._context_fn()
+                except Exception:
+                    pass
+            key = (context, tuple(reversed(stack)))
+            samples = self.samples
+            samples[key] = samples.get(key, 0) + 1
+            self.sample_count += 1
+
+    def contexts(self):
+        counts = {}
+        for (context, _), count in list(self.samples.items()):
+            counts[context] = counts.get(context, 0) + count
+        return counts
+
+    def to_folded(self):
+        return '\n'.join(
+            ';'.join((context,) + stack) + f' {count}'
+            for (context, stack), count in sorted(list(self.samples.items()))
+        )
+
+    def to_speedscope(self, name='RetopoFlow'):
+        frames, frame_index = [], {}
+        profiles = {}
+        for (context, stack), count in list(self.samples.items()):
+            profile = profiles.setdefault(context, {
+                'type':       'sampled',
+                'name':       f'{name}: {context}',
+                'unit':       'seconds',
+                'startValue': 0,
+                'endValue':   0,
+                'samples':    [],
+                'weights':    [],
+            })
+            idxs = []
+            for fname in stack:
+                if fname not in frame_index:
+                    frame_index[fname] = len(frames)
+                    frames.append({'name': fname})
+                idxs.append(frame_index[fname])
+            profile['samples'].append(idxs)
+            profile['weights'].append(count * self.interval)
+            profile['endValue'] += count * self.interval
+        return {
+            '$schema':  'https://www.speedscope.app/file-format-schema.json',
+            'name':     name,
+            'exporter': 'addon_common.profiler',
+            'shared':   {'frames': frames},
+            'profiles': list(profiles.values()),
+        }
+
+    def strout(self, top=10):
+        total = max(1, self.sample_count)
+        s = [
+            'Sampling Profiler:',
+            f'  run: {time.time() - self.start_time:6.2f}secs, {self.sample_count} samples @ {self.interval*1000:0.1f}ms',
+        ]
+        for context, ccount in sorted(self.contexts().items(), key=lambda kv: -kv[1]):
+            s += [f'  {ccount / total * 100:5.1f}% {context}']
+            selfcounts = {}
+            for (c, stack), count in list(self.samples.items()):
+                if c != context or not stack: continue
+                selfcounts[stack[-1]] = selfcounts.get(stack[-1], 0) + count
+            for fname, count in sorted(selfcounts.items(), key=lambda kv: -kv[1])[:top]:
+                s += [f'      {count / ccount * 100:5.1f}% {fname}']
+        return '\n'.join(s)
+
+    def export(self, filename, fmt='folded'):
+        match fmt:
+            case 'folded':     data = self.to_folded()
+            case 'speedscope': data = json.dumps(self.to_speedscope())
+            case _:            assert False, f'Unknown sampling profiler format "{fmt}"'
+        with open(filename, 'wt') as f:
+            f.write(data)
+        print(f'SamplingProfiler: exported {self.sample_count} samples to {filename}')
+        return filename
+
+sampler = SamplingProfiler()
+
+
+
+class FrameTimer:
+    '''
+    Per-frame phase timing.  Code is timed with `frametimer.phase(name)`; time spent in each phase
+    is accumulated over the frame and committed to a rolling window when `new_frame()` is called
+    (once per redraw).  Phases may nest, so phase times do not necessarily sum to the frame time.
+    Tools can register their own phases with `register_phase(name)` so they show in a stable order.
+    '''
+
+    class _Phase:
+        __slots__ = ('frametimer', 'name', 'start')
+        def __init__(self, frametimer, name):
+            self.frametimer = frametimer
+            self.name = name
+        def __enter__(self):
+            self.start = time.perf_counter()
+        def __exit__(self, exc_type, exc_val, exc_tb):
+            current = self.frametimer._current
+            current[self.name] = current.get(self.name, 0.0) + (time.perf_counter() - self.start)
+
+    _noop = contextlib.nullcontext()
+
+    def __init__(self, window=240):
+        self._enabled = False
+        self._phases = []
+        self._current = {}
+        self._frames = deque(maxlen=window)
+        self._frame_start = None
+        self.frame_count = 0
+
+    def set_enabled(self, enabled):
+        enabled = bool(enabled)
+        if self._enabled == enabled: return
+        self._enabled = enabled
+        self.clear()
+
+    @property
+    def enabled(self): return self._enabled
+
+    @property
+    def window(self): return self._frames.maxlen
+
+    def set_window(self, window):
+        if window == self._frames.maxlen: return
+        self._frames = deque(self._frames, maxlen=max(1, int(window)))
+
+    def clear(self):
+        self._current = {}
+        self._frames.clear()
+        self._frame_start = None
+        self.frame_count = 0
+
+    def register_phase(self, name):
+        if name not in self._phases: self._phases.append(name)
+
+    def unregister_phase(self, name):
+        if name in self._phases: self._phases.remove(name)
+
+    def phase(self, name):
+        if not self._enabled: return self._noop
+        return self._Phase(self, name)
+
+    def function(self, name):
+        ''' decorator version of phase '''
+        def wrapper(fn):
+            @wraps(fn)
+            def wrapped(*args, **kwargs):
+                if not self._enabled: return fn(*args, **kwargs)
+                with self._Phase(self, name):
+                    return fn(*args, **kwargs)
+            return wrapped
+        return wrapper
+
+    def new_frame(self):
+        if not self._enabled: return
+        now = time.perf_counter()
+        if self._frame_start is not None:
+            self._frames.append((now - self._frame_start, self._current))
+            self.frame_count += 1
+            for name in self._current:
+                if name not in self._phases: self._phases.append(name)
+        self._current = {}
+        self._frame_start = now
+
+    def phases(self):
+        return list(self._phases)
+
+    def frame_times(self, name=None):
+        ''' times in window for phase name (or entire frame if name is None); frames without phase count as 0 '''
+        if name is None: return [total for (total, _) in self._frames]
+        return [phases.get(name, 0.0) for (_, phases) in self._frames]
+
+    @staticmethod
+    def percentile(sorted_values, p):
+        if not sorted_values: return 0.0
+        return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p / 100))]
+
+    def stats(self):
+        ''' returns list of (name, p50, p95, p99, max) in seconds, starting with entire frame '''
+        results = []
+        for name in [None] + self._phases:
+            values = sorted(self.frame_times(name))
+            results.append((
+                name or 'frame',
+                self.percentile(values, 50),
+                self.percentile(values, 95),
+                self.percentile(values, 99),
+                values[-1] if values else 0.0,
+            ))
+        return results
+
+    def histogram(self, name=None, bins=20, max_time=None):
+        values = self.frame_times(name)
+        max_time = max_time or max(values, default=0.0) or 1.0
+        counts = [0] * bins
+        for v in values:
+            counts[min(bins - 1, int(bins * v / max_time))] += 1
+        return counts
+
+    def strout(self):
+        s = [f'{"phase":24s} {"p50":>7s} {"p95":>7s} {"p99":>7s} {"max":>7s}  (ms, {len(self._frames)} frames)']
+        for (name, p50, p95, p99, pmax) in self.stats():
+            s += [f'{name[:24]:24s} {p50*1000:7.2f} {p95*1000:7.2f} {p99*1000:7.2f} {pmax*1000:7.2f}']
+        return '\n'.join(s)
+
+    def export_csv(self, filename):
+        phases = list(self._phases)
+        frames = list(self._frames)
+        first = self.frame_count - len(frames)
+        with open(filename, 'wt') as f:
+            f.write(','.join(['frame', 'total'] + [f'"{p}"' for p in phases]) + '\n')
+            for i, (total, times) in enumerate(frames):
+                f.write(','.join([str(first + i), f'{total:.6f}'] + [f'{times.get(p, 0.0):.6f}' for p in phases]) + '\n')
+        print(f'FrameTimer: exported {len(frames)} frames to {filename}')
+        return filename
+
+frametimer = FrameTimer()
+
 # class CodeProfiler:
 #     def __init__(self, *args, **kwargs):
 #         self.args = args
@@ -59,7 +59,7 @@ from .decorators import debug_test_call, blender_version_wrapper, add_cache
 from .globals import Globals
 from .hasher import Hasher
 from .maths import Vec2D, Color, mid, Box2D, Size1D, Size2D, Point2D, RelPoint2D, Index2D, clamp, NumberUnit
-from .profiler import profiler, time_it
+from .profiler import profiler, frametimer, time_it
 from .utils import iter_head
 
 from ..ext import png
@@ -399,6 +399,12 @@ class UI_Document:
             profiler.printout()
             self.debug_print()
             return
+        if self.actions.pressed('SHIFT+F12'):
+            profiler.export_timeline(fmt='chrome')
+            return
+        if self.actions.pressed('CTRL+SHIFT+F12'):
+            profiler.export_timeline(fmt='speedscope')
+            return
         if self.actions.pressed('CTRL+SHIFT+F11'):
             self.debug_print_toroot()
             print(f'{self._under_mouse._computed_styles}')
@@ -696,7 +702,8 @@ class UI_Document:
 
         time_start = time.time()
 
-        self.force_clean(context)
+        with frametimer.phase('ui layout'):
+            self.force_clean(context)
 
         Globals.drawing.glCheckError('UI_Document.draw: setting options')
         ScissorStack.start(context)
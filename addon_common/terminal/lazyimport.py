@@ -0,0 +1,180 @@
+'''
+Copyright (C) 2023 CG Cookie
+http://cgcookie.com
+hello@cgcookie.com
+
+Created by Jonathan Denning
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+import sys
+import time
+import importlib
+import importlib.util
+import threading
+from contextlib import contextmanager
+
+from . import term_printer
+
+
+'''
+Helpers for keeping add-on registration fast.
+
+LazyModule stands in for a module until one of its attributes is accessed, so heavy modules
+(tools, UI system, help system, updater) are only imported when they are first needed.
+
+ImportProfiler times imports of modules within a package.  Only modules under the package are
+tracked, so time spent importing other modules (ex: numpy) counts toward the tracked module
+that imported them.  To compare registration times, run something like:
+
+    blender -b --python-expr "import time, importlib; t = time.perf_counter(); \\
+        importlib.import_module('retopoflow.retopoflow.blenderregister'); print(time.perf_counter() - t)"
+
+(note: add-ons skip registration when Blender runs in background, so the module is imported directly)
+
+Note: this file is in terminal (rather than common), because importing anything from common
+will import a few of the common modules (see common/__init__.py) before they can be profiled.
+'''
+
+
+class LazyModule:
+    '''
+    Imports module on first attribute access or call to load().
+    name can be relative (ex: '.retopoflow'), in which case package must be given.
+    '''
+
+    def __init__(self, name, package=None):
+        self._name = importlib.util.resolve_name(name, package) if name.startswith('.') else name
+        self._module = None
+
+    def __repr__(self):
+        return f'<LazyModule {self._name} ({"loaded" if self.is_loaded else "not loaded"})>'
+
+    @property
+    def is_loaded(self):
+        # module might have been imported elsewhere
+        return self._module is not None or self._name in sys.modules
+
+    def load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def reload(self):
+        if not self.is_loaded: return
+        self._module = importlib.reload(self.load())
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+
+class _ProfiledLoader:
+    ''' wraps loader so that executing module is timed by profiler '''
+
+    def __init__(self, loader, profiler):
+        self._loader = loader
+        self._profiler = profiler
+
+    def __getattr__(self, attr):
+        return getattr(self._loader, attr)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._profiler._exec_module(self._loader, module)
+
+
+class ImportProfiler:
+    '''
+    Times imports of modules under package while within profile() context.
+    Reports inclusive time (with nested imports) and self time (without) of each module.
+    '''
+
+    def __init__(self, package):
+        self.package = package
+        self.sessions = []      # list of (label, total seconds, {module name: (inclusive, self)})
+        self._times = None
+        self._stack = None
+        self._thread_id = None
+
+    def _is_tracked(self, fullname):
+        return fullname == self.package or fullname.startswith(f'{self.package}.')
+
+    def find_spec(self, fullname, path, target=None):
+        if self._times is None or not self._is_tracked(fullname): return None
+        for finder in sys.meta_path:
+            if finder is self: continue
+            find_spec = getattr(finder, 'find_spec', None)
+            if not find_spec: continue
+            spec = find_spec(fullname, path, target)
+            if spec is None: continue
+            if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                spec.loader = _ProfiledLoader(spec.loader, self)
+            return spec
+        return None
+
+    def _exec_module(self, loader, module):
+        if self._times is None or threading.get_ident() != self._thread_id:
+            loader.exec_module(module)
+            return
+        self._stack.append(0.0)     # time spent in nested tracked imports
+        start = time.perf_counter()
+        try:
+            loader.exec_module(module)
+        finally:
+            inclusive = time.perf_counter() - start
+            nested = self._stack.pop()
+            if self._stack: self._stack[-1] += inclusive
+            self._times[module.__name__] = (inclusive, inclusive - nested)
+
+    @contextmanager
+    def profile(self, label):
+        if self._times is not None:
+            # already profiling (nested call)
+            yield
+            return
+        self._times, self._stack, self._thread_id = {}, [], threading.get_ident()
+        sys.meta_path.insert(0, self)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            total = time.perf_counter() - start
+            sys.meta_path.remove(self)
+            self.sessions.append((label, total, self._times))
+            self._times, self._stack, self._thread_id = None, None, None
+
+    def report(self, *, count=20):
+        if not self.sessions: return
+        label, total, times = self.sessions[-1]
+        def shorten(name):
+            return name[len(self.package)+1:] if name.startswith(f'{self.package}.') else name
+        ordered = sorted(times.items(), key=lambda kv: kv[1][1], reverse=True)
+        lines = [
+            f'{total * 1000:0.1f}ms total, {len(times)} modules imported',
+            ' ',
+            '    self     incl  module',
+        ]
+        lines += [
+            f'{t_self * 1000:6.1f}ms {t_incl * 1000:6.1f}ms  {shorten(name)}'
+            for (name, (t_incl, t_self)) in ordered[:count]
+        ]
+        if len(ordered) > count:
+            lines += [f'(+{len(ordered) - count} more modules)']
+        term_printer.boxed(
+            *lines,
+            title=f'Import Profiler: {label}', margin=' ', sides='single',
+        )
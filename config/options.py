@@ -41,10 +41,13 @@ from ..addon_common.common.decorators import run
 from ..addon_common.common.drawing import Drawing
 from ..addon_common.common.logger import Logger
 from ..addon_common.common.maths import Color
-from ..addon_common.common.profiler import Profiler
-from ..addon_common.common.ui_document import UI_Document
+from ..addon_common.common.profiler import Profiler, frametimer
 from ..addon_common.common.utils import normalize_triplequote
 from ..addon_common.hive.hive import Hive
+from ..addon_common.terminal.lazyimport import LazyModule
+
+# UI system is only imported once RetopoFlow (or help, etc.) starts
+ui_document = LazyModule('..addon_common.common.ui_document', __package__)
 
 
 ###########################################
@@ -78,11 +81,14 @@ retopoflow_urls = {
 retopoflow_files = {
     'options filename':     'RetopoFlow_options.json',
     'screenshot filename':  'RetopoFlow_screenshot.png',
-    'instrument filename':  'RetopoFlow_instrument.txt',
+    'instrument filename':  'RetopoFlow_instrument.bin',
     'log filename':         'RetopoFlow_log.txt',
     # 'debug filename':       'RetopoFlow_debug.txt',     # hard-coded in __init__.py
     'backup filename':      'RetopoFlow_backup.blend',    # if working on unsaved blend file
     'profiler filename':    'RetopoFlow_profiler.txt',
+    'profiler trace filename': 'RetopoFlow_profiler_trace.json',
+    'profiler samples filename': 'RetopoFlow_profiler_samples.txt',
+    'frame timer filename': 'RetopoFlow_frame_timer.csv',
     'keymaps filename':     'RetopoFlow_keymaps.json',
 }
 
@@ -197,6 +203,9 @@ class Options:
 
         # AUTO SAVE
         'last auto save path':  '',     # file path of last auto save (used for recover)
+        'last target auto save path': '',   # file path of last target-only auto save (used for recover)
+        'auto save target only': True,  # auto save only target mesh to small sidecar file, with occasional full save
+        'auto save full every':  5,     # full .blend auto save after this many target-only auto saves (0: never)
 
         # STARTUP
         'check auto save':      True,       # give warning about disabled auto save at start
@@ -220,7 +229,15 @@ class Options:
 
         # DEBUG, PROFILE, INSTRUMENT SETTINGS
         'profiler':             False,  # enable profiler?
+        'profiler timeline':    False,  # record begin/end events into ring buffer (low overhead)
+        'profiler timeline size': 200_000,  # max number of events kept in timeline ring buffer
+        'profiler sampling':    False,  # periodically sample main thread stack (statistical profiler)
+        'profiler sampling interval': 0.005,  # seconds between stack samples
+        'frame timer':          False,  # time phases of each frame and show p50/p95/p99 overlay
+        'frame timer window':   240,    # number of frames kept in rolling window
+        'import profiler':      False,  # print import times when registering and when first starting RetopoFlow
         'instrument':           False,  # enable instrumentation?
+        'instrument compress':  True,   # zlib compress instrumentation records
         'debug level':          0,      # debug level, 0--5 (for printing to console). 0=no print; 5=print all
         'debug actions':        False,  # print actions (except MOUSEMOVE) to console
 
@@ -233,6 +250,8 @@ class Options:
         'move dist':                10,         # pixels away until mousedrag grabs
         'remove doubles dist':      0.001,
         'push and snap distance':   0.1,        # distance to push vertices out along normal before snapping back to source surface
+        'snap chunk size':          2048,       # number of verts per chunk when snapping many verts to sources
+        'snap async threshold':     50000,      # snapping at least this many verts runs in background with progress and cancel
 
         # VISIBILITY TEST TUNING PARAMETERS
         'visible bbox factor':      0.01,       # rf_sources.visibility_preset_*
@@ -241,6 +260,10 @@ class Options:
         'selection backface test':  True,       # True: do not select geometry that is facing away
 
         'accel recompute delay':    0.125,      # seconds to wait to prevent recomputing accel structs too quickly after navigation
+        'accel rebuild budget':     0.010,      # seconds per frame to spend rebuilding accel structs after view change
+        'accel rebuild chunk size': 1024,       # number of verts tested for visibility between checks of accel rebuild budget
+        'accel delta max fraction': 0.25,       # rebuild accel structs (rather than update) if more than this fraction of verts changed
+        'accel check deltas':       False,      # check accel structs against full rebuild after each delta update (slow!  for debugging)
         'view change delay':        0.250,      # seconds to wait before calling view change callbacks (> accel recompute delay)
         'target change delay':      0.010,      # seconds to wait before calling target change callbacks
 
@@ -351,6 +374,7 @@ class Options:
         # GENERAL SETTINGS
 
         'smooth edge flow iterations':  10,
+        'smooth edge flow tolerance':   0.001,  # stop iterating once no vert moves more than this fraction of avg edge length
         'automerge':                    True,
         'merge dist':                   10,     # pixels away to merge
 
@@ -518,9 +542,15 @@ class Options:
         Logger.set_log_filename(retopoflow_files['log filename'])
         # Profiler.set_profiler_enabled(self['profiler'] and retopoflow_profiler)
         Profiler.set_profiler_filename(self.get_path('profiler filename'))
+        Profiler.set_profiler_timeline(self['profiler timeline'], size=self['profiler timeline size'])
+        Profiler.set_profiler_timeline_filename(self.get_path('profiler trace filename'))
+        frametimer.set_enabled(self['frame timer'])
+        frametimer.set_window(self['frame timer window'])
         Drawing.set_custom_dpi_mult(self['ui scale'])
-        UI_Document.show_tooltips = self['show tooltips']
-        UI_Document.tooltip_delay = self['tooltip delay']
+        if ui_document.is_loaded:
+            # note: blenderregister calls update_external_vars after loading UI system
+            ui_document.UI_Document.show_tooltips = self['show tooltips']
+            ui_document.UI_Document.tooltip_delay = self['tooltip delay']
         self.call_callbacks()
 
     def dirty(self):
@@ -35,45 +35,51 @@ from bpy.props import BoolProperty
 from bpy_extras import object_utils
 from bpy.app.handlers import persistent
 
-from ..addon_common.hive.hive import Hive
-from ..addon_common.common.decorators import add_cache
-from ..addon_common.cookiecutter.cookiecutter import CookieCutter
+from ..addon_common.terminal.lazyimport import ImportProfiler, LazyModule
+
+# times imports of RetopoFlow modules (see options['import profiler'])
+import_profiler = ImportProfiler(re.sub(r'\.retopoflow$', '', __package__))
 
 
 import_succeeded = False
 
 try:
-    if "retopoflow" in locals():
-        print('RetopoFlow: RELOADING!')
-        # reloading RF modules
-        importlib.reload(retopoflow)
-        importlib.reload(image_preloader)
-        importlib.reload(helpsystem)
-        importlib.reload(updatersystem)
-        importlib.reload(keymapsystem)
-        importlib.reload(configoptions)
-        importlib.reload(updater)
-        importlib.reload(cookiecutter)
-        importlib.reload(rftool)
-    else:
-        print('RetopoFlow: Initial load')
+    with import_profiler.profile('register'):
+        if "configoptions" in locals():
+            print('RetopoFlow: RELOADING!')
+            # reloading RF modules
+            importlib.reload(configoptions)
+            importlib.reload(rf_blender_objects)
+            importlib.reload(rf_blender_save)
+            for lazy_module in RF_lazy_modules: lazy_module.reload()
+        else:
+            print('RetopoFlow: Initial load')
+        from ..addon_common.hive.hive import Hive
+        from ..addon_common.common.decorators import add_cache
         from ..config import options as configoptions
-        from . import retopoflow
-        from . import helpsystem
-        from . import updatersystem
-        from . import keymapsystem
-        from . import updater
-        from . import rftool
-        from ..addon_common.cookiecutter import cookiecutter
+        from .rf import rf_blender_objects
+        from .rf import rf_blender_save
         from ..addon_common.common.maths import convert_numstr_num, has_inverse
         from ..addon_common.common.blender import get_active_object, BlenderIcon, get_path_from_addon_root, show_blender_popup, show_blender_text
         from ..addon_common.common.boundvar import BoundBool
-        from ..addon_common.common.image_preloader import ImagePreloader
         from ..addon_common.terminal.deepdebug import DeepDebug
+
+    # the following modules are heavy (tools, CookieCutter UI, help system, updater),
+    # so they are not imported until RetopoFlow, help, etc. are first started.
+    # see load_lazy_modules
+    retopoflow      = LazyModule('.retopoflow',    __package__)
+    helpsystem      = LazyModule('.helpsystem',    __package__)
+    updatersystem   = LazyModule('.updatersystem', __package__)
+    keymapsystem    = LazyModule('.keymapsystem',  __package__)
+    updater         = LazyModule('.updater',       __package__)
+    rftool          = LazyModule('.rftool',        __package__)
+    cookiecutter    = LazyModule('..addon_common.cookiecutter.cookiecutter', __package__)
+    image_preloader = LazyModule('..addon_common.common.image_preloader',    __package__)
+    RF_lazy_modules = [retopoflow, helpsystem, updatersystem, keymapsystem, updater, rftool, cookiecutter]
+
     options = configoptions.options
     rfurls = configoptions.retopoflow_urls
     import_succeeded = True
-    RFTool = rftool.RFTool
 except ModuleNotFoundError as e:
     print('RetopoFlow: ModuleNotFoundError caught when trying to enable add-on!')
     print(e)
@@ -101,35 +107,124 @@ if import_succeeded:
     # point BlenderIcon to correct icon path
     BlenderIcon.path_icons = get_path_from_addon_root('icons')
 
+    class RetopoFlow_Launcher(
+        rf_blender_objects.RetopoFlow_Blender_Objects,
+        rf_blender_save.RetopoFlow_Blender_Save,
+    ):
+        '''
+        lightweight stand-in for RetopoFlow, providing the Blender object and auto save static
+        methods without importing the rest of RetopoFlow
+        '''
+        pass
+
     if options['preload help images']:
         # start preloading images
-        ImagePreloader.start([
+        image_preloader.ImagePreloader.start([
             ('help'),
             ('icons'),
             ('addon_common', 'common', 'images'),
         ])
 
 
+    def is_cookiecutter_broken():
+        return cookiecutter.is_loaded and cookiecutter.is_broken
+
+    def is_retopoflow_running():
+        if retopoflow.is_loaded and retopoflow.RetopoFlow.instance: return True
+        if cookiecutter.is_loaded and cookiecutter.CookieCutter.is_running: return True
+        return False
+
+    def load_lazy_modules():
+        if all(lazy_module.is_loaded for lazy_module in RF_lazy_modules): return
+        print('RetopoFlow: loading modules')
+        with import_profiler.profile('first start'):
+            for lazy_module in RF_lazy_modules: lazy_module.load()
+        if options['import profiler']: import_profiler.report()
+        # apply options to the just loaded UI system
+        options.update_external_vars()
+
+    def check_tool_launchers():
+        # tool launchers are created before tools are imported, so make sure they match
+        tools = [(t.name, t.description, t.icon) for t in rftool.RFTool.registry]
+        assert tools == RF_tools, f'RetopoFlow tool launchers do not match RFTool.registry: {tools}'
+
+
 ##################################################################################
 # Blender Operator Factories
 
+# CookieCutter-based operators (RetopoFlow, help system, etc.) need the tools and UI system,
+# which take a while to import.  Instead, a lightweight launcher operator is registered with
+# the expected idname.  When first invoked, the launcher loads the modules, registers the
+# actual (hidden) modal operator under the idname with '_modal' appended, and then invokes it.
+# bl_options are given to the modal operator only, as the launcher finishes as soon as the modal
+# operator starts.  check_modal (if given) is called on every launch, after the modules are loaded.
+RF_modal_classes = {}
+
+def create_launcher_operator(name, idname, label, description, get_modal_base, *, can_start=None, check_modal=None, bl_options=None, **modal_attrs):
+    modal_options = (set() if bl_options is None else bl_options) | {'INTERNAL'}
+    class VIEW3D_OT_RetopoFlow_Launcher(Operator):
+        bl_idname = idname
+        bl_label = label
+        bl_description = description
+        bl_space_type = 'VIEW_3D'
+        bl_region_type = 'TOOLS'
+        bl_options = set()
+
+        @classmethod
+        def poll(cls, context):
+            if is_cookiecutter_broken(): return False
+            return can_start(context) if can_start else True
+
+        @classmethod
+        def get_modal_operator(cls):
+            if idname not in RF_modal_classes:
+                load_lazy_modules()
+                modal = type(f'{cls.__name__}_Modal', (get_modal_base(),), {
+                    'bl_idname':      f'{idname}_modal',
+                    'bl_label':       label,
+                    'bl_description': description,
+                    'bl_space_type':  'VIEW_3D',
+                    'bl_region_type': 'TOOLS',
+                    'bl_options':     modal_options,
+                    **modal_attrs,
+                })
+                bpy.utils.register_class(modal)
+                RF_modal_classes[idname] = modal
+            return RF_modal_classes[idname]
+
+        def invoke(self, context, event):
+            try:
+                modal = self.get_modal_operator()
+                if check_modal: check_modal()
+            except Exception as e:
+                print(f'RetopoFlow: Caught Exception while trying to load {idname}')
+                print(e)
+                show_blender_popup(f'RetopoFlow could not start: {e}', title='RetopoFlow Error', icon='ERROR')
+                return {'CANCELLED'}
+            op_module, op_name = modal.bl_idname.split('.')
+            ret = getattr(getattr(bpy.ops, op_module), op_name)('INVOKE_DEFAULT')
+            # the modal operator handles undo and events, so launcher is done once it has started
+            return {'FINISHED'} if ret & {'RUNNING_MODAL', 'FINISHED'} else {'CANCELLED'}
+    VIEW3D_OT_RetopoFlow_Launcher.__name__ = f'VIEW3D_OT_RetopoFlow_{name}'
+    for (k, v) in modal_attrs.items():
+        # expose attributes (ex: rf_starting_tool) on launcher, too
+        setattr(VIEW3D_OT_RetopoFlow_Launcher, k, v)
+    add_to_registry(VIEW3D_OT_RetopoFlow_Launcher)
+    return VIEW3D_OT_RetopoFlow_Launcher
+
 @add_cache('_cache', {})
 def create_help_builtin_operator(label, filename):
     key = (label, filename)
     if key not in create_help_builtin_operator._cache:
         idname = label.replace(' ', '')
-        class VIEW3D_OT_RetopoFlow_Help(helpsystem.RetopoFlow_OpenHelpSystem):
-            """Open RetopoFlow Help System"""
-            bl_idname = f'cgcookie.retopoflow_help_{idname.lower()}'
-            bl_label = f'RF Help: {label}'
-            bl_description = f'Open RetopoFlow Help System: {label}'
-            bl_space_type = "VIEW_3D"
-            bl_region_type = "TOOLS"
-            bl_options = set()
-            rf_startdoc = f'{filename}.md'
-        VIEW3D_OT_RetopoFlow_Help.__name__ = f'VIEW3D_OT_RetopoFlow_Help_{idname}'
-        add_to_registry(VIEW3D_OT_RetopoFlow_Help)
-        create_help_builtin_operator._cache[key] = VIEW3D_OT_RetopoFlow_Help
+        create_help_builtin_operator._cache[key] = create_launcher_operator(
+            f'Help_{idname}',
+            f'cgcookie.retopoflow_help_{idname.lower()}',
+            f'RF Help: {label}',
+            f'Open RetopoFlow Help System: {label}',
+            lambda: helpsystem.RetopoFlow_OpenHelpSystem,
+            rf_startdoc=f'{filename}.md',
+        )
     return create_help_builtin_operator._cache[key]
 
 @add_cache('_cache', {})
@@ -319,25 +414,21 @@ if import_succeeded:
         create_help_builtin_operator(label, filename),
         create_help_online_operator(label, filename),
 
-    @add_to_registry
-    class VIEW3D_OT_RetopoFlow_UpdaterSystem(updatersystem.RetopoFlow_OpenUpdaterSystem):
-        """Open RetopoFlow Updater System"""
-        bl_idname = "cgcookie.retopoflow_updater"
-        bl_label = "Updater"
-        bl_description = "Open RetopoFlow Updater"
-        bl_space_type = "VIEW_3D"
-        bl_region_type = "TOOLS"
-        bl_options = set()
+    create_launcher_operator(
+        'UpdaterSystem',
+        'cgcookie.retopoflow_updater',
+        'Updater',
+        'Open RetopoFlow Updater',
+        lambda: updatersystem.RetopoFlow_OpenUpdaterSystem,
+    )
 
-    @add_to_registry
-    class VIEW3D_OT_RetopoFlow_KeymapEditor(keymapsystem.RetopoFlow_OpenKeymapSystem):
-        """Open RetopoFlow Keymap Editor"""
-        bl_idname = "cgcookie.retopoflow_keymapeditor"
-        bl_label = "Keymap Editor"
-        bl_description = "Open RetopoFlow Keymap Editor"
-        bl_space_type = "VIEW_3D"
-        bl_region_type = "TOOLS"
-        bl_options = set()
+    create_launcher_operator(
+        'KeymapEditor',
+        'cgcookie.retopoflow_keymapeditor',
+        'Keymap Editor',
+        'Open RetopoFlow Keymap Editor',
+        lambda: keymapsystem.RetopoFlow_OpenKeymapSystem,
+    )
 
 
 
@@ -364,12 +455,12 @@ if import_succeeded:
             # check we are not in mesh editmode
             if context.mode == 'EDIT_MESH': return False
             # make sure we have source meshes
-            if not retopoflow.RetopoFlow.get_sources(): return False
+            if not RetopoFlow_Launcher.get_sources(): return False
             # all seems good!
             return True
 
         def invoke(self, context, event):
-            retopoflow.RetopoFlow.create_new_target(context)
+            RetopoFlow_Launcher.create_new_target(context)
             return bpy.ops.cgcookie.retopoflow('INVOKE_DEFAULT')
 
     @add_to_registry
@@ -389,16 +480,16 @@ if import_succeeded:
             # check we are not in mesh editmode
             if context.mode == 'EDIT_MESH': return False
             # make sure we have source meshes
-            if not retopoflow.RetopoFlow.get_sources(): return False
+            if not RetopoFlow_Launcher.get_sources(): return False
             o = get_active_object()
             if not o: return False
-            if not retopoflow.RetopoFlow.is_valid_source(o, test_poly_count=False): return False
+            if not RetopoFlow_Launcher.is_valid_source(o, test_poly_count=False): return False
             # all seems good!
             return True
 
         def invoke(self, context, event):
             o = get_active_object()
-            retopoflow.RetopoFlow.create_new_target(context, matrix_world=o.matrix_world)
+            RetopoFlow_Launcher.create_new_target(context, matrix_world=o.matrix_world)
             return bpy.ops.cgcookie.retopoflow('INVOKE_DEFAULT')
 
     @add_to_registry
@@ -418,60 +509,78 @@ if import_succeeded:
             # check we are not in mesh editmode
             if context.mode != 'OBJECT': return False
             # make sure we have source meshes
-            if not retopoflow.RetopoFlow.get_sources(ignore_active=True): return False
+            if not RetopoFlow_Launcher.get_sources(ignore_active=True): return False
             o = get_active_object()
             if not o: return False
-            if not retopoflow.RetopoFlow.is_valid_target(o, ignore_edit_mode=True): return False
+            if not RetopoFlow_Launcher.is_valid_target(o, ignore_edit_mode=True): return False
             # all seems good!
             return True
 
         def invoke(self, context, event):
             bpy.ops.object.mode_set(mode='EDIT')
             # o = get_active_object()
-            # retopoflow.RetopoFlow.create_new_target(context, matrix_world=o.matrix_world)
+            # RetopoFlow_Launcher.create_new_target(context, matrix_world=o.matrix_world)
             return bpy.ops.cgcookie.retopoflow('INVOKE_DEFAULT')
 
-    @add_to_registry
-    class VIEW3D_OT_RetopoFlow_LastTool(retopoflow.RetopoFlow):
-        """Start RetopoFlow"""
-        bl_idname = "cgcookie.retopoflow"
-        bl_label = "Start RetopoFlow"
-        bl_description = "A suite of retopology tools for Blender through a unified retopology mode.\nStart with last used tool"
-        bl_space_type = "VIEW_3D"
-        bl_region_type = "TOOLS"
-        bl_options = {'REGISTER', 'UNDO', 'BLOCKING'}
+    def can_start_retopoflow(context):
+        return RetopoFlow_Launcher.can_start(context)
+
+    create_launcher_operator(
+        'LastTool',
+        'cgcookie.retopoflow',
+        'Start RetopoFlow',
+        'A suite of retopology tools for Blender through a unified retopology mode.\nStart with last used tool',
+        lambda: retopoflow.RetopoFlow,
+        can_start=can_start_retopoflow,
+        check_modal=check_tool_launchers,
+        bl_options={'REGISTER', 'UNDO', 'BLOCKING'},
+    )
 
-    @add_to_registry
-    class VIEW3D_OT_RetopoFlow_Warnings(retopoflow.RetopoFlow):
-        """Start RetopoFlow"""
-        bl_idname = "cgcookie.retopoflow_warnings"
-        bl_label = "Start RetopoFlow (with warnings)"
-        bl_description = "\nWARNINGS were detected!\n\nA suite of retopology tools for Blender through a unified retopology mode.\nStart with last used tool"
-        bl_space_type = "VIEW_3D"
-        bl_region_type = "TOOLS"
-        bl_options = {'REGISTER', 'UNDO', 'BLOCKING'}
+    create_launcher_operator(
+        'Warnings',
+        'cgcookie.retopoflow_warnings',
+        'Start RetopoFlow (with warnings)',
+        '\nWARNINGS were detected!\n\nA suite of retopology tools for Blender through a unified retopology mode.\nStart with last used tool',
+        lambda: retopoflow.RetopoFlow,
+        can_start=can_start_retopoflow,
+        check_modal=check_tool_launchers,
+        bl_options={'REGISTER', 'UNDO', 'BLOCKING'},
+    )
 
-    def VIEW3D_OT_RetopoFlow_Tool_Factory(rftool):
-        name = rftool.name
-        description = rftool.description
-        class VIEW3D_OT_RetopoFlow_Tool(retopoflow.RetopoFlow):
-            """Start RetopoFlow with a specific tool"""
-            bl_idname = f'cgcookie.retopoflow_{name.lower()}'
-            bl_label = f'RF: {name}'
-            bl_description = f'A suite of retopology tools for Blender through a unified retopology mode.\nStart with {name}: {description}'
-            bl_space_type = "VIEW_3D"
-            bl_region_type = "TOOLS"
-            bl_options = {'REGISTER', 'UNDO', 'BLOCKING'}
-            rf_starting_tool = name
-            icon_id = rftool.icon_id
+    # (name, description, icon) of each tool, in the same order as RFTool.registry.
+    # these are listed here so the tools do not need to be imported to create their launchers,
+    # but they are checked against the registry on every launch (see check_tool_launchers)
+    RF_tools = [
+        ('Select',     'Select geometry',                                                       'select-icon.png'),
+        ('Contours',   'Retopologize cylindrical forms, like arms and legs',                    'contours-icon.png'),
+        ('PolyStrips', 'Create and edit strips of quads',                                       'polystrips-icon.png'),
+        ('Strokes',    'Insert edge strips and extrude edges into a patch',                     'strokes-icon.png'),
+        ('Patches',    'Fill holes in your topology',                                           'patches-icon.png'),
+        ('PolyPen',    'Create complex topology on vertex-by-vertex basis',                     'polypen-icon.png'),
+        ('Knife',      'Cut complex topology into existing geometry on vertex-by-vertex basis', 'knife-icon.png'),
+        ('Loops',      'Edge loops creation, shifting, and deletion',                           'loops-icon.png'),
+        ('Tweak',      'Adjust vertex positions with a smooth brush',                           'tweak-icon.png'),
+        ('Relax',      'Relax the vertex positions to smooth out topology',                     'relax-icon.png'),
+    ]
+
+    def VIEW3D_OT_RetopoFlow_Tool_Factory(name, description, icon):
         # just in case: remove spaces, so that class name is proper
-        VIEW3D_OT_RetopoFlow_Tool.__name__ = f'VIEW3D_OT_RetopoFlow_{name.replace(" ", "")}'
-        return VIEW3D_OT_RetopoFlow_Tool
+        return create_launcher_operator(
+            name.replace(' ', ''),
+            f'cgcookie.retopoflow_{name.lower()}',
+            f'RF: {name}',
+            f'A suite of retopology tools for Blender through a unified retopology mode.\nStart with {name}: {description}',
+            lambda: retopoflow.RetopoFlow,
+            can_start=can_start_retopoflow,
+            check_modal=check_tool_launchers,
+            bl_options={'REGISTER', 'UNDO', 'BLOCKING'},
+            rf_starting_tool=name,
+            icon_id=BlenderIcon.icon_id(icon),
+        )
     RF_tool_classes = [
-        VIEW3D_OT_RetopoFlow_Tool_Factory(rftool)
-        for rftool in RFTool.registry
+        VIEW3D_OT_RetopoFlow_Tool_Factory(name, description, icon)
+        for (name, description, icon) in RF_tools
     ]
-    add_to_registry(RF_tool_classes)
 
 
 if import_succeeded:
@@ -491,11 +600,30 @@ if import_succeeded:
 
         @classmethod
         def poll(cls, context):
-            return retopoflow.RetopoFlow.has_auto_save()
+            return RetopoFlow_Launcher.has_auto_save()
+        def invoke(self, context, event):
+            return self.execute(context)
+        def execute(self, context):
+            RetopoFlow_Launcher.recover_auto_save()
+            return {'FINISHED'}
+
+    @add_to_registry
+    class VIEW3D_OT_RetopoFlow_RecoverTarget(Operator):
+        bl_idname = 'cgcookie.retopoflow_recover_target'
+        bl_label = 'Recover: Import Last Target Auto Save'
+        bl_description = 'Recover by importing last target mesh automatically saved by RetopoFlow as a new object'
+        bl_space_type = 'VIEW_3D'
+        bl_region_type = 'TOOLS'
+        bl_options = {'UNDO'}
+        rf_icon = 'rf_recover_icon'
+
+        @classmethod
+        def poll(cls, context):
+            return RetopoFlow_Launcher.has_target_auto_save()
         def invoke(self, context, event):
             return self.execute(context)
         def execute(self, context):
-            retopoflow.RetopoFlow.recover_auto_save()
+            RetopoFlow_Launcher.recover_target_auto_save()
             return {'FINISHED'}
 
     @add_to_registry
@@ -511,11 +639,11 @@ if import_succeeded:
 
         @classmethod
         def poll(cls, context):
-            return retopoflow.RetopoFlow.has_auto_save()
+            return RetopoFlow_Launcher.has_auto_save()
         def invoke(self, context, event):
             return self.execute(context)
         def execute(self, context):
-            filename = retopoflow.RetopoFlow.get_auto_save_filename()
+            filename = RetopoFlow_Launcher.get_auto_save_filename()
             bpy.ops.wm.path_open(filepath=os.path.dirname(filename))
             return {'FINISHED'}
 
@@ -531,12 +659,12 @@ if import_succeeded:
 
         @classmethod
         def poll(cls, context):
-            return retopoflow.RetopoFlow.has_auto_save()
+            return RetopoFlow_Launcher.has_auto_save()
         def invoke(self, context, event):
             return context.window_manager.invoke_confirm(self, event)
             # return self.execute(context)
         def execute(self, context):
-            retopoflow.RetopoFlow.delete_auto_save()
+            RetopoFlow_Launcher.delete_auto_save()
             return {'FINISHED'}
 
     @add_to_registry
@@ -551,11 +679,11 @@ if import_succeeded:
 
         @classmethod
         def poll(cls, context):
-            return retopoflow.RetopoFlow.can_recover()
+            return RetopoFlow_Launcher.can_recover()
         def invoke(self, context, event):
             return self.execute(context)
         def execute(self, context):
-            retopoflow.RetopoFlow.recovery_revert()
+            RetopoFlow_Launcher.recovery_revert()
             return {'FINISHED'}
 
 
@@ -566,7 +694,7 @@ if import_succeeded:
 
     # some common checker fns
     def has_sources(context):
-        return retopoflow.RetopoFlow.has_valid_source()
+        return RetopoFlow_Launcher.has_valid_source()
     def is_editing_target(context):
         obj = context.active_object
         mode_string = context.mode
@@ -576,13 +704,13 @@ if import_succeeded:
     def are_sources_too_big(context):
         # take a look at https://github.com/CoDEmanX/blend_stats/blob/master/blend_stats.py#L98
         total = 0
-        for src in retopoflow.RetopoFlow.get_sources():
+        for src in RetopoFlow_Launcher.get_sources():
             total += len(src.data.polygons)
         m = convert_numstr_num(options['warning max sources'])
         return total > m
     def is_target_too_big(context):
         # take a look at https://github.com/CoDEmanX/blend_stats/blob/master/blend_stats.py#L98
-        tar = retopoflow.RetopoFlow.get_target()
+        tar = RetopoFlow_Launcher.get_target()
         if not tar: return False
         m = convert_numstr_num(options['warning max target'])
         return len(tar.data.polygons) > m
@@ -638,8 +766,7 @@ if import_succeeded:
 
         @staticmethod
         def draw_popover(self, context):
-            if retopoflow.RetopoFlow.instance: return
-            if CookieCutter.is_running: return
+            if is_retopoflow_running(): return
             if context.mode == 'EDIT_MESH' or context.mode == 'OBJECT':
                 self.layout.separator()
                 if is_editing_target(context):
@@ -648,7 +775,7 @@ if import_succeeded:
                         pass
                     else:
                         self.layout.operator('cgcookie.retopoflow', text="", icon='MOD_DATA_TRANSFER')
-                if cookiecutter.is_broken:
+                if is_cookiecutter_broken():
                     self.layout.popover('VIEW3D_PT_RetopoFlow', text='RetopoFlow BROKEN')
                 else:
                     self.layout.popover('VIEW3D_PT_RetopoFlow')
@@ -656,8 +783,8 @@ if import_succeeded:
         def draw_rf_version(self, context, layout):
             row = layout.row()
             row.label(text=f'RetopoFlow {configoptions.retopoflow_product["version"]}{rf_label_extra}')
-            if cookiecutter.is_broken:
-                row.label(text=f'BROKEN')
+            if is_cookiecutter_broken():
+                row.label(text='BROKEN')
 
         def draw_start_edit(self, context, layout):
             if is_editing_target(context):
@@ -813,13 +940,13 @@ if import_succeeded:
         @classmethod
         def get_warnings(cls, context):
             minv, maxv = Hive.get_version('blender minimum version'), Hive.get_version('blender maximum version')
-            sources = retopoflow.RetopoFlow.get_sources()
-            target = retopoflow.RetopoFlow.get_target()
+            sources = RetopoFlow_Launcher.get_sources()
+            target = RetopoFlow_Launcher.get_target()
 
             warnings = {
                 # install checks
                 'install: invalid add-on folder':             not is_addon_folder_valid(context),
-                'install: unexpected runtime error occurred': cookiecutter.is_broken,
+                'install: unexpected runtime error occurred': is_cookiecutter_broken(),
                 'install: invalid version':                   bpy.app.version < minv or (maxv and bpy.app.version > maxv),
 
                 # setup checks
@@ -841,10 +968,11 @@ if import_succeeded:
                 'layout: view is locked to object': any(space.lock_object for space in context.area.spaces if space.type == 'VIEW_3D'),
 
                 # auto save / unsaved checks
-                'save: auto save is disabled': not retopoflow.RetopoFlow.get_auto_save_settings(context)['auto save'],
-                'save: unsaved blender file':  not retopoflow.RetopoFlow.get_auto_save_settings(context)['saved'],
-                'save: can recover auto save': retopoflow.RetopoFlow.can_recover(),                                         # user directly opened an auto save file
-                'save: has auto save':         retopoflow.RetopoFlow.has_auto_save(),                                       # auto save file detected
+                'save: auto save is disabled': not RetopoFlow_Launcher.get_auto_save_settings(context)['auto save'],
+                'save: unsaved blender file':  not RetopoFlow_Launcher.get_auto_save_settings(context)['saved'],
+                'save: can recover auto save': RetopoFlow_Launcher.can_recover(),                                         # user directly opened an auto save file
+                'save: has auto save':         RetopoFlow_Launcher.has_auto_save(),                                       # auto save file detected
+                'save: has target auto save':  RetopoFlow_Launcher.has_target_auto_save(),                                # target-only auto save file detected
             }
 
             return warnings if not cls.debug_all_warnings else { k: True for k in warnings }
@@ -880,13 +1008,13 @@ if import_succeeded:
 
             with WarningSection('Installation') as section:
                 if warnings['install: invalid add-on folder']:
-                    section.label(text=f'Invalid add-on folder name', icon='DOT')
+                    section.label(text='Invalid add-on folder name', icon='DOT')
                 if warnings['install: unexpected runtime error occurred']:
-                    section.label(text=f'Unexpected runtime error', icon='DOT')
+                    section.label(text='Unexpected runtime error', icon='DOT')
                 if warnings['install: invalid version']:
                     box = section.subbox()
                     def neatver(v): return f'{v[0]}.{v[1]}'
-                    box.label(text=f'Incorrect versions', icon='DOT')
+                    box.label(text='Incorrect versions', icon='DOT')
                     tab = box.row(align=True)
                     tab.label(icon='BLANK1')
                     minv, maxv = Hive.get_version('blender minimum version'), Hive.get_version('blender maximum version')
@@ -897,17 +1025,17 @@ if import_succeeded:
 
             with WarningSection('Setup Issue') as section:
                 if warnings['setup: local view']:
-                    section.label(text=f'Currently in local view', icon='DOT')
+                    section.label(text='Currently in local view', icon='DOT')
                 if warnings['setup: no sources']:
-                    section.label(text=f'No sources detected', icon='DOT')
+                    section.label(text='No sources detected', icon='DOT')
                 if warnings['setup: source has non-invertible matrix']:
-                    section.label(text=f'A source has non-invertible matrix', icon='DOT')
+                    section.label(text='A source has non-invertible matrix', icon='DOT')
                 if warnings['setup: source has armature']:
-                    section.label(text=f'A source has an armature', icon='DOT')
+                    section.label(text='A source has an armature', icon='DOT')
                 if warnings['setup: no target']:
-                    section.label(text=f'No target detected', icon='DOT')
+                    section.label(text='No target detected', icon='DOT')
                 if warnings['setup: target has non-invertible matrix']:
-                    section.label(text=f'Target has non-invertible matrix', icon='DOT')
+                    section.label(text='Target has non-invertible matrix', icon='DOT')
 
             with WarningSection('Performance Issue') as section:
                 if warnings['performance: target too big']:
@@ -932,17 +1060,17 @@ if import_succeeded:
                     section.label(text='Unsaved Blender file', icon='DOT')
                 if warnings['save: can recover auto save']:
                     box = section.subbox()
-                    box.label(text=f'Auto Save file opened', icon='DOT')
+                    box.label(text='Auto Save file opened', icon='DOT')
                     tab = box.row(align=True)
                     tab.label(icon='BLANK1')
                     tab.operator('cgcookie.retopoflow_recover_finish', text='Finish Auto Save Recovery', icon='RECOVER_LAST')
                 if warnings['save: has auto save']:
                     box = section.subbox()
-                    box.label(text=f'Found RetopoFlow auto save', icon='DOT')
+                    box.label(text='Found RetopoFlow auto save', icon='DOT')
 
                     tab = box.row(align=True)
                     tab.label(icon='BLANK1')
-                    tab.label(text=bpy.path.basename(retopoflow.RetopoFlow.get_auto_save_filename()))
+                    tab.label(text=bpy.path.basename(RetopoFlow_Launcher.get_auto_save_filename()))
 
                     tab = box.row(align=True)
                     tab.label(icon='BLANK1')
@@ -950,6 +1078,17 @@ if import_succeeded:
                     col.operator('cgcookie.retopoflow_recover_open',   text='Open',        icon='RECOVER_LAST')
                     col.operator('cgcookie.retopoflow_recover_folder', text='Open Folder', icon='FILE_FOLDER')
                     col.operator('cgcookie.retopoflow_recover_delete', text='Delete',      icon='X')
+                if warnings['save: has target auto save']:
+                    box = section.subbox()
+                    box.label(text='Found RetopoFlow target auto save', icon='DOT')
+
+                    tab = box.row(align=True)
+                    tab.label(icon='BLANK1')
+                    tab.label(text=bpy.path.basename(options['last target auto save path']))
+
+                    tab = box.row(align=True)
+                    tab.label(icon='BLANK1')
+                    tab.operator('cgcookie.retopoflow_recover_target', text='Import Target', icon='RECOVER_LAST')
 
             # show button for more warning details
             row = layout.row(align=True)
@@ -1144,7 +1283,7 @@ if import_succeeded:
                 text='Open Last Auto Save',
                 icon='RECOVER_LAST',
             )
-            # if retopoflow.RetopoFlow.has_backup():
+            # if RetopoFlow_Launcher.has_backup():
             #     box.label(text=options['last auto save path'])
     """
     
@@ -1242,8 +1381,12 @@ if not import_succeeded:
 def register():
     for cls in RF_classes: bpy.utils.register_class(cls)
     bpy.types.VIEW3D_MT_editor_menus.append(VIEW3D_PT_RetopoFlow.draw_popover)
+    if import_succeeded and options['import profiler']: import_profiler.report()
 
 def unregister():
-    if import_succeeded: ImagePreloader.quit()
+    if import_succeeded and image_preloader.is_loaded: image_preloader.ImagePreloader.quit()
     bpy.types.VIEW3D_MT_editor_menus.remove(VIEW3D_PT_RetopoFlow.draw_popover)
+    # modal operators that were registered on first invoke
+    for cls in reversed(RF_modal_classes.values()): bpy.utils.unregister_class(cls)
+    RF_modal_classes.clear()
     for cls in reversed(RF_classes): bpy.utils.unregister_class(cls)
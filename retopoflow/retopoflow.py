@@ -91,22 +91,6 @@ class RetopoFlow(
 
     instance = None
 
-    @classmethod
-    def can_start(cls, context):
-        # check that the context is correct
-        if not context.region or context.region.type != 'WINDOW': return False
-        if not context.space_data or context.space_data.type != 'VIEW_3D': return False
-        # check we are in mesh editmode
-        if context.mode != 'EDIT_MESH': return False
-        # make sure we are editing a mesh object
-        ob = context.active_object
-        if not ob or ob.type != 'MESH': return False
-        if not ob.visible_get(): return False
-        # make sure we have source meshes
-        if not cls.get_sources(): return False
-        # all seems good!
-        return True
-
 
     # def prestart(self):
     #     # duplicate workspace and scene so we can alter (most) settings without need to store/restore
@@ -159,6 +143,9 @@ class RetopoFlow(
 
     def end(self):
         self.normal_check.stop()
+        self.done_sampling_profiler()
+        self.done_instrumentation()
+        self.done_target_save()
         options.clear_callbacks()
         self.end_normalize(self.context)
         self.blender_ui_reset()
@@ -48,6 +48,24 @@ from ...addon_common.common.maths import BBox
 from ...addon_common.common.debug import dprint
 
 class RetopoFlow_Blender_Objects:
+    @classmethod
+    def can_start(cls, context):
+        # note: this is here rather than in RetopoFlow so the launcher operators
+        #       (see blenderregister.py) can check without importing RetopoFlow
+        # check that the context is correct
+        if not context.region or context.region.type != 'WINDOW': return False
+        if not context.space_data or context.space_data.type != 'VIEW_3D': return False
+        # check we are in mesh editmode
+        if context.mode != 'EDIT_MESH': return False
+        # make sure we are editing a mesh object
+        ob = context.active_object
+        if not ob or ob.type != 'MESH': return False
+        if not ob.visible_get(): return False
+        # make sure we have source meshes
+        if not cls.get_sources(): return False
+        # all seems good!
+        return True
+
     @staticmethod
     def is_valid_source(o, *, test_poly_count=True, context=None):
         if not o: return False
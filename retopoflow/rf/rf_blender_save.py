@@ -21,11 +21,17 @@ Created by Jonathan Denning, Jonathan Williamson
 
 import os
 import bpy
+import zlib
 import json
 import time
+import struct
+import bmesh
+import threading
 from datetime import datetime
 from itertools import chain
 
+import numpy as np
+
 from mathutils import Matrix, Vector
 from bpy_extras.object_utils import object_data_add
 from bpy.app.handlers import persistent
@@ -45,6 +51,7 @@ from ...addon_common.common.blender import (
     show_error_message,
     BlenderSettings,
     get_view3d_space,
+    ModifierWrapper_Mirror,
 )
 from ...addon_common.common.blender_preferences import get_preferences
 from ...addon_common.common.maths import BBox
@@ -53,6 +60,157 @@ from ...addon_common.common.debug import dprint
 from .rf_blender_objects import RetopoFlow_Blender_Objects
 
 
+'''
+Target auto save file format (little-endian):
+
+    8 bytes magic (TARGET_SAVE_MAGIC)
+    u32 header size, header (utf-8 JSON: object and mesh names, matrix world, mesh scaling factor,
+                                          symmetry, material names, active uv layer name (or null),
+                                          timestamp, counts of verts, edges, faces, face verts)
+    zlib stream of arrays:
+        f32[verts*3] vert coords,               u8[verts] vert flags
+        u32[edges*2] edge vert indices,         u8[edges] edge flags
+        u32[faces] face sizes, u32[face verts] face vert indices, u8[faces] face flags,
+        u16[faces] face material indices,       f32[face verts*2] loop uvs (only if uv layer is not null)
+
+Element flags are FLAG_SELECT | FLAG_HIDE | FLAG_LAYER, where FLAG_LAYER is pin for verts,
+seam for edges, and smooth for faces.
+
+Only the active UV layer is stored.  Other layers (other UV layers, vertex groups, color attributes,
+custom normals, etc.) are not stored, so the full backup is still needed to recover those.
+
+Only the target is stored (the sources are not changed by RetopoFlow), so writing is much
+faster than saving the entire .blend file.
+'''
+
+TARGET_SAVE_MAGIC = b'RFTSAV\x00\x02'
+TARGET_SAVE_EXT = '.rftarget'
+FLAG_SELECT = 1
+FLAG_HIDE   = 2
+FLAG_LAYER  = 4
+
+
+def encode_target_save(rftarget, *, scaling_factor=1.0):
+    ''' returns (header, arrays) of target.  must be called on main thread (reading BMesh is not thread-safe) '''
+    bme = rftarget.bme
+    verts, edges, face_sizes, face_verts, symmetry = rftarget.to_arrays()
+    layers = bme.verts.layers.int
+    layer_pin = layers['pin'] if 'pin' in layers else None
+    layer_uv = bme.loops.layers.uv.active
+    def get_flags(elems, fn_layer):
+        return np.fromiter(
+            (
+                (FLAG_SELECT if elem.select else 0) |
+                (FLAG_HIDE   if elem.hide   else 0) |
+                (FLAG_LAYER  if fn_layer(elem) else 0)
+                for elem in elems
+            ),
+            dtype=np.uint8, count=len(elems),
+        )
+    header = {
+        'object': rftarget.obj.name,
+        'mesh': rftarget.obj.data.name,
+        'matrix world': [list(row) for row in rftarget.obj.matrix_world],
+        'scaling factor': scaling_factor,
+        'symmetry': symmetry,
+        'materials': [(mat.name if mat else None) for mat in rftarget.obj.data.materials],
+        'uv layer': layer_uv.name if layer_uv else None,
+        'timestamp': time.time(),
+        'counts': [len(verts), len(edges), len(face_sizes), len(face_verts)],
+    }
+    arrays = [
+        verts.astype('<f4'),      get_flags(bme.verts, (lambda bmv: bmv[layer_pin]) if layer_pin else (lambda bmv: False)),
+        edges.astype('<u4'),      get_flags(bme.edges, lambda bme_: bme_.seam),
+        face_sizes.astype('<u4'), face_verts.astype('<u4'), get_flags(bme.faces, lambda bmf: bmf.smooth),
+        np.fromiter((bmf.material_index for bmf in bme.faces), dtype='<u2', count=len(bme.faces)),
+    ]
+    if layer_uv:
+        arrays.append(np.fromiter(
+            (c for bmf in bme.faces for bml in bmf.loops for c in bml[layer_uv].uv),
+            dtype='<f4', count=2*len(face_verts),
+        ))
+    return (header, arrays)
+
+
+def write_target_save(filepath, header, arrays, *, compress_level=1):
+    '''
+    writes arrays one at a time through zlib into temp file, then replaces filepath with it,
+    so a crash mid-write keeps the previous save intact
+    '''
+    header = json.dumps(header).encode('utf-8')
+    compressor = zlib.compressobj(compress_level)
+    filepath_tmp = f'{filepath}.tmp'
+    with open(filepath_tmp, 'wb') as f:
+        f.write(TARGET_SAVE_MAGIC)
+        f.write(struct.pack('<I', len(header)))
+        f.write(header)
+        for array in arrays:
+            f.write(compressor.compress(array.tobytes()))
+        f.write(compressor.flush())
+    os.replace(filepath_tmp, filepath)
+
+
+def read_target_save(filepath):
+    ''' returns (header, arrays) with arrays in same order as encode_target_save '''
+    with open(filepath, 'rb') as f:
+        magic = f.read(len(TARGET_SAVE_MAGIC))
+        assert magic == TARGET_SAVE_MAGIC, f'{filepath} is not a RetopoFlow target auto save file'
+        (size,) = struct.unpack('<I', f.read(4))
+        header = json.loads(f.read(size).decode('utf-8'))
+        payload = zlib.decompress(f.read())
+
+    offset = 0
+    def read_array(dtype, count, shape=None):
+        nonlocal offset
+        a = np.frombuffer(payload, dtype=dtype, count=count, offset=offset)
+        offset += a.nbytes
+        return a.reshape(shape) if shape else a
+
+    nverts, nedges, nfaces, nface_verts = header['counts']
+    arrays = [
+        read_array('<f4', nverts * 3, (-1, 3)), read_array('<u1', nverts),
+        read_array('<u4', nedges * 2, (-1, 2)), read_array('<u1', nedges),
+        read_array('<u4', nfaces), read_array('<u4', nface_verts), read_array('<u1', nfaces),
+        read_array('<u2', nfaces),
+    ]
+    if header['uv layer']:
+        arrays.append(read_array('<f4', nface_verts * 2, (-1, 2)))
+    return (header, arrays)
+
+
+def target_save_to_bmesh(header, arrays):
+    ''' creates new BMesh from header and arrays returned by read_target_save '''
+    verts, vert_flags, edges, edge_flags, face_sizes, face_verts, face_flags, face_materials = arrays[:8]
+    uvs = arrays[8].tolist() if header['uv layer'] else None
+    bme = bmesh.new()
+    layer_pin = bme.verts.layers.int.new('pin') if np.any(vert_flags & FLAG_LAYER) else None
+    layer_uv = bme.loops.layers.uv.new(header['uv layer']) if uvs is not None else None
+
+    bmverts = [bme.verts.new(co) for co in verts.tolist()]
+    for bmv, flags in zip(bmverts, vert_flags.tolist()):
+        bmv.select, bmv.hide = bool(flags & FLAG_SELECT), bool(flags & FLAG_HIDE)
+        if layer_pin: bmv[layer_pin] = 1 if flags & FLAG_LAYER else 0
+
+    for (i0, i1), flags in zip(edges.tolist(), edge_flags.tolist()):
+        bme_ = bme.edges.new((bmverts[i0], bmverts[i1]))
+        bme_.select, bme_.hide, bme_.seam = bool(flags & FLAG_SELECT), bool(flags & FLAG_HIDE), bool(flags & FLAG_LAYER)
+
+    offsets = np.concatenate(([0], np.cumsum(face_sizes))).tolist()
+    face_verts = face_verts.tolist()
+    for i0, i1, flags, material_index in zip(offsets[:-1], offsets[1:], face_flags.tolist(), face_materials.tolist()):
+        try:
+            bmf = bme.faces.new([bmverts[i] for i in face_verts[i0:i1]])
+        except ValueError:
+            # face already exists
+            continue
+        bmf.select, bmf.hide, bmf.smooth = bool(flags & FLAG_SELECT), bool(flags & FLAG_HIDE), bool(flags & FLAG_LAYER)
+        bmf.material_index = material_index
+        if layer_uv:
+            for bml, uv in zip(bmf.loops, uvs[i0:i1]): bml[layer_uv].uv = uv
+
+    return bme
+
+
 @persistent
 def revert_auto_save_after_load(*_, **__):
     # remove recover handler
@@ -226,6 +384,9 @@ class RetopoFlow_Blender_Save:
 
         if not use_auto_save: return    # Blender's auto save is disabled  :(
 
+        # record path of finished target save as soon as it is written
+        self.done_target_save(wait=False)
+
         if not hasattr(self, 'time_to_save'):
             # RF just started, so do not save yet
             self.last_change_count = None
@@ -262,6 +423,38 @@ class RetopoFlow_Blender_Save:
         bpy.app.handlers.load_post.append(revert_auto_save_after_load)
         bpy.ops.wm.open_mainfile(filepath=filepath)
 
+    @staticmethod
+    def has_target_auto_save():
+        filepath = options['last target auto save path']
+        return filepath and os.path.exists(filepath)
+
+    @staticmethod
+    def recover_target_auto_save():
+        ''' imports last target-only auto save as new object in current scene '''
+        filepath = options['last target auto save path']
+        print(f'target backup recover: {filepath}')
+        if not filepath or not os.path.exists(filepath):
+            print('  DOES NOT EXIST!')
+            return None
+        header, arrays = read_target_save(filepath)
+        bme = target_save_to_bmesh(header, arrays)
+        mesh = bpy.data.meshes.new(f'{header["mesh"]} (recovered)')
+        bme.to_mesh(mesh)
+        bme.free()
+        for name in header['materials']:
+            # material might have been deleted since save
+            mesh.materials.append(bpy.data.materials.get(name) if name else None)
+        obj = bpy.data.objects.new(f'{header["object"]} (recovered)', mesh)
+        # undo RetopoFlow's normalization of mesh scale
+        obj.matrix_world = Matrix.Scale(1.0 / header['scaling factor'], 4) @ Matrix(header['matrix world'])
+        if header['symmetry']:
+            # not using ModifierWrapper_Mirror.create_new, because recovered object is not active
+            mirror_mod = ModifierWrapper_Mirror(obj, obj.modifiers.new('Mirror', 'MIRROR'))
+            mirror_mod.set_defaults()
+            for axis in header['symmetry']: mirror_mod.enable_axis(axis)
+        bpy.context.collection.objects.link(obj)
+        return obj
+
     @staticmethod
     def delete_auto_save():
         filepath = options['last auto save path']
@@ -290,12 +483,82 @@ class RetopoFlow_Blender_Save:
                 title='RetopoFlow Error',
             )
 
+    def save_backup_target(self):
+        '''
+        saves target only to sidecar file (see TARGET_SAVE_MAGIC), skipping if target has not changed.
+        target is read on main thread, but compressed and written on background thread.
+        '''
+        if not self.done_target_save(): return False
+
+        # versions come from a global counter, so a change (including undo) always gets a new version
+        version = self.get_target_version()
+        if version == self._target_save_version:
+            print('RetopoFlow: skipping target backup save (target unchanged)')
+            return True
+
+        filepath = f'{os.path.splitext(options.get_auto_save_filepath())[0]}{TARGET_SAVE_EXT}'
+        print(f'RetopoFlow: saving target backup to {filepath}')
+        try:
+            header, arrays = encode_target_save(
+                self.rftarget,
+                scaling_factor=sessionoptions['normalize']['mesh scaling factor'],
+            )
+        except Exception as e:
+            print(f'  caught exception: {e}')
+            return False
+
+        def write():
+            try:
+                write_target_save(filepath, header, arrays)
+            except Exception as e:
+                self._target_save_error = e
+        self._target_save_thread = threading.Thread(target=write, name='RetopoFlow target save')
+        self._target_save_thread.start()
+        self._target_save_version = version
+        self._target_save_path = filepath
+        return True
+
+    def done_target_save(self, *, wait=True):
+        '''
+        finishes background target save (waits for it to finish writing unless wait is False),
+        and records its path for recovery only if it was written successfully.
+        options are written to disk, so this must be called on main thread.
+        returns False if save failed
+        '''
+        if not hasattr(self, '_target_save_thread'):
+            self._target_save_thread = None
+            self._target_save_version = None
+            self._target_save_path = None
+            self._target_save_error = None
+        if not self._target_save_thread: return True
+        if not wait and self._target_save_thread.is_alive(): return True
+        self._target_save_thread.join()
+        self._target_save_thread = None
+        if self._target_save_error:
+            print(f'  target save failed: {self._target_save_error}')
+            self._target_save_error = None
+            self._target_save_version = None
+            return False
+        options['last target auto save path'] = self._target_save_path
+        return True
+
     def save_backup(self):
         if hasattr(self, '_backup_broken'): return
         if self.last_change_count == self.change_count:
             print(f'RetopoFlow: skipping backup save (no changes detected)')
             return True
 
+        if options['auto save target only']:
+            # save only target most of the time, falling back to full save every so often
+            if not hasattr(self, '_target_saves_since_full'): self._target_saves_since_full = 0
+            full_every = options['auto save full every']
+            if not full_every or self._target_saves_since_full < full_every:
+                if self.save_backup_target():
+                    self._target_saves_since_full += 1
+                    self.last_change_count = self.change_count
+                    return True
+                print('  could not save target backup; saving full backup instead')
+
         if not hasattr(self, '_backup_save_attempts'): self._backup_save_attempts = 0
 
         filepath = options.get_auto_save_filepath()
@@ -331,6 +594,7 @@ class RetopoFlow_Blender_Save:
                 )
                 options['last auto save path'] = filepath
                 self.last_change_count = self.change_count
+                self._target_saves_since_full = 0
             except Exception as e:
                 print(f'   caught exception: {e}')
                 errors['saving'] = e
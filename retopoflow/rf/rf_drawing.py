@@ -34,7 +34,7 @@ from ...addon_common.cookiecutter.cookiecutter import CookieCutter
 from ...addon_common.common import gpustate
 from ...addon_common.common.drawing import DrawCallbacks
 from ...addon_common.common.globals import Globals
-from ...addon_common.common.profiler import profiler
+from ...addon_common.common.profiler import profiler, frametimer
 from ...addon_common.common.debug import tprint
 from ...addon_common.common.fsm import FSM
 from ...addon_common.common.hasher import Hasher
@@ -58,9 +58,15 @@ class RetopoFlow_Drawing:
             for d in self.rfsources_draw: d.replace_opts(source_opts)
         options.add_callback(callback)
         self._draw_count = 0
+        for phase in [
+            'fsm update', 'mouse raycast', 'target change', 'view change',
+            'tool new frame', 'accel rebuild', 'render gather', 'target write-back', 'ui layout',
+        ]:
+            frametimer.register_phase(phase)
 
     @DrawCallbacks.on_predraw()
     def predraw(self):
+        frametimer.new_frame()
         if not self.loading_done: return
         self.update(timer=False)
         self._draw_count += 1
@@ -246,7 +252,8 @@ class RetopoFlow_Drawing:
     def tool_new_frame(self):
         if not self.loading_done: return
         # if self.fsm.state == 'pie menu': return
-        self.rftool._new_frame()
+        with frametimer.phase('tool new frame'):
+            self.rftool._new_frame()
 
     @DrawCallbacks.on_draw('pre3d')
     @FSM.onlyinstate({'main', 'quick switch'})
@@ -303,3 +310,34 @@ class RetopoFlow_Drawing:
         # if self.fsm.state == 'pie menu': return
         self.rftool.rfwidget._draw_post2d()
 
+
+    @DrawCallbacks.on_draw('post2d')
+    def draw_frame_timer(self):
+        if not self.loading_done: return
+        if not frametimer.enabled: return
+
+        drawing = Globals.drawing
+        scale = drawing.scale
+        text = frametimer.strout()
+        lines = text.splitlines()
+        left, bottom = scale(10), scale(40)
+        gpustate.blend('ALPHA')
+
+        # frame time graph (most recent frame on right), with 60fps and 30fps reference lines
+        times = frametimer.frame_times()
+        graph_w, graph_h = scale(2 * frametimer.window), scale(60)
+        max_time = 1 / 20
+        if times:
+            dx = graph_w / len(times) if len(times) > graph_w else scale(2)
+            points = []
+            for i, t in enumerate(times):
+                x = left + i * dx
+                points += [Point2D((x, bottom)), Point2D((x, bottom + graph_h * min(1.0, t / max_time)))]
+            drawing.draw2D_lines(points, (1.0, 1.0, 1.0, 0.5), width=max(1, dx - 1))
+        for fps, color in [(60, (0.2, 1.0, 0.2, 0.5)), (30, (1.0, 0.2, 0.2, 0.5))]:
+            y = bottom + graph_h * (1 / fps) / max_time
+            drawing.draw2D_line(Point2D((left, y)), Point2D((left + graph_w, y)), color, width=1, stipple=[2, 2])
+
+        # phase percentiles
+        top = bottom + graph_h + scale(10) + drawing.line_height * len(lines)
+        drawing.text_draw2D(text, Point2D((left, top)), color=(1, 1, 1, 1), dropshadow=(0, 0, 0, 0.75))
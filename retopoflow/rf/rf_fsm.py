@@ -36,7 +36,7 @@ from ...addon_common.common.drawing import Cursors, DrawCallbacks, CC_DRAW, CC_2
 from ...addon_common.common.fsm import FSM
 from ...addon_common.common.globals import Globals
 from ...addon_common.common.maths import Vec2D, Point2D, RelPoint2D, Direction2D
-from ...addon_common.common.profiler import profiler
+from ...addon_common.common.profiler import profiler, sampler, frametimer
 from ...addon_common.common.ui_core import UI_Element
 from ...addon_common.common.utils import normalize_triplequote, Dict
 from ...config.options import options, retopoflow_files
@@ -47,7 +47,37 @@ class RetopoFlow_FSM(CookieCutter): # CookieCutter must be here in order to over
         self.view_version = None
         self._last_rfwidget = None
         self.fast_update_timer = self.actions.start_timer(120.0, enabled=False)
-
+        self.setup_sampling_profiler()
+
+    def setup_sampling_profiler(self):
+        sampler.set_context_fn(self.sampling_profiler_context)
+        options.add_callback(self.update_sampling_profiler)
+        self.update_sampling_profiler()
+
+    def update_sampling_profiler(self):
+        # called whenever options change, so keep this cheap
+        if options['profiler sampling'] == sampler.is_running: return
+        if options['profiler sampling']:
+            sampler.set_interval(options['profiler sampling interval'])
+            sampler.start()
+        else:
+            sampler.stop()
+
+    def done_sampling_profiler(self):
+        # always reset context fn and callback, so neither holds on to this RetopoFlow instance
+        sampler.set_context_fn(None)
+        options.remove_callback(self.update_sampling_profiler)
+        if not sampler.is_running: return
+        sampler.stop()
+        sampler.export(options.get_path('profiler samples filename'))
+
+    def sampling_profiler_context(self):
+        # called from sampling thread!  only read state here
+        rftool = getattr(self, 'rftool', None)
+        if not rftool: return f'RF:{self.fsm.state}'
+        return f'RF:{self.fsm.state};{rftool.name}:{rftool._fsm.state}'
+
+    @frametimer.function('fsm update')
     def update(self, timer=True):
         if not self.loading_done:
             # calling self.fsm.update() in case mouse is hovering over ui
@@ -96,11 +126,13 @@ class RetopoFlow_FSM(CookieCutter): # CookieCutter must be here in order to over
             self.callback_view_change()
             tag_redraw_all('RF_FSM view change')
 
-        self.actions.hit_pos,self.actions.hit_norm,_,_ = self.raycast_sources_mouse()
+        with frametimer.phase('mouse raycast'):
+            self.actions.hit_pos,self.actions.hit_norm,_,_ = self.raycast_sources_mouse()
         fpsdiv = self.document.body.getElementById('fpsdiv')
         if fpsdiv: fpsdiv.innerText = f'UI FPS: {self.document._draw_fps:.2f}'
 
     # @CallGovernor.limit(fn_delay=lambda:options['target change delay'])
+    @frametimer.function('target change')
     def callback_target_change(self):
         # throttling this fn will cause target_change and draw callbacks to get out-of-sync
         # ex: contours depends on data collected in target change callback!
@@ -111,6 +143,7 @@ class RetopoFlow_FSM(CookieCutter): # CookieCutter must be here in order to over
         tag_redraw_all('RF_FSM target change')
 
     @CallGovernor.limit(fn_delay=lambda:options['view change delay'])
+    @frametimer.function('view change')
     def callback_view_change(self):
         self.rftool._callback('view change')
         if self.rftool.rfwidget:
@@ -600,6 +633,53 @@ class RetopoFlow_FSM(CookieCutter): # CookieCutter must be here in order to over
         self._update_rftool_ui()
 
 
+    @FSM.on_state('snapping', 'enter')
+    def snapping_enter(self):
+        # self.snap_job is set by push_then_snap_verts
+        win = UI_Element.fromHTML(normalize_triplequote('''
+            <dialog class="framed" id="snappingdialog">
+                <h1>Snapping vertices...</h1>
+                <article id="snappingdiv" class="mdown">Starting...</article>
+            </dialog>
+        '''))[0]
+        self.document.body.append_child(win)
+        self.snapping_opts = {
+            'ui_window': win,
+            'ui_div':    win.getElementById('snappingdiv'),
+            'timer':     self.actions.start_timer(10),
+            'progress':  None,
+        }
+        statusbar = self.substitute_keymaps('{{cancel}} Cancel', wrap='', pre='', post=':', separator='/', onlyfirst=2)
+        self.context.workspace.status_text_set(f'Snapping vertices: {statusbar}')
+        tag_redraw_all('snapping init')
+
+    @FSM.on_state('snapping')
+    def snapping(self):
+        opts = self.snapping_opts
+        bmvs, job = self.snap_job
+        if self.actions.pressed('cancel'):
+            job.cancel()
+            self.undo_cancel()
+            return 'main'
+        if job.is_done:
+            job.wait()
+            self.apply_snap_job(bmvs, job)
+            return 'main'
+        progress = int(job.progress * 100)
+        if progress != opts['progress']:
+            opts['progress'] = progress
+            opts['ui_div'].set_markdown(mdown=f'Snapped {progress}% of {len(bmvs)} vertices')
+            tag_redraw_all('snapping progress')
+
+    @FSM.on_state('snapping', 'exit')
+    def snapping_exit(self):
+        opts = self.snapping_opts
+        opts['timer'].done()
+        self.document.body.delete_child(opts['ui_window'])
+        self.snap_job = None
+        tag_redraw_all('snapping done')
+
+
     def select_path(self, bmelem_types, fn_filter_bmelem=None, kwargs_select=None, kwargs_filter=None, **kwargs):
         vis_accel = self.get_accel_visible()
         nearest2D_vert = self.accel_nearest2D_vert
@@ -19,43 +19,325 @@ Created by Jonathan Denning, Jonathan Williamson, and Patrick Moore
     along with this program.  If not, see <http://www.gnu.org/licenses/>.
 '''
 
-import bpy
-import json
+import os
+import time
+import zlib
+import struct
+import threading
 from queue import Queue
 
+import numpy as np
 
 from ...config.options import options
 
-class RetopoFlow_Instrumentation:
-    instrument_queue = Queue()
-    instrument_thread = None
 
-    def instrument_write(self, action):
-        if not options['instrument']: return
+'''
+Instrumentation file format (little-endian), append-only:
+
+    file header:    8 bytes magic (INSTRUMENT_MAGIC)
+    record header:  u8 kind, u8 flags, f64 timestamp, u32 raw size, u32 stored size
+    record payload: stored size bytes (zlib compressed if flags & FLAG_ZLIB)
+
+raw payload:
+    u16 action length, action (utf-8)
+    u8 symmetry length, symmetry (ascii, ex: 'xz')
+    u32 removed vert count, u32[count] removed vert ids
+    u32 vert count, u32[count] vert ids, f32[count*3] vert coords
+    u32 removed edge count, u32[count] removed edge ids
+    u32 edge count, u32[count] edge ids, u32[count*2] edge vert ids
+    u32 removed face count, u32[count] removed face ids
+    u32 face count, u32[count] face ids, u32[count] face sizes
+    u32 face vert count, u32[face vert count] face vert ids
+
+Verts, edges, and faces are referred to by ids that stay the same for the life
+of the element and are never reused.  Every RetopoFlow session starts with a
+snapshot, which lists all elements and resets ids.  Each following action is
+a delta, which lists only the elements that were removed and the elements that
+were created or changed (moved verts, edges / faces with new verts).  Deltas
+are built from the elements touched in the target's RFMeshChangeLog, so
+recording an action costs time proportional to the edit, not the mesh.  When
+the changes are unknown (the edit called touch_unknown) or the target was
+replaced (ex: undo), a new snapshot is recorded.
+'''
+
+INSTRUMENT_MAGIC = b'RFINST\x00\x02'
+RECORD_HEADER = struct.Struct('<BBdII')
+RECORD_SNAPSHOT = 1
+RECORD_DELTA    = 2
+FLAG_ZLIB = 1
+
+
+class InstrumentElementIds:
+    '''
+    assigns record ids to BMesh elements of one type.
+    BMesh keeps a single Python object per element, so objects are identified by id().
+    the objects are kept alive, so their id() cannot be reused while they are in the map.
+    '''
+
+    def __init__(self, bmelems=()):
+        self.ids = {}       # id(bmelem) -> record id
+        self.bmelems = []   # record id -> bmelem (None if removed)
+        for bmelem in bmelems: self.add(bmelem)
+
+    def get(self, bmelem):
+        return self.ids.get(id(bmelem))
+
+    def add(self, bmelem):
+        rid = len(self.bmelems)
+        self.ids[id(bmelem)] = rid
+        self.bmelems.append(bmelem)
+        return rid
+
+    def remove(self, bmelem):
+        rid = self.ids.pop(id(bmelem), None)
+        if rid is not None: self.bmelems[rid] = None
+        return rid
+
+
+class InstrumentRecorder:
+    '''
+    Encodes target snapshots / deltas on the main thread (reading BMesh is not thread-safe),
+    then compresses and appends them to file on a background thread.
+    '''
+
+    def __init__(self, filename, *, compress=True, compress_level=1):
+        self.filename = filename
+        self.compress = compress
+        self.compress_level = compress_level
+        self._changes = None    # RFMeshChangeLog of recorded target
+        self._cursor = None
+        self._vids = self._eids = self._fids = None
+        self._queue = Queue()
+        self._thread = threading.Thread(target=self._write_out, name='InstrumentRecorder', daemon=True)
+        self._thread.start()
+
+    def record(self, action, rftarget):
+        changes, changed = rftarget.changes, None
+        if changes is self._changes:
+            changed, self._cursor = changes.get_changes(self._cursor, selection=False)
+        if changed is None:
+            kind, parts = RECORD_SNAPSHOT, self._encode_snapshot(rftarget.bme)
+            self._changes, self._cursor = changes, changes.get_cursor()
+        else:
+            kind, parts = RECORD_DELTA, self._encode_delta(changed)
+
+        action = action.encode('utf-8')[:0xffff]
+        symmetry = ''.join(sorted(rftarget.mirror_mod.xyz)).encode('ascii')
+        parts = [
+            struct.pack('<H', len(action)), action,
+            struct.pack('<B', len(symmetry)), symmetry,
+            *parts,
+        ]
+        self._queue.put((kind, time.time(), b''.join(parts)))
+
+    def _encode_snapshot(self, bme):
+        self._vids = InstrumentElementIds(bme.verts)
+        self._eids = InstrumentElementIds(bme.edges)
+        self._fids = InstrumentElementIds(bme.faces)
+        vids = self._vids
+        return self._encode(
+            [], {rid: bmv.co for (rid, bmv) in enumerate(vids.bmelems)},
+            [], {rid: [vids.get(bmv) for bmv in bme.verts] for (rid, bme) in enumerate(self._eids.bmelems)},
+            [], {rid: [vids.get(bmv) for bmv in bmf.verts] for (rid, bmf) in enumerate(self._fids.bmelems)},
+        )
+
+    def _encode_delta(self, changed):
+        from bmesh.types import BMVert, BMEdge, BMFace
+        vids, eids, fids = self._vids, self._eids, self._fids
+        removed = { BMVert: [], BMEdge: [], BMFace: [] }
+        valid   = { BMVert: [], BMEdge: [], BMFace: [] }
+        elem_ids = { BMVert: vids, BMEdge: eids, BMFace: fids }
+        for bmelem in changed:
+            t = type(bmelem)
+            if bmelem.is_valid:
+                valid[t].append(bmelem)
+            else:
+                # elements that were created and removed since last record are not in ids
+                rid = elem_ids[t].remove(bmelem)
+                if rid is not None: removed[t].append(rid)
+
+        verts = {}
+        def get_vid(bmv):
+            rid = vids.get(bmv)
+            if rid is None:
+                # created since last record, but only touched through its edges / faces
+                rid = vids.add(bmv)
+                verts[rid] = bmv.co
+            return rid
+        def get_rid(ids, bmelem):
+            rid = ids.get(bmelem)
+            return ids.add(bmelem) if rid is None else rid
+        for bmv in valid[BMVert]:
+            verts[get_rid(vids, bmv)] = bmv.co
+        edges = { get_rid(eids, bme): [get_vid(bmv) for bmv in bme.verts] for bme in valid[BMEdge] }
+        faces = { get_rid(fids, bmf): [get_vid(bmv) for bmv in bmf.verts] for bmf in valid[BMFace] }
+        return self._encode(removed[BMVert], verts, removed[BMEdge], edges, removed[BMFace], faces)
 
-        tb_name = options.get_path('instrument_filename')
-        if tb_name not in bpy.data.texts: bpy.data.texts.new(tb_name)
-        tb = bpy.data.texts[tb_name]
+    def _encode(self, removed_verts, verts, removed_edges, edges, removed_faces, faces):
+        def pack_ids(ids):
+            return [struct.pack('<I', len(ids)), np.array(sorted(ids), dtype='<u4').tobytes()]
+        vrids, erids, frids = sorted(verts), sorted(edges), sorted(faces)
+        face_sizes = [len(faces[rid]) for rid in frids]
+        return [
+            *pack_ids(removed_verts),
+            *pack_ids(vrids),
+            np.array([tuple(verts[rid]) for rid in vrids], dtype='<f4').tobytes(),
+            *pack_ids(removed_edges),
+            *pack_ids(erids),
+            np.array([edges[rid] for rid in erids], dtype='<u4').tobytes(),
+            *pack_ids(removed_faces),
+            *pack_ids(frids),
+            np.array(face_sizes, dtype='<u4').tobytes(),
+            struct.pack('<I', sum(face_sizes)),
+            np.fromiter((vid for rid in frids for vid in faces[rid]), dtype='<u4', count=sum(face_sizes)).tobytes(),
+        ]
 
-        target_json = self.rftarget.to_json()
-        data = {'action': action, 'target': target_json}
-        data_str = json.dumps(data, separators=[',',':'], indent=0)
-        self.instrument_queue.put(data_str)
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
 
-        # write data to end of textblock asynchronously
-        # TODO: try writing to file (text/binary), because writing to textblock is _very_ slow! :(
-        def write_out():
+    def _write_out(self):
+        is_new = not os.path.exists(self.filename) or os.path.getsize(self.filename) == 0
+        with open(self.filename, 'ab', buffering=1024*1024) as f:
+            if is_new: f.write(INSTRUMENT_MAGIC)
             while True:
-                if self.instrument_queue.empty():
-                    time.sleep(0.1)
-                    continue
-                data_str = self.instrument_queue.get()
-                data_str = data_str.splitlines()
-                tb.write('')        # position cursor to end
-                for line in data_str:
-                    tb.write(line)
-                tb.write('\n')
-        if not self.instrument_thread:
-            # executor only needed to start the following instrument_thread
-            executor = ThreadPoolExecutor()
-            self.instrument_thread = executor.submit(write_out)
+                item = self._queue.get()
+                if item is None: break
+                kind, timestamp, payload = item
+                flags, stored = 0, payload
+                if self.compress:
+                    flags, stored = FLAG_ZLIB, zlib.compress(payload, self.compress_level)
+                f.write(RECORD_HEADER.pack(kind, flags, timestamp, len(payload), len(stored)))
+                f.write(stored)
+                if self._queue.empty(): f.flush()
+
+
+class InstrumentState:
+    ''' full target state after replaying a record '''
+
+    def __init__(self, kind, action, timestamp, symmetry, verts, edges, face_sizes, face_verts):
+        self.kind = kind
+        self.action = action
+        self.timestamp = timestamp
+        self.symmetry = symmetry
+        self.verts = verts
+        self.edges = edges
+        self.face_sizes = face_sizes
+        self.face_verts = face_verts
+
+    def iter_faces(self):
+        offsets = np.concatenate(([0], np.cumsum(self.face_sizes, dtype=np.int64)))
+        for i0, i1 in zip(offsets[:-1], offsets[1:]):
+            yield self.face_verts[i0:i1]
+
+    def to_bmesh(self, bme=None):
+        ''' creates (or fills the given, empty) BMesh with state '''
+        import bmesh
+        if bme is None: bme = bmesh.new()
+        bmverts = [bme.verts.new(co) for co in self.verts.tolist()]
+        for (i0, i1) in self.edges.tolist():
+            bme.edges.new((bmverts[i0], bmverts[i1]))
+        for face in self.iter_faces():
+            try:
+                bme.faces.new([bmverts[i] for i in face.tolist()])
+            except ValueError:
+                # face already exists (ex: duplicate face in recording)
+                pass
+        return bme
+
+
+class InstrumentReader:
+    '''
+    Reads an instrumentation file, replaying snapshots and deltas.
+    Iterating yields an InstrumentState for each record, where elements are
+    ordered by id and vert indices refer to the (compacted) verts of the state.
+    '''
+
+    def __init__(self, filename):
+        self.filename = filename
+
+    def iter_records(self):
+        ''' yields (kind, timestamp, raw payload) '''
+        with open(self.filename, 'rb') as f:
+            magic = f.read(len(INSTRUMENT_MAGIC))
+            assert magic == INSTRUMENT_MAGIC, f'{self.filename} is not a RetopoFlow instrumentation file (or was written by another version)'
+            while True:
+                header = f.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size: break
+                kind, flags, timestamp, raw_size, stored_size = RECORD_HEADER.unpack(header)
+                stored = f.read(stored_size)
+                if len(stored) < stored_size: break     # truncated (ex: Blender crashed mid-write)
+                payload = zlib.decompress(stored) if flags & FLAG_ZLIB else stored
+                assert len(payload) == raw_size, f'Corrupt record in {self.filename}'
+                yield (kind, timestamp, payload)
+
+    def __iter__(self):
+        # elements by id (removed elements are None)
+        verts, edges, faces = [], [], []
+
+        for kind, timestamp, payload in self.iter_records():
+            offset = 0
+            def read(fmt):
+                nonlocal offset
+                values = struct.unpack_from(fmt, payload, offset)
+                offset += struct.calcsize(fmt)
+                return values
+            def read_array(dtype, count, shape=None):
+                nonlocal offset
+                a = np.frombuffer(payload, dtype=dtype, count=count, offset=offset)
+                offset += a.nbytes
+                return a.reshape(shape) if shape else a
+            def read_ids():
+                (n,) = read('<I')
+                return read_array('<u4', n).tolist()
+            def update(elems, removed, ids, values):
+                for rid in removed: elems[rid] = None
+                if ids: elems.extend([None] * (max(ids) + 1 - len(elems)))
+                for (rid, value) in zip(ids, values): elems[rid] = value
+
+            (l,) = read('<H'); action = payload[offset:offset+l].decode('utf-8'); offset += l
+            (l,) = read('<B'); symmetry = payload[offset:offset+l].decode('ascii'); offset += l
+            if kind == RECORD_SNAPSHOT:
+                verts, edges, faces = [], [], []
+
+            removed, ids = read_ids(), read_ids()
+            update(verts, removed, ids, read_array('<f4', len(ids) * 3, (-1, 3)).tolist())
+            removed, ids = read_ids(), read_ids()
+            update(edges, removed, ids, read_array('<u4', len(ids) * 2, (-1, 2)).tolist())
+            removed, ids = read_ids(), read_ids()
+            sizes = read_array('<u4', len(ids)).tolist()
+            (n,) = read('<I')
+            face_verts = read_array('<u4', n).tolist()
+            offsets = np.concatenate(([0], np.cumsum(sizes, dtype=np.int64))).tolist()
+            update(faces, removed, ids, [face_verts[i0:i1] for (i0, i1) in zip(offsets[:-1], offsets[1:])])
+
+            # compact: map vert ids to indices of the live verts
+            live = [co for co in verts if co is not None]
+            vindex = np.cumsum([co is not None for co in verts], dtype=np.int64) - 1
+            live_edges = [e for e in edges if e is not None]
+            live_faces = [f for f in faces if f is not None]
+            yield InstrumentState(
+                kind, action, timestamp, symmetry,
+                np.array(live, dtype=np.float32).reshape((-1, 3)),
+                vindex[np.array(live_edges, dtype=np.int64).reshape((-1, 2))].astype(np.uint32),
+                np.array([len(f) for f in live_faces], dtype=np.uint32),
+                vindex[np.fromiter((vid for f in live_faces for vid in f), dtype=np.int64)].astype(np.uint32),
+            )
+
+
+class RetopoFlow_Instrumentation:
+    _instrument_recorder = None
+
+    def instrument_write(self, action):
+        if not options['instrument']: return
+        if not self._instrument_recorder:
+            self._instrument_recorder = InstrumentRecorder(
+                options.get_path('instrument filename'),
+                compress=options['instrument compress'],
+            )
+        self._instrument_recorder.record(action, self.rftarget)
+
+    def done_instrumentation(self):
+        if not self._instrument_recorder: return
+        self._instrument_recorder.close()
+        self._instrument_recorder = None
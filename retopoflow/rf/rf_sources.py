@@ -20,8 +20,13 @@ Created by Jonathan Denning, Jonathan Williamson
 '''
 
 import bpy
+import os
 import time
+import threading
 from math import isinf, isnan
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 
 from ...config.options import visualization, options
 from ...addon_common.common.maths import BBox
@@ -36,6 +41,104 @@ from ..rfmesh.rfmesh import RFSource
 from ..rfmesh.rfmesh_render import RFMeshRender
 
 
+class NearestSourcesJob:
+    '''
+    finds nearest point and normal on snappable sources for many world-space points.
+    the points are split into chunks that are processed on a thread pool, so the main
+    thread stays responsive and can report progress or cancel the job.
+
+    note: everything touching Blender data (BVH trees, matrices) is gathered in __init__,
+    which must be called on the main thread.  mathutils BVHTree queries currently hold the
+    GIL, so the pool mostly keeps Blender responsive rather than running queries in parallel.
+    '''
+
+    def __init__(self, rfsources, points, *, max_dist=float('inf'), chunk_size=2048):
+        self.points = np.array([tuple(p) for p in points], dtype=np.float64).reshape((-1, 3))
+        count = len(self.points)
+        self.co    = np.full((count, 3), np.nan)
+        self.no    = np.full((count, 3), np.nan)
+        self.dist  = np.full(count, np.inf)
+        self.max_dist = max_dist
+        self.sources = [
+            (
+                rfs.get_bvh(),
+                np.array(rfs.xform.imx_p),
+                np.array(rfs.xform.mx_p),
+                np.array(rfs.xform.mx_n.to_3x3()),
+            )
+            for rfs in rfsources
+        ]
+        self.chunks = [(i0, min(i0 + chunk_size, count)) for i0 in range(0, count, chunk_size)]
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._chunks_done = 0
+        self._futures = []
+
+    @staticmethod
+    def _transform(mx, pts):
+        return (pts @ mx[:3,:3].T + mx[:3,3]) / (pts @ mx[3,:3] + mx[3,3])[:,None]
+
+    def _run_chunk(self, i0, i1):
+        if self._cancel.is_set(): return
+        pts = self.points[i0:i1]
+        dist = self.dist[i0:i1]
+        for (bvh, w2l, l2w, l2w_n) in self.sources:
+            if self._cancel.is_set(): return
+            find_nearest, max_dist = bvh.find_nearest, self.max_dist
+            hits = [find_nearest(p, max_dist) for p in self._transform(w2l, pts).tolist()]
+            idx = np.array([i for (i, (hp, _, _, _)) in enumerate(hits) if hp is not None], dtype=np.int64)
+            if not len(idx): continue
+            hp = self._transform(l2w, np.array([tuple(hits[i][0]) for i in idx]))
+            hn = np.array([tuple(hits[i][1]) for i in idx]) @ l2w_n.T
+            hn /= np.maximum(np.linalg.norm(hn, axis=1), 1e-12)[:,None]
+            hd = np.linalg.norm(pts[idx] - hp, axis=1)
+            closer = hd < dist[idx]
+            idx, hp, hn, hd = idx[closer], hp[closer], hn[closer], hd[closer]
+            self.co[i0 + idx] = hp
+            self.no[i0 + idx] = hn
+            dist[idx] = hd
+        with self._lock:
+            self._chunks_done += 1
+
+    def run(self):
+        ''' processes all chunks on calling thread '''
+        for (i0, i1) in self.chunks: self._run_chunk(i0, i1)
+        return self
+
+    def start(self, *, max_workers=None):
+        ''' processes chunks on a thread pool; poll with is_done and progress '''
+        max_workers = max_workers or min(len(self.chunks), os.cpu_count() or 1) or 1
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='RetopoFlow_snap')
+        self._futures = [executor.submit(self._run_chunk, i0, i1) for (i0, i1) in self.chunks]
+        executor.shutdown(wait=False)
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    @property
+    def is_done(self):
+        return all(f.done() for f in self._futures)
+
+    @property
+    def progress(self):
+        ''' fraction of chunks processed, in [0,1] '''
+        if not self.chunks: return 1.0
+        with self._lock:
+            return self._chunks_done / len(self.chunks)
+
+    def wait(self):
+        for f in self._futures: f.result()
+
+    def found(self):
+        ''' boolean mask of points that have a nearest point on a source '''
+        return ~np.isnan(self.co[:,0])
+
+
 class RetopoFlow_Sources:
     '''
     functions to work on all source meshes (RFSource)
@@ -56,6 +159,8 @@ class RetopoFlow_Sources:
         print('  done!')
         self._detected_bad_normals = False
         self._warned_bad_normals = False
+        self._source_generation = 0
+        self._mouse_hit_cache = (None, None)
 
     def done_sources(self):
         for rfs in self.rfsources:
@@ -67,14 +172,15 @@ class RetopoFlow_Sources:
     @profiler.function
     def setup_sources_symmetry(self):
         xyplane,xzplane,yzplane = self.rftarget.get_xy_plane(),self.rftarget.get_xz_plane(),self.rftarget.get_yz_plane()
-        w2l_point = self.rftarget.w2l_point
+        w2l_points = self.rftarget.xform.w2l_points
         rfsources_xyplanes = [e for rfs in self.rfsources for e in rfs.plane_intersection(xyplane)]
         rfsources_xzplanes = [e for rfs in self.rfsources for e in rfs.plane_intersection(xzplane)]
         rfsources_yzplanes = [e for rfs in self.rfsources for e in rfs.plane_intersection(yzplane)]
 
         def gen_accel(edges, Point_to_Point2D):
-            nonlocal w2l_point
-            edges = [(w2l_point(v0), w2l_point(v1)) for (v0, v1) in edges]
+            if edges:
+                coords = w2l_points([tuple(v) for e in edges for v in e]).reshape((-1, 2, 3)).tolist()
+                edges = [(Point(v0), Point(v1)) for (v0, v1) in coords]
             return Accel2D.simple_edges('RFSource edges', edges, Point_to_Point2D)
 
         self.rftarget.set_symmetry_accel(
@@ -90,11 +196,11 @@ class RetopoFlow_Sources:
 
     @staticmethod
     def get_source_snap(name):
-        return RFContext_Sources.snap_sources.get(name, True)
+        return RetopoFlow_Sources.snap_sources.get(name, True)
 
-    @staticmethod
-    def set_source_snap(name, val):
-        RFContext_Sources.snap_sources[name] = val
+    def set_source_snap(self, name, val):
+        RetopoFlow_Sources.snap_sources[name] = val
+        self.invalidate_source_hits()
 
     def get_rfsource_snap(self, rfsource):
         n = rfsource.get_obj_name()
@@ -135,7 +241,40 @@ class RetopoFlow_Sources:
         return self.raycast_sources_Ray_all(self.Point2D_to_Ray(xy, min_dist=self.drawing.space.clip_start))
 
     def raycast_sources_mouse(self, *, correct_mirror=None, ignore_backface=None):
-        return self.raycast_sources_Point2D(self.actions.mouse, correct_mirror=correct_mirror, ignore_backface=ignore_backface)
+        '''
+        mouse hits are cached by (mouse, view version, projection, clip start, source version,
+        raycast settings), so timer ticks and repeated queries in the same frame do not re-walk
+        every source BVH
+        '''
+        if correct_mirror is None: correct_mirror = options['symmetry mirror input']
+        ignore_backface = self.ray_ignore_backface_sources() if ignore_backface is None else ignore_backface
+        mouse = self.actions.mouse
+        mm = self.rftarget.mirror_mod
+        key = (
+            None if mouse is None else tuple(mouse),
+            self.get_view_version(),
+            self.actions.r3d.is_perspective,
+            self.drawing.space.clip_start,
+            self.get_source_version(),
+            correct_mirror, ignore_backface,
+            (mm.x, mm.y, mm.z) if correct_mirror else None,
+        )
+        cached_key, hit = self._mouse_hit_cache
+        if cached_key != key:
+            hit = self.raycast_sources_Point2D(mouse, correct_mirror=correct_mirror, ignore_backface=ignore_backface)
+            self._mouse_hit_cache = (key, hit)
+        # return copies, because callers might modify the hit point / normal
+        p, n, i, d = hit
+        return (None if p is None else p.copy(), None if n is None else n.copy(), i, d)
+
+    def get_source_version(self):
+        ''' changes whenever sources are invalidated or snapping settings of sources change '''
+        return (self._source_generation, tuple(self.get_rfsource_snap(rfs) for rfs in self.rfsources))
+
+    def invalidate_source_hits(self):
+        ''' call whenever sources change in a way that could change raycast hits '''
+        self._source_generation += 1
+        self._mouse_hit_cache = (None, None)
 
     def raycast_sources_Point(self, xyz:Point, *, correct_mirror=None, ignore_backface=None):
         if xyz is None: return None,None,None,None
@@ -155,6 +294,15 @@ class RetopoFlow_Sources:
                 bp,bn,bi,bd = hp,hn,hi,hd
         return (bp,bn,bi,bd)
 
+    def nearest_sources_Points(self, points, max_dist=float('inf')):
+        '''
+        batch version of nearest_sources_Point.  returns a NearestSourcesJob, which can be
+        run on calling thread (job.run()) or on a thread pool (job.start()).
+        results are in job.co, job.no, job.dist, with NaN / inf for points without a hit
+        '''
+        rfsources = [rfs for rfs in self.rfsources if self.get_rfsource_snap(rfs)]
+        return NearestSourcesJob(rfsources, points, max_dist=max_dist, chunk_size=options['snap chunk size'])
+
 
     ###################################################
     # plane intersection
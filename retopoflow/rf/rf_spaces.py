@@ -61,6 +61,7 @@ class RetopoFlow_Spaces:
                 options['clip auto end max'],
                 (view_origin - farthest).length * options['clip auto end mult'],
             )
+            self.invalidate_source_hits()
             # print(f'clip auto adjusting')
             # print(f'  origin:   {view_origin}')
             # print(f'  focus:    {view_focus}')
@@ -74,6 +75,7 @@ class RetopoFlow_Spaces:
         elif rescale:
             self.end_normalize(self.context)
             self.start_normalize()
+            self.invalidate_source_hits()
             # self.unscale_from_unit_box()
             # self.scale_to_unit_box(
             #     clip_override=options['clip override'],
@@ -24,7 +24,10 @@ import random
 import traceback
 from itertools import chain
 
+import numpy as np
+
 import bpy
+from bmesh.types import BMVert, BMEdge, BMFace
 
 from mathutils import Vector
 from mathutils.geometry import intersect_line_line_2d as intersect_segment_segment_2d
@@ -32,14 +35,14 @@ from mathutils.geometry import intersect_line_line_2d as intersect_segment_segme
 from ...config.options import visualization, options, retopoflow_datablocks
 from ...addon_common.common.debug import dprint, Debugger
 from ...addon_common.common.decorators import timed_call
-from ...addon_common.common.profiler import profiler, time_it
+from ...addon_common.common.profiler import profiler, frametimer, time_it
 from ...addon_common.common.utils import iter_pairs, Dict
 from ...addon_common.common.maths import Point, Vec, Direction, Normal, Ray, XForm, BBox
 from ...addon_common.common.maths import Point2D, Vec2D, Direction2D
-from ...addon_common.common.maths_accel import Accel2D
+from ...addon_common.common.maths_accel import Accel2D, compute_weld_map
 from ...addon_common.common.text import fix_string
 
-from ..rfmesh.rfmesh import RFMesh, RFVert, RFEdge, RFFace
+from ..rfmesh.rfmesh import RFMesh, RFVert, RFEdge, RFFace, RFMeshSelectionIndex
 from ..rfmesh.rfmesh import RFSource, RFTarget
 from ..rfmesh.rfmesh_render import RFMeshRender
 
@@ -66,6 +69,10 @@ class RetopoFlow_Target:
         self.accel_data_unsel = Dict(get_default=None)
         self.accel_recompute = True
 
+        self._face_index2D = None
+        self._face_index2D_version = None
+        self._face_index2D_faces = (None, None)    # (version, index) for last explicit list of faces
+
         self._draw_count = 0
 
     @property
@@ -202,15 +209,16 @@ class RetopoFlow_Target:
         }[selected_only]
 
         # force |= self.accel_recompute
-        needs_recomputed = any([
-            accel_data.recompute,
+        # did anything other than the target change since we last generated accel structure?
+        # if so, the whole structure must be rebuilt.  target changes are applied as deltas
+        needs_rebuilt = any([
             # missing acceleration data?
             accel_data.verts is None,
             accel_data.edges is None,
             accel_data.faces is None,
             accel_data.accel is None,
+            accel_data.target_state is None,
             # did any important thing change since we last generated accel structure?
-            accel_data.target_version              != target_version,
             accel_data.view_version                != view_version,
             accel_data.visible_bbox_factor         != options['visible bbox factor'],
             accel_data.visible_dist_offset         != options['visible dist offset'],
@@ -219,6 +227,11 @@ class RetopoFlow_Target:
             accel_data.ray_ignore_backface_sources != self.ray_ignore_backface_sources(),
             accel_data.mirror_mod                  != (mm.x, mm.y, mm.z),
         ])
+        needs_recomputed = any([
+            needs_rebuilt,
+            accel_data.recompute,
+            accel_data.target_version != target_version,
+        ])
 
         delay_recompute = ([
             self.accel_defer_recomputing,
@@ -231,50 +244,200 @@ class RetopoFlow_Target:
         if not recompute:
             # if needs_recomputed and any(delay_recompute):
             #     print(f'VIS ACCEL NEEDS RECOMPUTED, BUT DELAYED: {delay_recompute}')
-            if accel_data.verts: accel_data.verts = set(self.filter_is_valid(accel_data.verts))
-            if accel_data.edges: accel_data.edges = set(self.filter_is_valid(accel_data.edges))
-            if accel_data.faces: accel_data.faces = set(self.filter_is_valid(accel_data.faces))
-            return accel_data
+            return self._filter_accel_data_valid(accel_data)
+
+        with frametimer.phase('accel rebuild'):
+            if needs_rebuilt or not self._update_accel_data_struct(accel_data, selected_only):
+                # only spread rebuild over frames if there is something (stale) to use in meantime
+                # and the target did not change (otherwise the stale data would be wrong, not just off)
+                can_spread = not force and accel_data.accel is not None and accel_data.target_version == target_version
+                rebuilt = self._rebuild_accel_data_struct(
+                    accel_data, selected_only, (target_version, view_version),
+                    budget=(options['accel rebuild budget'] if can_spread else None),
+                )
+                if not rebuilt:
+                    accel_data.draw_count = self._draw_count    # continue rebuilding next frame
+                    return self._filter_accel_data_valid(accel_data)
 
         accel_data.recompute = False
 
+        # remember important things that influence accel structure
+        accel_data.target_version              = target_version
+        accel_data.view_version                = view_version
+        accel_data.visible_bbox_factor         = options['visible bbox factor']
+        accel_data.visible_dist_offset         = options['visible dist offset']
+        accel_data.selection_occlusion_test    = options['selection occlusion test']
+        accel_data.selection_backface_test     = options['selection backface test']
+        accel_data.ray_ignore_backface_sources = self.ray_ignore_backface_sources()
+        accel_data.draw_count                  = self._draw_count
+        accel_data.mirror_mod                  = (mm.x, mm.y, mm.z)
+
+        return accel_data
+
+    def _filter_accel_data_valid(self, accel_data):
+        if accel_data.verts: accel_data.verts = set(self.filter_is_valid(accel_data.verts))
+        if accel_data.edges: accel_data.edges = set(self.filter_is_valid(accel_data.edges))
+        if accel_data.faces: accel_data.faces = set(self.filter_is_valid(accel_data.faces))
+        return accel_data
+
+    def _rebuild_accel_data_struct(self, accel_data, selected_only, key, *, budget=None):
+        '''
+        rebuilds accel_data from scratch.  given a budget (seconds), the rebuild is spread across
+        calls (frames), picking up where it left off as long as key (target and view versions)
+        is unchanged.  returns True once accel_data is rebuilt
+        '''
+        if accel_data.rebuild is None or accel_data.rebuild[0] != key:
+            accel_data.rebuild = (key, self._iter_accel_rebuild(selected_only))
+        rebuild = accel_data.rebuild[1]
+        stop = None if budget is None else time.time() + budget
+        try:
+            while True:
+                next(rebuild)
+                if stop is not None and time.time() >= stop: return False
+        except StopIteration as done:
+            verts, edges, faces, accel, state = done.value
+        accel_data.rebuild = None
+        accel_data.verts, accel_data.edges, accel_data.faces = verts, edges, faces
+        accel_data.accel = accel
+        accel_data.target_state = state
+        return True
+
+    def _iter_accel_rebuild(self, selected_only):
+        ''' generator that yields after each chunk of vert visibility tests, returning the rebuilt data '''
+        # target changes made from here on are applied later as deltas (see _update_accel_data_struct)
+        changes = self.rftarget.changes
+        state = (changes, changes.get_cursor())
         match selected_only:
             case None:
-                verts, edges, faces = None, None, None
+                verts, edges, faces = list(self.rftarget.bme.verts), None, None
             case True:
-                verts = self.get_selected_verts()
+                verts = list(self.get_selected_verts())
                 edges = self.get_selected_edges()
                 faces = self.get_selected_faces()
             case False:
-                verts = self.get_unselected_verts()
+                verts = list(self.get_unselected_verts())
                 edges = self.get_unselected_edges()
                 faces = self.get_unselected_faces()
 
+        chunk_size = options['accel rebuild chunk size']
+        vis_verts = set()
         with time_it('getting visible geometry', enabled=False):
-            accel_data.verts = self.visible_verts(verts=verts)
-            accel_data.edges = self.visible_edges(edges=edges, verts=accel_data.verts)
-            accel_data.faces = self.visible_faces(faces=faces, verts=accel_data.verts)
+            for i in range(0, len(verts), chunk_size):
+                vis_verts |= self.visible_verts(verts=verts[i:i+chunk_size])
+                yield
+            vis_edges = self.visible_edges(edges=edges, verts=vis_verts)
+            vis_faces = self.visible_faces(faces=faces, verts=vis_verts)
         with time_it('building accel struct', enabled=False):
-            accel_data.accel = Accel2D(
+            accel = Accel2D(
                 f'RFTarget visible geometry ({selected_only=})',
-                accel_data.verts,
-                accel_data.edges,
-                accel_data.faces,
+                vis_verts,
+                vis_edges,
+                vis_faces,
                 self.iter_point2D_symmetries
             )
+        return (vis_verts, vis_edges, vis_faces, accel, state)
+
+    def _update_accel_data_struct(self, accel_data, selected_only):
+        '''
+        moves only the target elements that changed since accel_data was built (or last updated)
+        between bins and in / out of accel_data.  returns False if a full rebuild is needed instead
+        '''
+        accel = accel_data.accel
+        changes, cursor = accel_data.target_state
+        if changes is not self.rftarget.changes: return False    # target was replaced (ex: undo)
+        if accel.delta_count > max(options['accel rebuild chunk size'], len(accel.elem_bins)):
+            # too many inserts since built; bbox and bin size are likely stale
+            return False
+
+        # selection changes only matter if accel_data is filtered by selection
+        changed, cursor = changes.get_changes(cursor, selection=(selected_only is not None))
+        if changed is None: return False
+        if not changed:
+            accel_data.target_state = (changes, cursor)
+            return True
+        ch_verts = { elem for elem in changed if type(elem) is BMVert }
+        if len(ch_verts) > options['accel delta max fraction'] * len(self.rftarget.bme.verts): return False
+        ch_edges = { elem for elem in changed if type(elem) is BMEdge }
+        ch_faces = { elem for elem in changed if type(elem) is BMFace }
+        for bmv in ch_verts:
+            if not bmv.is_valid: continue
+            ch_edges.update(bmv.link_edges)
+            ch_faces.update(bmv.link_faces)
+
+        rftarget = self.rftarget
+        wrap_vert, wrap_edge, wrap_face = rftarget._wrap_bmvert, rftarget._wrap_bmedge, rftarget._wrap_bmface
+
+        # take out everything that changed...
+        rm_verts, rm_edges, rm_faces = set(map(wrap_vert, ch_verts)), set(map(wrap_edge, ch_edges)), set(map(wrap_face, ch_faces))
+        for elem in chain(rm_verts, rm_edges, rm_faces): accel.remove(elem)
+        accel_data.verts -= rm_verts
+        accel_data.edges -= rm_edges
+        accel_data.faces -= rm_faces
+
+        # ... then put back what is visible (same tests as full rebuild, see _iter_accel_rebuild)
+        is_included = RFMesh.fn_is_valid if selected_only is None else RFMeshSelectionIndex.fns['selected' if selected_only else 'unselected']
+        vis_verts = accel_data.verts
+        is_vert_vis = lambda bmv: wrap_vert(bmv) in vis_verts
+        add_verts = self.visible_verts(verts=[bmv for bmv in ch_verts if is_included(bmv)])
+        vis_verts |= add_verts
+        add_edges = { wrap_edge(bme) for bme in ch_edges if is_included(bme) and any(map(is_vert_vis, bme.verts)) }
+        add_faces = { wrap_face(bmf) for bmf in ch_faces if is_included(bmf) and all(map(is_vert_vis, bmf.verts)) }
+        accel_data.edges |= add_edges
+        accel_data.faces |= add_faces
+        for vert in add_verts: accel.insert_vert(vert)
+        for edge in add_edges: accel.insert_edge(edge)
+        for face in add_faces: accel.insert_face(face)
+
+        accel_data.target_state = (changes, cursor)
+        if options['accel check deltas']:
+            for problem in self.check_accel_data_struct(selected_only=selected_only):
+                print(f'Accel delta update ({selected_only=}): {problem}')
+        return True
+
+    def check_accel_data_struct(self, *, selected_only=None):
+        '''
+        compares accel data (which might have been updated with deltas, see _update_accel_data_struct)
+        against a full rebuild.  returns list of problems found, which is empty if they are consistent.
+        the bins might differ (bbox and bin size are not updated with deltas), so instead this checks
+        that the same elements are visible and that each is found in the bins at its current position
+        '''
+        accel_data = {
+            None:  self.accel_data_all,
+            True:  self.accel_data_sel,
+            False: self.accel_data_unsel,
+        }[selected_only]
+        if accel_data.accel is None: return ['accel data is not built']
+        self._filter_accel_data_valid(accel_data)
+        rebuild = self._iter_accel_rebuild(selected_only)
+        try:
+            while True: next(rebuild)
+        except StopIteration as done:
+            verts, edges, faces, _, _ = done.value
+
+        accel = accel_data.accel
+        problems = []
+        for name, rebuilt, updated, accelerated in [
+            ('verts', verts, accel_data.verts, accel.verts),
+            ('edges', edges, accel_data.edges, accel.edges),
+            ('faces', faces, accel_data.faces, accel.faces),
+        ]:
+            rebuilt, accelerated = set(rebuilt), set(self.filter_is_valid(accelerated))
+            if missing := rebuilt - updated: problems.append(f'{len(missing)} visible {name} are missing')
+            if extra := updated - rebuilt:   problems.append(f'{len(extra)} {name} are no longer visible')
+            if accelerated != updated:       problems.append(f'{name} in accel struct do not match visible {name}')
+
+        # each elem must be in the bin at each (symmetric) 2D point of its verts (see Accel2D._insert_*)
+        def is_binned(elem, elem_verts):
+            return all(
+                elem in accel.get(pt, 0)
+                for pts in zip(*[accel.Point_to_Point2Ds(v.co, v.normal) for v in elem_verts])
+                for pt in pts
+            )
+        for name, elems in [('verts', verts), ('edges', edges), ('faces', faces)]:
+            unbinned = [elem for elem in elems if not is_binned(elem, [elem] if name == 'verts' else elem.verts)]
+            if unbinned: problems.append(f'{len(unbinned)} {name} are not in bins at their current position')
 
-        # remember important things that influence accel structure
-        accel_data.target_version              = target_version
-        accel_data.view_version                = view_version
-        accel_data.visible_bbox_factor         = options['visible bbox factor']
-        accel_data.visible_dist_offset         = options['visible dist offset']
-        accel_data.selection_occlusion_test    = options['selection occlusion test']
-        accel_data.selection_backface_test     = options['selection backface test']
-        accel_data.ray_ignore_backface_sources = self.ray_ignore_backface_sources()
-        accel_data.draw_count                  = self._draw_count
-        accel_data.mirror_mod                  = (mm.x, mm.y, mm.z)
-
-        return accel_data
+        return problems
 
     @staticmethod
     def filter_is_valid(bmelems): return filter(RFMesh.fn_is_valid, bmelems)
@@ -427,19 +590,41 @@ class RetopoFlow_Target:
         if max_dist: max_dist = self.drawing.scale(max_dist)
         return self.rftarget.nearest2D_bmedges_Point2D(xy, max_dist, self.iter_point2D_symmetries, edges=edges, fwd=self.Vec_forward())
 
+    @profiler.function
+    def get_face_index2D(self, faces=None):
+        '''
+        returns TriangleIndex2D of faces projected to screen, front to back.
+        index of all faces is cached until target or view changes.  index of the most recent
+        explicit faces is also cached, keyed by the faces, so repeated queries reuse it
+        '''
+        version = (self.get_target_version(selection=False), self.get_view_version())
+        if faces is not None:
+            version = (frozenset(faces), *version)
+            cached_version, index = self._face_index2D_faces
+            if cached_version != version:
+                index = self.rftarget.get_face_index2D(self.Vec_forward(), self.iter_point2D_symmetries, faces=faces)
+                self._face_index2D_faces = (version, index)
+            return index
+        if self._face_index2D_version != version:
+            self._face_index2D = self.rftarget.get_face_index2D(self.Vec_forward(), self.iter_point2D_symmetries)
+            self._face_index2D_version = version
+        return self._face_index2D
+
     # TODO: implement max_dist
     @profiler.function
     def nearest2D_face(self, point=None, max_dist=None, faces=None):
         xy = self.get_point2D(point or self.actions.mouse)
         if max_dist: max_dist = self.drawing.scale(max_dist)
-        return self.rftarget.nearest2D_bmface_Point2D(self.Vec_forward(), xy, self.iter_point2D_symmetries, faces=faces, fwd=self.Vec_forward())
+        index = self.get_face_index2D(faces=faces)
+        return self.rftarget.nearest2D_bmface_Point2D(self.Vec_forward(), xy, self.iter_point2D_symmetries, index=index)
 
-    # TODO: fix this function! Izzza broken
+    # TODO: implement max_dist
     @profiler.function
     def nearest2D_faces(self, point=None, max_dist:float=10, faces=None):
         xy = self.get_point2D(point or self.actions.mouse)
         if max_dist: max_dist = self.drawing.scale(max_dist)
-        return self.rftarget.nearest2D_bmfaces_Point2D(xy, self.iter_point2D_symmetries, faces=faces, fwd=self.Vec_forward())
+        index = self.get_face_index2D(faces=faces)
+        return self.rftarget.nearest2D_bmfaces_Point2D(self.Vec_forward(), xy, self.iter_point2D_symmetries, index=index)
 
 
     ########################################
@@ -613,49 +798,29 @@ class RetopoFlow_Target:
 
     def push_then_snap_all_verts(self):
         self.undo_push('push then snap all non-hidden verts')
-        d = options['push and snap distance']
-        bmvs = [bmv for bmv in self.rftarget.get_verts() if not bmv.hide]
-        for bmv in bmvs: bmv.co += bmv.normal * d
-        self.rftarget.snap_all_nonhidden_verts(self.nearest_sources_Point)
-        self.recalculate_face_normals(verts=bmvs)
+        self.push_then_snap_verts([bmv for bmv in self.rftarget.get_verts() if not bmv.hide])
 
     def push_then_snap_selected_verts(self):
         self.undo_push('push then snap selected verts')
+        self.push_then_snap_verts(self.rftarget.get_selected_verts())
+
+    def push_then_snap_verts(self, bmvs):
         d = options['push and snap distance']
-        bmvs = self.rftarget.get_selected_verts()
-        for bmv in bmvs: bmv.co += bmv.normal * d
-        self.rftarget.snap_selected_verts(self.nearest_sources_Point)
+        bmvs = self.rftarget.set_verts_co(bmvs, [bmv.co + bmv.normal * d for bmv in bmvs])
+        job = self.nearest_sources_Points([bmv.co for bmv in bmvs])
+        if len(bmvs) < options['snap async threshold']:
+            self.apply_snap_job(bmvs, job.run())
+        else:
+            # large targets are snapped in background (see 'snapping' state)
+            self.snap_job = (bmvs, job.start())
+            self.fsm.force_set_state('snapping')
+
+    def apply_snap_job(self, bmvs, job):
+        found = job.found()
+        bmvs = [bmv for (bmv, f) in zip(bmvs, found.tolist()) if f]
+        self.rftarget.set_verts_co(bmvs, job.co[found], normals=job.no[found])
         self.recalculate_face_normals(verts=bmvs)
-
-#    def snap_verts_filter(self, fn_filter):
-#        self.undo_push('snap filtered verts')
-#        self.rftarget.snap_verts_filter(self.nearest_source_Point, fn_filter)
-#
-#    def snap_all_verts(self):
-#        self.undo_push('snap all verts')
-#        self.rftarget.snap_all_verts(self.nearest_sources_Point)
-#
-#    def snap_all_nonhidden_verts(self):
-#        self.undo_push('snap all visible verts')
-#        self.rftarget.snap_all_nonhidden_verts(self.nearest_sources_Point)
-#
-#    def snap_selected_verts(self):
-#        self.undo_push('snap visible and selected verts')
-#        self.rftarget.snap_selected_verts(self.nearest_sources_Point)
-#
-#    def snap_unselected_verts(self):
-#        self.undo_push('snap visible and unselected verts')
-#        self.rftarget.snap_unselected_verts(self.nearest_sources_Point)
-#
-#    def snap_visible_verts(self):
-#        self.undo_push('snap visible verts')
-#        nonvisible_verts = self.nonvisible_verts()
-#        self.rftarget.snap_verts_filter(self.nearest_sources_Point, lambda v: not v.hide and v not in nonvisible_verts)
-#
-#    def snap_nonvisible_verts(self):
-#        self.undo_push('snap non-visible verts')
-#        nonvisible_verts = self.nonvisible_verts()
-#        self.rftarget.snap_verts_filter(self.nearest_sources_Point, lambda v: not v.hide and v in nonvisible_verts)
+        self.dirty()
 
     def remove_all_doubles(self):
         self.undo_push('remove all doubles')
@@ -687,6 +852,26 @@ class RetopoFlow_Target:
         vert.co = xyz
         vert.normal = norm
 
+    def set_verts_co(self, verts, coords, *, normals=None, snap=False):
+        '''
+        sets co of many verts at once (see RFTarget.set_verts_co).
+        if snap is True, written verts are then snapped to sources, as with snap_vert
+        '''
+        verts = self.rftarget.set_verts_co(verts, coords, normals=normals)
+        if snap: self.snap_verts(verts)
+        return verts
+
+    def snap_verts(self, verts, *, snap_to_symmetry=None):
+        verts = [vert for vert in verts if vert and vert.is_valid]
+        if not verts: return
+        job = self.nearest_sources_Points([vert.co for vert in verts]).run()
+        found = job.found()
+        snapped = [vert for (vert, f) in zip(verts, found.tolist()) if f]
+        xyzs = [Point(xyz) for xyz in job.co[found].tolist()]
+        if snap_to_symmetry:
+            xyzs = [self.snap_to_symmetry(xyz, snap_to_symmetry) for xyz in xyzs]
+        self.rftarget.set_verts_co(snapped, xyzs, normals=job.no[found])
+
     def snap2D_vert(self, vert:RFVert):
         if not vert or  not vert.is_valid: return
         xy = self.Point_to_Point2D(vert.co)
@@ -770,8 +955,8 @@ class RetopoFlow_Target:
         self.update_verts_faces([ret])
         return ret
     
-    def remove_by_distance(self, verts, dist):
-        return self.rftarget.remove_by_distance(verts, dist)
+    def remove_by_distance(self, verts, dist, *, clamp_to_symmetry=False):
+        return self.rftarget.remove_by_distance(verts, dist, clamp_to_symmetry=clamp_to_symmetry)
 
     def bridge_vertloop(self, vloop0, vloop1, connected):
         assert len(vloop0) == len(vloop1), "loops must have same vertex counts"
@@ -813,6 +998,9 @@ class RetopoFlow_Target:
     def get_target_version(self, selection=True):
         return self.rftarget.get_version(selection=selection)
 
+    def get_target_selection_version(self):
+        return self.rftarget.get_selection_version()
+
     def get_target_geometry_counts(self):
         return self.rftarget.get_geometry_counts()
 
@@ -855,6 +1043,12 @@ class RetopoFlow_Target:
     def get_inner_edge_loop(self, edge):
         return self.rftarget.get_inner_edge_loop(edge)
 
+    def get_edge_loop_id(self, edge):
+        return self.rftarget.get_edge_loop_id(edge)
+
+    def get_edge_ring_id(self, edge):
+        return self.rftarget.get_edge_ring_id(edge)
+
     def get_face_loop(self, edge):
         return self.rftarget.get_face_loop(edge)
 
@@ -1009,45 +1203,75 @@ class RetopoFlow_Target:
         return RFFace.get_verts(faces)
 
     #######################################################
-    def smooth_edge_flow(self, iterations=10):
+    def smooth_edge_flow(self, iterations=10, *, tolerance=None):
+        '''
+        pulls each end of the selected edges to the average of its neighbors across the unselected
+        edges of the adjacent faces.  all verts are updated together from the previous iteration
+        (Jacobi), iterating until no vert moves more than tolerance (fraction of average neighbor
+        distance, default from options) or iterations is reached, then moved verts are snapped once.
+        note: before, verts were updated in place one edge at a time (Gauss-Seidel) and snapped after
+        each update, a single connected loop / strip got a single pass, and the second end of each
+        edge was averaged over the neighbors of the first end (typo), so it rarely moved.  with that
+        typo fixed, both reach the same positions once converged, if snapping does not move verts.
+        '''
         self.undo_push(f'smooth edge flow')
 
-        # get connected loops/strips
-        all_edges = set(self.get_selected_edges())
-        edge_sets = []
-        while all_edges:
-            current_set = set()
-            working = { next(iter(all_edges)) }
-            while working:
-                e = working.pop()
-                if e not in all_edges: continue
-                all_edges.discard(e)
-                current_set.add(e)
-                v0,v1 = e.verts
-                working.update(o for o in v0.link_edges if o.select)
-                working.update(o for o in v1.link_edges if o.select)
-            edge_sets.append(current_set)
-
-        niters = 1 if len(edge_sets)==1 else iterations
-
-        for i in range(niters):
-            for current_set in edge_sets:
-                for e in current_set:
-                    v0,v1 = e.verts
-                    faces0 = e.shared_faces(v0)
-                    edges0 = [edge for f in faces0 for edge in f.edges if not edge.select and edge != e and edge.share_vert(e)]
-                    verts0 = [edge.other_vert(v0) for edge in edges0]
-                    verts0 = [v for v in verts0 if v and v != v1]
-                    faces1 = e.shared_faces(v1)
-                    edges1 = [edge for f in faces1 for edge in f.edges if not edge.select and edge != e and edge.share_vert(e)]
-                    verts1 = [edge.other_vert(v1) for edge in edges0]
-                    verts1 = [v for v in verts1 if v and v != v0]
-                    if len(verts0) > 1:
-                        v0.co = Point.average([v.co for v in verts0])
-                        self.snap_vert(v0)
-                    if len(verts1) > 1:
-                        v1.co = Point.average([v.co for v in verts1])
-                        self.snap_vert(v1)
+        sel_edges = self.get_selected_edges()
+        if tolerance is None: tolerance = options['smooth edge flow tolerance']
+
+        # gather (vert, neighbor) index pairs once.  each end of a selected edge is pulled to the
+        # average of the unselected edges leaving it within the faces adjacent to the selected edge
+        rftarget = self.rftarget
+        index = {}
+        pairs = set()
+        for bme in map(rftarget._unwrap, sel_edges):
+            if not bme.is_valid: continue
+            for bmf in bme.link_faces:
+                for bme_ in bmf.edges:
+                    if bme_ == bme or bme_.select: continue
+                    for bmv in bme.verts:
+                        if bmv not in bme_.verts: continue
+                        bmv_ = bme_.other_vert(bmv)
+                        if bmv_ in bme.verts: continue
+                        i  = index.setdefault(bmv,  len(index))
+                        i_ = index.setdefault(bmv_, len(index))
+                        pairs.add((i, i_))
+        if not pairs:
+            self.dirty()
+            return
+
+        bmverts = list(index)
+        tgt, nbr = np.array(sorted(pairs), dtype=np.int64).T
+        count = np.bincount(tgt, minlength=len(bmverts))
+
+        # same rules as RFVert.co: pinned and seam verts do not move
+        check_pin  = options['show pinned'] and options['pin enabled']
+        check_seam = options['show seam']   and options['pin seam']
+        def is_movable(bmv):
+            if check_pin  and bmv[rftarget.layer_pin]: return False
+            if check_seam and any(bme.seam for bme in bmv.link_edges): return False
+            return True
+        moving = (count > 1) & np.fromiter(map(is_movable, bmverts), dtype=bool, count=len(bmverts))
+        if not moving.any():
+            self.dirty()
+            return
+
+        # iterate in local space (averaging commutes with xform), stopping once verts settle
+        co = np.array([tuple(bmv.co) for bmv in bmverts], dtype=np.float64)
+        tolerance *= np.linalg.norm(co[tgt] - co[nbr], axis=1).mean()
+        counts = count[moving, None]
+        for _ in range(iterations):
+            total = np.zeros_like(co)
+            np.add.at(total, tgt, co[nbr])
+            avg = total[moving] / counts
+            displacement = np.linalg.norm(avg - co[moving], axis=1).max()
+            co[moving] = avg
+            if displacement <= tolerance: break
+
+        # write back and snap all moved verts in one batch
+        moved = np.nonzero(moving)[0].tolist()
+        verts = [rftarget._wrap_bmvert(bmverts[i]) for i in moved]
+        self.set_verts_co(verts, rftarget.xform.l2w_points(co[moved]).tolist(), snap=True)
 
         self.dirty()
 
@@ -1062,20 +1286,17 @@ class RetopoFlow_Target:
 
         if merge_dist is None: return
 
-        bmverts = set(bmverts)
-        accel_data = self.get_custom_vis_accel(
-            selection_only=False,
-            include_verts=True, include_edges=False, include_faces=False,
-            symmetry=False,
+        bmverts = [bmv for bmv in set(bmverts) if bmv.is_valid]
+        bmverts_set = set(bmverts)
+        Point_to_Point2D = self.Point_to_Point2D
+        # merge into unselected visible verts only.
+        # note: merge_dist is scaled twice to keep the radius used before weld_verts_2D, where the
+        #       already scaled dist was passed to accel_nearest2D_vert, which scaled it again
+        update_verts = self.weld_verts_2D(
+            ((bmv, Point_to_Point2D(bmv.co)) for bmv in bmverts),
+            ((bmv, Point_to_Point2D(bmv.co)) for bmv in self.get_vis_verts(force=True) if not bmv.select and bmv not in bmverts_set),
+            self.drawing.scale(self.drawing.scale(merge_dist)),
         )
-        snappable_bmverts = { bmv for bmv in accel_data.verts if bmv not in bmverts }
-        kwargs = { 'max_dist': self.drawing.scale(merge_dist), 'vis_accel': accel_data }
-        update_verts = []
-        for bmv in bmverts:
-            if not (xy := self.Point_to_Point2D(bmv.co)): continue
-            if not (bmv1 := self.accel_nearest2D_vert(point=xy, **kwargs)[0]): continue
-            bmv1.merge_robust(bmv)
-            update_verts.append(bmv1)
 
         self.update_verts_faces(update_verts)
         if select_merged:
@@ -1083,6 +1304,29 @@ class RetopoFlow_Target:
 
         return update_verts
 
+    def weld_verts_2D(self, sources, targets, dist):
+        '''
+        merges each source vert into the nearest target vert within dist (screen space, already scaled),
+        using a spatial hash (see compute_weld_map) and a single bmesh pass (see RFTarget.weld_verts).
+        faces shared by a source and its target are split between them first, like RFVert.merge_robust.
+        sources and targets are iterables of (vert, xy), where verts with xy of None are skipped.
+        returns list of merged-into verts
+        '''
+        sources = [(bmv, xy) for (bmv, xy) in sources if xy and bmv.is_valid]
+        targets = [(bmv, xy) for (bmv, xy) in targets if xy and bmv.is_valid]
+        if not sources or not targets: return []
+        verts = [bmv for (bmv, _) in chain(sources, targets)]
+        is_source = np.arange(len(verts)) < len(sources)
+        merge_map, _ = compute_weld_map(
+            [(xy.x, xy.y) for (_, xy) in chain(sources, targets)], dist,
+            sources=is_source, targets=~is_source,
+        )
+        return self.rftarget.weld_verts({
+            verts[i]: verts[j]
+            for (i, j) in enumerate(merge_map[:len(sources)].tolist())
+            if i != j
+        }, split_shared_faces=True)
+
 
 
     #######################################################
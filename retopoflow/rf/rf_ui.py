@@ -42,7 +42,7 @@ from ...addon_common.common.blender import get_path_from_addon_root
 from ...addon_common.common.blender_preferences import get_preferences
 from ...addon_common.common.ui_core import UI_Element
 from ...addon_common.common.ui_styling import load_defaultstylings
-from ...addon_common.common.profiler import profiler
+from ...addon_common.common.profiler import profiler, sampler, frametimer
 
 from ...config.options import (
     options, themes, visualization,
@@ -25,7 +25,7 @@ import heapq
 import numpy as np
 import random
 from dataclasses import dataclass, field
-from itertools import takewhile, filterfalse
+from itertools import takewhile, filterfalse, chain
 
 import bpy
 import bmesh
@@ -34,8 +34,9 @@ from bmesh.ops import (
     bisect_plane, holes_fill,
     dissolve_verts, dissolve_edges, dissolve_faces,
     remove_doubles, mirror, recalc_face_normals,
-    pointmerge,
+    pointmerge, weld_verts,
 )
+from bmesh.utils import face_split
 from mathutils import Vector, Matrix
 from mathutils.bvhtree import BVHTree
 from mathutils.kdtree import KDTree
@@ -45,11 +46,13 @@ from ...addon_common.common.blender import ModifierWrapper_Mirror
 from ...addon_common.common.maths import Point, Normal, Direction
 from ...addon_common.common.maths import Point2D
 from ...addon_common.common.maths import Ray, XForm, BBox, Plane
+from ...addon_common.common.maths_graph import label_components, group_labels
+from ...addon_common.common.maths_accel import TriangleIndex2D, compute_weld_map
 from ...addon_common.common.hasher import hash_object, Hasher
 from ...addon_common.common.utils import min_index, UniqueCounter, iter_pairs, accumulate_last, deduplicate_list, has_duplicates
 from ...addon_common.common.decorators import stats_wrapper, blender_version_wrapper
 from ...addon_common.common.debug import dprint
-from ...addon_common.common.profiler import profiler, time_it
+from ...addon_common.common.profiler import profiler, frametimer, time_it
 from ...addon_common.terminal import term_printer
 
 from ...config.options import options
@@ -59,6 +62,179 @@ from .rfmesh_wrapper import (
 )
 
 
+class RFMeshLoopIndex:
+    '''
+    index of edge walks (edge loops, quad walks, inner loops, face loops) for a single
+    RFMesh version.  each walk gets an id, and every edge that would produce the same walk
+    is mapped to it, so later queries from any edge on the walk are O(1) lookups.
+    walks are found lazily, as they are queried.
+    '''
+
+    kinds = {'edge loop', 'quadwalk', 'inner loop', 'face loop'}
+
+    def __init__(self, version):
+        self.version = version
+        self.walks = []                                 # walk id -> (bmedges, looped)
+        self.ids = { kind: {} for kind in self.kinds }  # kind -> { bmedge: walk id }
+
+    def get(self, kind, bme):
+        wid = self.ids[kind].get(bme)
+        return None if wid is None else self.walks[wid]
+
+    def get_id(self, kind, bme):
+        return self.ids[kind].get(bme)
+
+    def add(self, kind, bme, bmes, looped, *, shared=True):
+        '''
+        records walk found by starting at bme.  if shared is False, the walk depends on
+        where it started (ex: lasso-shaped loop), so it is only mapped to bme
+        '''
+        wid = len(self.walks)
+        walk = (bmes, looped)
+        self.walks.append(walk)
+        ids = self.ids[kind]
+        ids[bme] = wid
+        if shared:
+            for e in bmes: ids.setdefault(e, wid)
+        return walk
+
+
+class RFMeshSelectionIndex:
+    '''
+    selected / unselected / hidden elements of an RFMesh for a single version (selection
+    included).  each set is gathered with one scan the first time it is queried, and then
+    RFMesh.select / deselect / deselect_all update the gathered sets in place with only the
+    elements they touched.  queries return cached frozensets of wrapped elements, but each
+    query first re-checks the gathered elements, so elements that were deleted or hidden
+    without a version change are dropped.
+    '''
+
+    fns = {
+        'selected':   lambda bmelem: bmelem.is_valid and bmelem.select     and not bmelem.hide,
+        'unselected': lambda bmelem: bmelem.is_valid and not bmelem.select and not bmelem.hide,
+        'hidden':     lambda bmelem: bmelem.is_valid and bmelem.hide,
+    }
+
+    def __init__(self, rfmesh, version):
+        self.version = version
+        self.elems = { BMVert: rfmesh.bme.verts, BMEdge: rfmesh.bme.edges, BMFace: rfmesh.bme.faces }
+        self.wraps = { BMVert: rfmesh._wrap_bmvert, BMEdge: rfmesh._wrap_bmedge, BMFace: rfmesh._wrap_bmface }
+        self.sets  = {}     # (type, state) -> set of BMElems
+        self.views = {}     # (type, state) -> frozenset of wrapped elems
+
+    def get_set(self, t, state):
+        key = (t, state)
+        if key not in self.sets:
+            self.sets[key] = set(filter(self.fns[state], self.elems[t]))
+            return self.sets[key]
+        elems = self.sets[key]
+        fn = self.fns[state]
+        stale = [bmelem for bmelem in elems if not fn(bmelem)]
+        if stale:
+            elems.difference_update(stale)
+            self.views.pop(key, None)
+        return elems
+
+    def get_view(self, t, state):
+        key = (t, state)
+        elems = self.get_set(t, state)
+        if key not in self.views:
+            self.views[key] = frozenset(map(self.wraps[t], elems))
+        return self.views[key]
+
+    def any(self, t, state):
+        key = (t, state)
+        if key in self.sets: return bool(self.get_set(t, state))
+        return any(map(self.fns[state], self.elems[t]))
+
+    def refresh(self, bmelems, version):
+        ''' re-checks only the given (touched) elements, then marks index as valid for version '''
+        for bmelem in bmelems:
+            t = type(bmelem)
+            for state, fn in self.fns.items():
+                elems = self.sets.get((t, state))
+                if elems is None: continue
+                if fn(bmelem): elems.add(bmelem)
+                else:          elems.discard(bmelem)
+        self.views.clear()
+        self.version = version
+
+    def clear_selected(self, version):
+        ''' everything was deselected '''
+        for t in self.elems:
+            selected = self.sets.get((t, 'selected'))
+            if selected is None:
+                # do not know which elements were selected
+                self.sets.pop((t, 'unselected'), None)
+                continue
+            unselected = self.sets.get((t, 'unselected'))
+            if unselected is not None: unselected.update(selected)
+            selected.clear()
+        self.views.clear()
+        self.version = version
+
+
+class RFMeshChangeLog:
+    '''
+    records which elements of an RFMesh were changed (moved, hidden, (de)selected, created,
+    removed), so consumers (ex: accel structs of RetopoFlow_Target) can update only those
+    elements rather than rescanning the whole mesh.  edits that cannot cheaply tell which
+    elements they changed call touch_unknown, which forces consumers to rebuild.
+    consumers remember the cursor from get_cursor, then get_changes(cursor) returns the
+    elements changed since.  only the most recent entries are kept.
+    '''
+
+    max_entries = 64
+
+    def __init__(self):
+        self.base = 0       # cursor of entries[0]
+        self.entries = []   # list of (geometry BMElems, selection BMElems), either None if unknown
+        self._reset()
+
+    def _reset(self):
+        self.geometry, self.selection = set(), set()
+        self.geometry_unknown, self.selection_unknown = False, False
+
+    def _close(self):
+        if self.geometry or self.selection or self.geometry_unknown or self.selection_unknown:
+            self.entries.append((
+                None if self.geometry_unknown  else self.geometry,
+                None if self.selection_unknown else self.selection,
+            ))
+            if len(self.entries) > self.max_entries:
+                drop = len(self.entries) - self.max_entries
+                del self.entries[:drop]
+                self.base += drop
+            self._reset()
+        return self.base + len(self.entries)
+
+    def touch(self, bmelems, *, selection=False):
+        (self.selection if selection else self.geometry).update(bmelems)
+
+    def touch_unknown(self, *, selection=False):
+        if selection: self.selection_unknown = True
+        else:         self.geometry_unknown = True
+
+    def get_cursor(self):
+        return self._close()
+
+    def get_changes(self, cursor, *, selection=True):
+        '''
+        returns (BMElems changed since cursor, new cursor), where BMElems is None if changes
+        are not known.  selection changes are included only if selection is True
+        '''
+        end = self._close()
+        if cursor < self.base: return (None, end)
+        changed = set()
+        for (geometry, selected) in self.entries[cursor - self.base:]:
+            if geometry is None: return (None, end)
+            changed |= geometry
+            if not selection: continue
+            if selected is None: return (None, end)
+            changed |= selected
+        return (changed, end)
+
+
 class RFMesh():
     '''
     RFMesh wraps a mesh object, providing extra machinery such as
@@ -117,6 +293,10 @@ class RFMesh():
         self.hash = hash_object(self.obj)
         self._version = None
         self._version_selection = None
+        self._loop_index = None
+        self._topology = None
+        self._selection_index = None
+        self.changes = RFMeshChangeLog()
 
         if bme is not None:
             self.bme = bme
@@ -191,6 +371,47 @@ class RFMesh():
     def get_version(self, selection=True):
         return Hasher(self._version, (self._version_selection if selection else 0))
 
+    def get_loop_index(self):
+        ver = self.get_version(selection=False)
+        if not self._loop_index or self._loop_index.version != ver:
+            self._loop_index = RFMeshLoopIndex(ver)
+        return self._loop_index
+
+    def get_selection_version(self):
+        ''' changes whenever selection (or geometry) changes '''
+        return self._version_selection
+
+    def get_selection_index(self):
+        ver = self.get_version()
+        if not self._selection_index or self._selection_index.version != ver:
+            self._selection_index = RFMeshSelectionIndex(self, ver)
+        return self._selection_index
+
+    def _get_current_selection_index(self):
+        ''' returns selection index only if it is valid for current version '''
+        index = self._selection_index
+        return index if index and index.version == self.get_version() else None
+
+    def _refresh_selection_index(self, index, bmelems):
+        if index: index.refresh(map(self._unwrap, bmelems), self.get_version())
+
+    @profiler.function
+    def get_topology(self):
+        '''
+        returns (bmverts, edges, faces, labels) for current version, where edges is an (m,2) array
+        of vert indices, faces is an array of the first vert index of each face, and labels are
+        the connected component labels of the verts (see maths_graph.label_components)
+        '''
+        ver = self.get_version(selection=False)
+        if not self._topology or self._topology[0] != ver:
+            bmverts, bmedges, bmfaces = self.bme.verts, self.bme.edges, self.bme.faces
+            bmverts.index_update()
+            edges = np.fromiter((bmv.index for bme in bmedges for bmv in bme.verts), dtype=np.int64, count=2*len(bmedges)).reshape((-1, 2))
+            faces = np.fromiter((bmf.verts[0].index for bmf in bmfaces), dtype=np.int64, count=len(bmfaces))
+            labels = label_components(len(bmverts), edges)
+            self._topology = (ver, (list(bmverts), edges, faces, labels))
+        return self._topology[1]
+
     @profiler.function
     def get_bvh(self):
         ver = self.get_version(selection=False)
@@ -297,6 +518,7 @@ class RFMesh():
         # print('RFMesh.triangulate: found %d non-triangles' % len(faces))
         # bmesh.ops.triangulate(self.bme, faces=faces)
         bmesh.ops.triangulate(self.bme, faces=self.bme.faces)
+        self.changes.touch_unknown()
 
     @profiler.function
     def plane_split(self, plane: Plane):
@@ -314,6 +536,7 @@ class RFMesh():
             use_snap_center=True,
             clear_outer=False, clear_inner=False
         )
+        self.changes.touch_unknown()
 
     @profiler.function
     def plane_intersection(self, plane: Plane):
@@ -872,53 +1095,38 @@ class RFMesh():
         if be is None: return (None,None)
         return (self._wrap_bmedge(be), (xy-bpp).length)
 
-    def nearest2D_bmfaces_Point2D(self, xy:Point2D, Point_to_Point2Ds, *, faces=None, fwd=None):
-        # TODO: compute distance from camera to point
-        # TODO: sort points based on 3d distance
-        if faces is None:
-            faces = [bmf for bmf in self.bme.faces if bmf.is_valid and not bmf.hide]
-        else:
-            faces = [self._unwrap(bmf) for bmf in faces if bmf.is_valid and not bmf.hide]
-        l2w_point, l2w_normal = self.xform.l2w_point, self.xform.l2w_normal
-        nearest = []
-        for bmf in faces:
-            ptsets = [Point_to_Point2Ds(l2w_point(bmv.co), l2w_normal(bmv.normal), fwd=fwd) for bmv in bmf.verts]
-            ptsets = list(zip(*ptsets))
-            for pts in ptsets:
-                pts = [pt for pt in pts if pt]
-                if len(pts) < 3: continue
-                pt0 = pts[0]
-                # TODO: Get dist?
-                for pt1,pt2 in zip(pts[1:-1],pts[2:]):
-                    if intersect_point_tri_2d(xy, pt0, pt1, pt2):
-                        nearest.append((self._wrap_bmface(bmf), dist))
-        return nearest
-
-    def nearest2D_bmface_Point2D(self, forward:Direction, xy:Point2D, Point_to_Point2Ds, *, faces=None, fwd=None):
-        # TODO: compute distance from camera to point
-        # TODO: sort points based on 3d distance
+    def get_face_index2D(self, forward:Direction, Point_to_Point2Ds, *, faces=None):
+        '''
+        returns TriangleIndex2D of faces projected to 2D (for each symmetry), where depth
+        is the distance of face center along forward.  used for point-in-face queries
+        '''
         if faces is None:
             faces = [bmf for bmf in self.bme.faces if bmf.is_valid and not bmf.hide]
         else:
             faces = [self._unwrap(bmf) for bmf in faces if bmf.is_valid and not bmf.hide]
         l2w_point, l2w_normal = self.xform.l2w_point, self.xform.l2w_normal
-        bv,bd = None,None
-        best_d = float('inf')
-        best_f = None
-        for bmf in faces:
-            ptsets = [Point_to_Point2Ds(l2w_point(bmv.co), l2w_normal(bmv.normal), fwd=fwd) for bmv in bmf.verts]
-            ptsets = list(zip(*ptsets))
-            for pts in ptsets:
-                pts = [pt for pt in pts if pt]
-                if len(pts) < 3: continue
-                pt0 = pts[0]
-                for pt1,pt2 in zip(pts[1:-1],pts[2:]):
-                    if intersect_point_tri_2d(xy, pt0, pt1, pt2):
-                        f = self._wrap_bmface(bmf)
-                        d = forward.dot(f.center())
-                        if d < best_d: best_d, best_f = d, f
-        if not best_f: return (None, None)
-        return (best_f, 0)
+        def iter_polygons():
+            for bmf in faces:
+                depth = forward.dot(self._wrap_bmface(bmf).center())
+                ptsets = [Point_to_Point2Ds(l2w_point(bmv.co), l2w_normal(bmv.normal), fwd=forward) for bmv in bmf.verts]
+                for pts in zip(*ptsets):
+                    yield (bmf, pts, depth)
+        return TriangleIndex2D(iter_polygons())
+
+    def nearest2D_bmfaces_Point2D(self, forward:Direction, xy:Point2D, Point_to_Point2Ds, *, faces=None, index=None):
+        ''' returns all faces under xy, front to back '''
+        if index is None:
+            index = self.get_face_index2D(forward, Point_to_Point2Ds, faces=faces)
+        # TODO: Get dist?
+        return [(self._wrap_bmface(bmf), 0) for bmf in index.get(xy, fn_filter=RFMesh.fn_is_valid_revealed)]
+
+    def nearest2D_bmface_Point2D(self, forward:Direction, xy:Point2D, Point_to_Point2Ds, *, faces=None, index=None):
+        ''' returns front-most face under xy '''
+        if index is None:
+            index = self.get_face_index2D(forward, Point_to_Point2Ds, faces=faces)
+        bmf = index.get_first(xy, fn_filter=RFMesh.fn_is_valid_revealed)
+        if not bmf: return (None, None)
+        return (self._wrap_bmface(bmf), 0)
 
 
     ##########################################################
@@ -1010,7 +1218,7 @@ class RFMesh():
 
     def iter_verts(self): yield from self.iter_wrap(filter(RFMesh.fn_is_valid_revealed, self.bme.verts), wrap_fn=self._wrap_bmvert)
     def iter_edges(self): yield from self.iter_wrap(filter(RFMesh.fn_is_valid_revealed, self.bme.edges), wrap_fn=self._wrap_bmedge)
-    def iter_faces(self): yield from self.iter_wrap(filter(RFMesh.fn_is_valid_revealed, self.bme.faces), wrap_fn=self._wrap_bmvert)
+    def iter_faces(self): yield from self.iter_wrap(filter(RFMesh.fn_is_valid_revealed, self.bme.faces), wrap_fn=self._wrap_bmface)
 
     def get_verts(self): return list(self.iter_verts())
     def get_edges(self): return list(self.iter_edges())
@@ -1021,23 +1229,23 @@ class RFMesh():
     def get_face_count(self): return len(self.bme.faces)
 
     # NOTE: self.bme.select_history does _NOT_ work
-    def get_selected_verts(self):   return set(map(self._wrap_bmvert, filter(RFMesh.fn_is_selected_revealed,   self.bme.verts)))
-    def get_selected_edges(self):   return set(map(self._wrap_bmedge, filter(RFMesh.fn_is_selected_revealed,   self.bme.edges)))
-    def get_selected_faces(self):   return set(map(self._wrap_bmface, filter(RFMesh.fn_is_selected_revealed,   self.bme.faces)))
-    def get_unselected_verts(self): return set(map(self._wrap_bmvert, filter(RFMesh.fn_is_unselected_revealed, self.bme.verts)))
-    def get_unselected_edges(self): return set(map(self._wrap_bmedge, filter(RFMesh.fn_is_unselected_revealed, self.bme.edges)))
-    def get_unselected_faces(self): return set(map(self._wrap_bmface, filter(RFMesh.fn_is_unselected_revealed, self.bme.faces)))
-
-    def get_hidden_verts(self):   return set(map(self._wrap_bmvert, filter(RFMesh.fn_is_hidden,   self.bme.verts)))
-    def get_hidden_edges(self):   return set(map(self._wrap_bmedge, filter(RFMesh.fn_is_hidden,   self.bme.edges)))
-    def get_hidden_faces(self):   return set(map(self._wrap_bmface, filter(RFMesh.fn_is_hidden,   self.bme.faces)))
+    def get_selected_verts(self):   return self.get_selection_index().get_view(BMVert, 'selected')
+    def get_selected_edges(self):   return self.get_selection_index().get_view(BMEdge, 'selected')
+    def get_selected_faces(self):   return self.get_selection_index().get_view(BMFace, 'selected')
+    def get_unselected_verts(self): return self.get_selection_index().get_view(BMVert, 'unselected')
+    def get_unselected_edges(self): return self.get_selection_index().get_view(BMEdge, 'unselected')
+    def get_unselected_faces(self): return self.get_selection_index().get_view(BMFace, 'unselected')
+
+    def get_hidden_verts(self):   return self.get_selection_index().get_view(BMVert, 'hidden')
+    def get_hidden_edges(self):   return self.get_selection_index().get_view(BMEdge, 'hidden')
+    def get_hidden_faces(self):   return self.get_selection_index().get_view(BMFace, 'hidden')
     def get_revealed_verts(self): return set(map(self._wrap_bmvert, filter(RFMesh.fn_is_valid_revealed, self.bme.verts)))
     def get_revealed_edges(self): return set(map(self._wrap_bmedge, filter(RFMesh.fn_is_valid_revealed, self.bme.edges)))
     def get_revealed_faces(self): return set(map(self._wrap_bmface, filter(RFMesh.fn_is_valid_revealed, self.bme.faces)))
 
-    def any_verts_selected(self): return any(bmv.select for bmv in self.bme.verts if bmv.is_valid and not bmv.hide)
-    def any_edges_selected(self): return any(bme.select for bme in self.bme.edges if bme.is_valid and not bme.hide)
-    def any_faces_selected(self): return any(bmf.select for bmf in self.bme.faces if bmf.is_valid and not bmf.hide)
+    def any_verts_selected(self): return self.get_selection_index().any(BMVert, 'selected')
+    def any_edges_selected(self): return self.get_selection_index().any(BMEdge, 'selected')
+    def any_faces_selected(self): return self.get_selection_index().any(BMFace, 'selected')
     def any_selected(self):       return self.any_verts_selected() or self.any_edges_selected() or self.any_faces_selected()
 
     def get_selection_center(self):
@@ -1049,16 +1257,19 @@ class RFMesh():
         if c: self.selection_center = v / c
         return self.xform.l2w_point(self.selection_center)
     def get_selection_bbox(self):
-        l2w_point = self.xform.l2w_point
-        coords = [l2w_point(bmv.co) for bmv in self.bme.verts if bmv.is_valid and bmv.select]
+        coords = [tuple(bmv.co) for bmv in self.bme.verts if bmv.is_valid and bmv.select]
         #if not coords: return self.get_bbox()
+        if coords: coords = self.xform.l2w_points(coords).tolist()
         return BBox(from_coords=coords)
 
     def deselect_all(self):
+        index = self._get_current_selection_index()
         for bmv in self.bme.verts: bmv.select = False
         for bme in self.bme.edges: bme.select = False
         for bmf in self.bme.faces: bmf.select = False
+        self.changes.touch_unknown(selection=True)
         self.dirty(selectionOnly=True)
+        if index: index.clear_selected(self.get_version())
 
     def deselect(self, elems, supparts=True, subparts=True):
         if elems is None: return
@@ -1086,6 +1297,8 @@ class RFMesh():
                 selems.update(e for e in elem.edges if not (set(e.verts)&elems))
         selems = selems - elems
         selems = { e for e in selems if e.select }
+        index = self._get_current_selection_index()
+        touched = nelems | selems
         for elem in nelems: elem.select = False
         for elem in selems: elem.select = True
         if subparts:
@@ -1110,7 +1323,10 @@ class RFMesh():
                         nelems.add(bmv)
             for elem in nelems:
                 elem.select = False
+            touched |= nelems
+        self.changes.touch(map(self._unwrap, touched), selection=True)
         self.dirty(selectionOnly=True)
+        self._refresh_selection_index(index, touched)
 
     def select(self, elems, supparts=True, subparts=True, only=True):
         if only: self.deselect_all()
@@ -1129,6 +1345,8 @@ class RFMesh():
                     nelems.update(e for e in elem.verts)
                     nelems.update(e for e in elem.edges)
             elems = nelems
+        index = self._get_current_selection_index()
+        touched = list(elems)
         for elem in elems: elem.select = True
         if supparts:
             for elem in elems:
@@ -1137,40 +1355,52 @@ class RFMesh():
                 for bme in elem.link_edges:
                     if all(bmv.select for bmv in bme.verts):
                         bme.select = True
+                        touched.append(bme)
                 for bmf in elem.link_faces:
                     if all(bmv.select for bmv in bmf.verts):
                         bmf.select = True
+                        touched.append(bmf)
+        self.changes.touch(map(self._unwrap, touched), selection=True)
         self.dirty(selectionOnly=True)
+        self._refresh_selection_index(index, touched)
 
-    def get_quadwalk_edgesequence(self, edge):
-        bme = self._unwrap(edge)
+    def _walk_quadwalk(self, bme):
+        bmes, looped = self.get_loop_index().get('quadwalk', bme) or (None, None)
+        if bmes is not None: return (bmes, looped)
         touched = set()
-        edges = []
+        bmes = []
         def crawl(bme0, bmv01):
-            nonlocal edges
-            if bme0 not in touched: edges.append(bme0)
-            if bmv01 in touched: return True        # wrapped around the loop
-            touched.add(bmv01)
-            touched.add(bme0)
-            if len(bmv01.link_edges) > 4: return False
-            if len(bmv01.link_faces) > 4: return False
-            bmf0 = bme0.link_faces
-            for bme1 in bmv01.link_edges:
-                if any(f in bmf0 for f in bme1.link_faces): continue
-                bmv2 = bme1.other_vert(bmv01)
-                return crawl(bme1, bmv2)
-            return False
-        if not crawl(bme, bme.verts[0]):
+            # returns vert where walk wrapped around, or None if walk hit an end
+            while True:
+                if bme0 not in touched: bmes.append(bme0)
+                if bmv01 in touched: return bmv01       # wrapped around the loop
+                touched.add(bmv01)
+                touched.add(bme0)
+                if len(bmv01.link_edges) > 4: return None
+                if len(bmv01.link_faces) > 4: return None
+                bmf0 = bme0.link_faces
+                bme1 = next((bme1 for bme1 in bmv01.link_edges if not any(f in bmf0 for f in bme1.link_faces)), None)
+                if not bme1: return None
+                bme0, bmv01 = bme1, bme1.other_vert(bmv01)
+        bmv_wrapped, bmv_wrapped_other = crawl(bme, bme.verts[0]), None
+        if bmv_wrapped is None:
             # did not loop back around, so go other direction
-            edges.reverse()
-            crawl(bme, bme.verts[1])
-        return RFEdgeSequence(edges)
+            bmes.reverse()
+            bmv_wrapped_other = crawl(bme, bme.verts[1])
+        # lasso-shaped walks (on either side) depend on where walk started
+        shared = bmv_wrapped in {None, bme.verts[0]} and bmv_wrapped_other is None
+        return self.get_loop_index().add('quadwalk', bme, bmes, bmv_wrapped is not None, shared=shared)
+
+    def get_quadwalk_edgesequence(self, edge):
+        bmes, _ = self._walk_quadwalk(self._unwrap(edge))
+        return RFEdgeSequence(bmes)
 
     def _crawl_quadstrip_next(self, bme0, bmf0):
-        bmes = set(bmf0.edges) - { bme for bmv in bme0.verts for bme in bmv.link_edges }
+        bmv0, bmv1 = bme0.verts
+        bmes = [bme for bme in bmf0.edges if bmv0 not in bme.verts and bmv1 not in bme.verts]
         if len(bmes) != 1: return (None,None)
-        bme1 = bmes.pop()
-        bmf1 = next(iter(set(bme1.link_faces) - { bmf0 }), None)
+        bme1 = bmes[0]
+        bmf1 = next((bmf for bmf in bme1.link_faces if bmf != bmf0), None)
         return (bme1, bmf1)
 
     def _are_edges_flipped(self, bme0, bme1):
@@ -1226,8 +1456,7 @@ class RFMesh():
         return (bme0, flipped, bmf0, True)
 
     def is_quadstrip_looped(self, edge):
-        edge = self._unwrap(edge)
-        _,_,_,looped = self._crawl_quadstrip_to_loopend(edge)
+        _,looped = self._walk_face_loop(self._unwrap(edge))
         return looped
 
     def iter_quadstrip(self, edge):
@@ -1253,6 +1482,13 @@ class RFMesh():
             if self._are_edges_flipped(bme, bme_next): flipped = not flipped
             bme,bmf = bme_next,bmf_next
 
+    def _walk_face_loop(self, bme):
+        bmes, looped = self.get_loop_index().get('face loop', bme) or (None, None)
+        if bmes is not None: return (bmes, looped)
+        _,_,_,looped = self._crawl_quadstrip_to_loopend(bme)
+        bmes = [self._unwrap(e) for e,_ in self.iter_quadstrip(bme)]
+        return self.get_loop_index().add('face loop', bme, bmes, looped, shared=(bme in bmes))
+
     def get_face_loop(self, edge):
         r'''
               +--  this diamond quad causes problems!
@@ -1272,13 +1508,14 @@ class RFMesh():
              \|/
               O
         '''
-        is_looped = self.is_quadstrip_looped(edge)
-        edges = list(bme for bme,_ in self.iter_quadstrip(edge))
-        return (edges, is_looped)
+        bmes, is_looped = self._walk_face_loop(self._unwrap(edge))
+        return ([self._wrap_bmedge(e) for e in bmes], is_looped)
 
-    def get_edge_loop(self, edge):
-        touched = set()
-        edges = [edge]
+    def _walk_edge_loop(self, bme):
+        bmes, looped = self.get_loop_index().get('edge loop', bme) or (None, None)
+        if bmes is not None: return (bmes, looped)
+        touched = {bme}
+        bmes = [bme]
 
         r'''
         description of crawl(bme0, bmv01) below...
@@ -1299,57 +1536,85 @@ class RFMesh():
                pointing in same direction
         '''
         def crawl(bme0, bmv01):
-            nonlocal edges, touched
+            # returns edge where walk wrapped around, or None if walk hit an end
+            rfe0 = self._wrap_bmedge(bme0)
             while True:
-                bme1 = bme0.get_next_edge_in_strip(bmv01)
-                if not bme1:
+                rfe1 = rfe0.get_next_edge_in_strip(bmv01)
+                if not rfe1:
                     # could not find next edge to continue crawling
                     # hit edge of mesh?
-                    return False
+                    return None
+                bme1 = rfe1.bmelem
                 if bme1 in touched:
                     # wrapped around (edge loop)!
-                    # NOTE: should trim off any strip not part of loop?  ex: P-shaped
-                    return True
-                edges.append(bme1)
+                    return bme1
+                bmes.append(bme1)
                 touched.add(bme1)
                 bmv01 = bme1.other_vert(bmv01)
-                bme0 = bme1
-        loop = crawl(edge, edge.verts[0])
-        if not loop:
+                rfe0 = rfe1
+        bme_wrapped, bme_wrapped_other = crawl(bme, bme.verts[0]), None
+        if bme_wrapped is None:
             # edge strip
-            edges.reverse()
-            loop = crawl(edge, edge.verts[1])
-        return (edges, loop)
+            bmes.reverse()
+            bme_wrapped_other = crawl(bme, bme.verts[1])
+        # lasso-shaped walks (P-shaped, on either side) depend on where walk started
+        shared = bme_wrapped in {None, bme} and bme_wrapped_other in {None, bme}
+        return self.get_loop_index().add('edge loop', bme, bmes, bme_wrapped is not None, shared=shared)
 
-    def get_inner_edge_loop(self, edge):
-        # returns edge loop that follows the inside, boundary
-        bme = self._unwrap(edge)
+    def get_edge_loop(self, edge):
+        bmes, looped = self._walk_edge_loop(self._unwrap(edge))
+        return ([self._wrap_bmedge(e) for e in bmes], looped)
+
+    def _walk_inner_edge_loop(self, bme):
+        bmes, looped = self.get_loop_index().get('inner loop', bme) or (None, None)
+        if bmes is not None: return (bmes, looped)
         if len(bme.link_faces) != 1: return ([], False)
         touched = set()
-        edges = []
+        bmes = []
         def crawl(bme0, bmv01):
-            nonlocal edges
-            if bme0 not in touched: edges.append(self._wrap_bmedge(bme0))
-            if bmv01 in touched: return True
-            touched.add(bmv01)
-            touched.add(bme0)
-            bmf0 = bme0.link_faces
-            for bme1 in bmv01.link_edges:
-                if bme1 == bme0: continue
-                if len(bme1.link_faces) != 1: continue
-                if any(f in bmf0 for f in bme1.link_faces): continue
-                bmv2 = bme1.other_vert(bmv01)
-                return crawl(bme1, bmv2)
-            return False
-        if crawl(bme, bme.verts[0]): return (edges, True)
-        edges.reverse()
-        crawl(bme, bme.verts[1])
-        return (edges, False)
+            # returns vert where walk wrapped around, or None if walk hit an end
+            while True:
+                if bme0 not in touched: bmes.append(bme0)
+                if bmv01 in touched: return bmv01
+                touched.add(bmv01)
+                touched.add(bme0)
+                bmf0 = bme0.link_faces
+                bme1 = next((
+                    bme1 for bme1 in bmv01.link_edges
+                    if bme1 != bme0 and len(bme1.link_faces) == 1 and not any(f in bmf0 for f in bme1.link_faces)
+                ), None)
+                if not bme1: return None
+                bme0, bmv01 = bme1, bme1.other_vert(bmv01)
+        bmv_wrapped, bmv_wrapped_other = crawl(bme, bme.verts[0]), None
+        if bmv_wrapped is None:
+            bmes.reverse()
+            bmv_wrapped_other = crawl(bme, bme.verts[1])
+        # lasso-shaped walks (on either side) depend on where walk started
+        shared = bmv_wrapped in {None, bme.verts[0]} and bmv_wrapped_other is None
+        return self.get_loop_index().add('inner loop', bme, bmes, bmv_wrapped is not None, shared=shared)
+
+    def get_inner_edge_loop(self, edge):
+        # returns edge loop that follows the inside, boundary
+        bmes, looped = self._walk_inner_edge_loop(self._unwrap(edge))
+        return ([self._wrap_bmedge(e) for e in bmes], looped)
+
+    def get_edge_loop_id(self, edge):
+        ''' id shared by all edges on the edge loop of edge (valid until mesh changes) '''
+        bme = self._unwrap(edge)
+        self._walk_edge_loop(bme)
+        return self.get_loop_index().get_id('edge loop', bme)
+
+    def get_edge_ring_id(self, edge):
+        ''' id shared by all edges on the face loop (quad strip) of edge (valid until mesh changes) '''
+        bme = self._unwrap(edge)
+        self._walk_face_loop(bme)
+        return self.get_loop_index().get_id('face loop', bme)
 
     def select_all(self):
         for bmv in self.bme.verts: bmv.select = True
         for bme in self.bme.edges: bme.select = True
         for bmf in self.bme.faces: bmf.select = True
+        self.changes.touch_unknown(selection=True)
         self.dirty(selectionOnly=True)
 
     def select_toggle(self):
@@ -1367,6 +1632,7 @@ class RFMesh():
             for bmv in self.bme.verts: bmv.select = not bmv.select
             for bme in self.bme.edges: bme.select = not bme.select
             for bmf in self.bme.faces: bmf.select = not bmf.select
+        self.changes.touch_unknown(selection=True)
         self.dirty()
 
     def select_linked(self, *, select=True, connected_to=None):
@@ -1379,28 +1645,42 @@ class RFMesh():
             working = { connected_to }
         else:
             assert False, f'Unhandled type of connected_to: {connected_to}'
-        pworking, working = working, set()
-        for e in pworking:
-            if isinstance(e, RFVert) or isinstance(e, BMVert):
-                working.add(e)
-            else:
-                for v in e.verts:
-                    working.add(v)
-        linked_verts = set(working)
-        while working:
-            bmv = working.pop()
-            for bme in bmv.link_edges:
-                bmvo = bme.other_vert(bmv)
-                if bmvo in linked_verts: continue
-                working.add(bmvo)
-                linked_verts.add(bmvo)
-        for bmv in linked_verts:
-            bmv.select = select
-            for bme in bmv.link_edges:
-                bme.select = select
-            for bmf in bmv.link_faces:
-                bmf.select = select
-        self.dirty()
+        bmverts, edges, faces, labels = self.get_topology()
+        seeds = set()
+        for e in working:
+            e = self._unwrap(e)
+            seeds.update([e] if isinstance(e, BMVert) else e.verts)
+        if not seeds: return
+        seeds = np.fromiter((bmv.index for bmv in seeds), dtype=np.int64, count=len(seeds))
+        linked = np.isin(labels, labels[seeds])
+        # all verts of an edge or face are in the same component, so checking one vert is enough
+        for i in np.flatnonzero(linked).tolist(): bmverts[i].select = select
+        bmedges, bmfaces = self.bme.edges, self.bme.faces
+        bmedges.ensure_lookup_table()
+        bmfaces.ensure_lookup_table()
+        for i in np.flatnonzero(linked[edges[:,0]]).tolist(): bmedges[i].select = select
+        for i in np.flatnonzero(linked[faces]).tolist(): bmfaces[i].select = select
+        self.changes.touch_unknown(selection=True)
+        self.dirty(selectionOnly=True)
+
+    def get_edge_components(self, edges):
+        ''' groups edges into lists of edges that are connected through shared verts '''
+        bmes = [self._unwrap(e) for e in edges]
+        if not bmes: return []
+        indices = {}
+        pairs = np.array([[indices.setdefault(bmv, len(indices)) for bmv in bme.verts] for bme in bmes], dtype=np.int64)
+        labels = label_components(len(indices), pairs)[pairs[:,0]]
+        return [[self._wrap_bmedge(bmes[i]) for i in group.tolist()] for group in group_labels(labels)]
+
+    def get_face_components(self, faces):
+        ''' groups faces into lists of faces that are connected through shared verts '''
+        bmfs = [self._unwrap(f) for f in faces]
+        if not bmfs: return []
+        indices = {}
+        face_verts = [[indices.setdefault(bmv, len(indices)) for bmv in bmf.verts] for bmf in bmfs]
+        pairs = [(fv[0], i) for fv in face_verts for i in fv[1:]]
+        labels = label_components(len(indices), pairs)[[fv[0] for fv in face_verts]]
+        return [[self._wrap_bmface(bmfs[i]) for i in group.tolist()] for group in group_labels(labels)]
 
 
 class RFSource(RFMesh):
@@ -1564,6 +1844,7 @@ class RFTarget(RFMesh):
             if self.mirror_mod.x and bmv.co.x < -threshold: bmv.select = True
             if self.mirror_mod.y and bmv.co.y >  threshold: bmv.select = True
             if self.mirror_mod.z and bmv.co.z < -threshold: bmv.select = True
+        self.changes.touch_unknown(selection=True)
 
     def snap_to_symmetry(self, point, symmetry, from_world=True, to_world=True):
         if not symmetry and from_world == to_world: return point
@@ -1606,6 +1887,70 @@ class RFTarget(RFMesh):
         if to_world: point = self.xform.l2w_point(point)
         return point
 
+    @profiler.function
+    def set_verts_co(self, verts, coords, *, normals=None):
+        '''
+        bulk version of setting RFVert.co (and RFVert.normal) for many verts, where
+        coords and normals are in world space.  follows the same rules as RFVert.co
+        (skips NaN, pinned, and seam verts; clamps to symmetry), but options, pin
+        layer, and transforms are resolved once for the whole batch.
+        returns list of verts whose co was written.
+        '''
+        verts = list(verts)
+        if not verts: return []
+        count = len(verts)
+        bmverts = [self._unwrap(v) for v in verts]
+        co = np.array([tuple(c) for c in coords], dtype=np.float64).reshape((-1, 3))
+        assert len(co) == count, f'set_verts_co: {count} verts but {len(co)} coords'
+
+        # world to local
+        if not self.xform.is_identity:
+            imx = np.array(self.xform.imx_p)
+            co = (co @ imx[:3,:3].T + imx[:3,3]) / (co @ imx[3,:3] + imx[3,3])[:,None]
+
+        # which verts can be written?
+        check_pin  = options['show pinned'] and options['pin enabled']
+        check_seam = options['show seam']   and options['pin seam']
+        layer_pin = self.layer_pin if check_pin else None
+        def is_writable(bmv):
+            if not bmv.is_valid: return False
+            if check_pin  and bmv[layer_pin]: return False
+            if check_seam and any(bme.seam for bme in bmv.link_edges): return False
+            return True
+        writable = np.fromiter(map(is_writable, bmverts), dtype=bool, count=count)
+        writable &= ~np.isnan(co).any(axis=1)
+
+        # clamp to symmetry, but only for verts near symmetry planes
+        mm = self.mirror_mod
+        if mm.x or mm.y or mm.z:
+            threshold = mm.symmetry_threshold * self.unit_scaling_factor / 2.0
+            clamp = np.zeros(count, dtype=bool)
+            if mm.x: clamp |= co[:,0] <= threshold
+            if mm.y: clamp |= co[:,1] >= threshold
+            if mm.z: clamp |= co[:,2] <= threshold
+            for i in np.nonzero(clamp & writable)[0]:
+                co[i] = self.symmetry_real(Point(co[i]), from_world=False, to_world=False)
+
+        co = co.tolist()
+        written = []
+        for i in np.nonzero(writable)[0].tolist():
+            bmverts[i].co = co[i]
+            written.append(verts[i])
+        self.changes.touch(bmverts)
+
+        if normals is not None:
+            no = np.array([tuple(n) for n in normals], dtype=np.float64).reshape((-1, 3))
+            assert len(no) == count, f'set_verts_co: {count} verts but {len(no)} normals'
+            if not self.xform.is_identity:
+                no = no @ np.array(self.xform.imx_n.to_3x3()).T
+            length = np.linalg.norm(no, axis=1)
+            length[length == 0] = 1
+            no = (no / length[:,None]).tolist()
+            for bmv, n in zip(bmverts, no):
+                if bmv.is_valid: bmv.normal = n
+
+        return written
+
     def __deepcopy__(self, memo):
         '''
         custom deepcopy method, because BMesh and BVHTree are not copyable
@@ -1632,6 +1977,19 @@ class RFTarget(RFMesh):
         data['faces'] = [list(bmv.index for bmv in bmf.verts) for bmf in self.bme.faces]
         return data
 
+    def to_arrays(self):
+        '''
+        compact version of to_json, returning NumPy arrays:
+        (verts co as float32 (n,3), edges as uint32 (m,2), face sizes, flattened face vert indices, symmetry)
+        '''
+        bmverts, bmedges, bmfaces = self.bme.verts, self.bme.edges, self.bme.faces
+        bmverts.index_update()
+        verts = np.fromiter((c for bmv in bmverts for c in bmv.co), dtype=np.float32, count=3*len(bmverts)).reshape((-1, 3))
+        edges = np.fromiter((bmv.index for bme in bmedges for bmv in bme.verts), dtype=np.uint32, count=2*len(bmedges)).reshape((-1, 2))
+        face_sizes = np.fromiter((len(bmf.verts) for bmf in bmfaces), dtype=np.uint32, count=len(bmfaces))
+        face_verts = np.fromiter((bmv.index for bmf in bmfaces for bmv in bmf.verts), dtype=np.uint32, count=int(face_sizes.sum()))
+        return (verts, edges, face_sizes, face_verts, ''.join(sorted(self.mirror_mod.xyz)))
+
     def rewrap(self):
         BMElemWrapper.wrap(self)
 
@@ -1642,6 +2000,7 @@ class RFTarget(RFMesh):
         self.restore_state()
 
 
+    @frametimer.function('target write-back')
     def clean(self):
         super().clean()
 
@@ -1698,6 +2057,7 @@ class RFTarget(RFMesh):
         if self.mirror_mod.x: out += apply_mirror_and_return_geom('X')
         if self.mirror_mod.y: out += apply_mirror_and_return_geom('Y')
         if self.mirror_mod.z: out += apply_mirror_and_return_geom('Z')
+        self.changes.touch_unknown()
         self.mirror_mod.x = False
         self.mirror_mod.y = False
         self.mirror_mod.z = False
@@ -1720,6 +2080,7 @@ class RFTarget(RFMesh):
             if self.mirror_mod.z and bmv.co.z < 0:
                 bmv.co.z = -bmv.co.z
                 bmv.normal.z = -bmv.normal.z
+        self.changes.touch_unknown()
 
     def new_vert(self, co, norm):
         # assuming co and norm are in world space!
@@ -1735,6 +2096,7 @@ class RFTarget(RFMesh):
             return None
         verts = [self._unwrap(v) for v in verts]
         bme = self.bme.edges.new(verts)
+        self.changes.touch((bme,))
         return self._wrap_bmedge(bme)
 
     def new_face(self, verts):
@@ -1753,6 +2115,8 @@ class RFTarget(RFMesh):
         nverts = deduplicate_list(verts)
         if len(nverts) < 3: return None
         bmf = self.bme.faces.new(nverts)
+        # faces.new creates any missing edges, too
+        self.changes.touch(chain((bmf,), bmf.edges))
         self.update_face_normal(bmf)
         return self._wrap_bmface(bmf)
 
@@ -1782,6 +2146,7 @@ class RFTarget(RFMesh):
             norm = bmv2.normal
 
         # Use bmesh ops to merge the verts
+        self.changes.touch_unknown()
         pointmerge(
             self.bme,
             verts=[bmv1, bmv2],
@@ -1798,6 +2163,7 @@ class RFTarget(RFMesh):
     def holes_fill(self, edges, sides):
         edges = list(map(self._unwrap, edges))
         ret = holes_fill(self.bme, edges=edges, sides=sides)
+        self.changes.touch_unknown()
         print('RetopoFlow holes_fill', ret)
 
 
@@ -1807,6 +2173,7 @@ class RFTarget(RFMesh):
         if not co or not norm: return None
         bmvs = [self._unwrap(v) for v in rfvs]
         pointmerge(self.bme, verts=bmvs)
+        self.changes.touch_unknown()
         rfv = self._wrap_bmvert(bmvs[0])
         rfv.co = co
         rfv.normal = norm
@@ -1861,11 +2228,14 @@ class RFTarget(RFMesh):
 
     def delete_verts(self, verts):
         for bmv in map(self._unwrap, verts):
-            if bmv.is_valid and not bmv.hide: self.bme.verts.remove(bmv)
+            if not bmv.is_valid or bmv.hide: continue
+            self.changes.touch(chain([bmv], bmv.link_edges, bmv.link_faces))
+            self.bme.verts.remove(bmv)
 
     def delete_edges(self, edges, del_empty_verts=True):
         edges = { self._unwrap(e) for e in edges if e.is_valid and not e.hide }
         verts = { v for e in edges for v in e.verts }
+        self.changes.touch(chain(edges, verts, (bmf for bme in edges for bmf in bme.link_faces)))
         for bme in edges: self.bme.edges.remove(bme)
         if del_empty_verts:
             for bmv in verts:
@@ -1875,6 +2245,7 @@ class RFTarget(RFMesh):
         faces = { self._unwrap(f) for f in faces if f.is_valid and not f.hide }
         edges = { e for f in faces for e in f.edges }
         verts = { v for f in faces for v in f.verts }
+        self.changes.touch(chain(faces, edges, verts))
         for bmf in faces: self.bme.faces.remove(bmf)
         if del_empty_edges:
             for bme in edges:
@@ -1886,14 +2257,17 @@ class RFTarget(RFMesh):
     def dissolve_verts(self, verts, use_face_split=False, use_boundary_tear=False):
         verts = [ self._unwrap(v) for v in verts if v.is_valid and not v.hide ]
         dissolve_verts(self.bme, verts=verts, use_face_split=use_face_split, use_boundary_tear=use_boundary_tear)
+        self.changes.touch_unknown()
 
     def dissolve_edges(self, edges, use_verts=True, use_face_split=False):
         edges = [ self._unwrap(e) for e in edges if e.is_valid and not e.hide ]
         dissolve_edges(self.bme, edges=edges, use_verts=use_verts, use_face_split=use_face_split)
+        self.changes.touch_unknown()
 
     def dissolve_faces(self, faces, use_verts=True):
         faces = [ self._unwrap(f) for f in faces if f.is_valid and not f.hide ]
         dissolve_faces(self.bme, faces=faces, use_verts=use_verts)
+        self.changes.touch_unknown()
 
     def update_verts_faces(self, verts):
         faces = { f for v in verts if v.is_valid for f in self._unwrap(v).link_faces }
@@ -1924,6 +2298,7 @@ class RFTarget(RFMesh):
                 if bme0.other_vert(bmv) == bme1.other_vert(bmv):
                     lbme_dup.append((bme0,bme1))
         mapping = {}
+        if lbme_dup: self.changes.touch(chain(lbme, (bmf for bme in lbme for bmf in bme.link_faces)))
         for bme0,bme1 in lbme_dup:
             if not bme0.is_valid or not bme1.is_valid: continue
             l0,l1 = len(bme0.link_faces), len(bme1.link_faces)
@@ -1973,29 +2348,6 @@ class RFTarget(RFMesh):
                 if check: break
         return mapping
 
-    def snap_verts_filter(self, nearest, fn_filter):
-        '''
-        snap verts when fn_filter returns True
-        '''
-        for rfv in self.iter_verts():
-            if not fn_filter(rfv): continue
-            xyz,norm,_,_ = nearest(rfv.co)
-            rfv.co = xyz
-            rfv.normal = norm
-        self.dirty()
-
-#    def snap_all_verts(self, nearest):
-#        self.snap_verts_filter(nearest, lambda _: True)
-
-    def snap_all_nonhidden_verts(self, nearest):
-        self.snap_verts_filter(nearest, lambda v: not v.hide)
-
-    def snap_selected_verts(self, nearest):
-        self.snap_verts_filter(nearest, lambda v: v.select)
-
-#     def snap_unselected_verts(self, nearest):
-#         self.snap_verts_filter(nearest, lambda v: v.unselect)
-
     def pin_selected(self):
         for v in self.iter_verts():
             if v.select: v.pinned = True
@@ -2016,15 +2368,65 @@ class RFTarget(RFMesh):
     def remove_all_doubles(self, dist):
         bmv = [v for v in self.bme.verts if not v.hide]
         remove_doubles(self.bme, verts=bmv, dist=dist)
+        self.changes.touch_unknown()
         self.dirty()
 
     def remove_selected_doubles(self, dist):
         remove_doubles(self.bme, verts=[bmv for bmv in self.bme.verts if bmv.select], dist=dist)
+        self.changes.touch_unknown()
         self.dirty()
 
-    def remove_by_distance(self, verts, dist):
-        remove_doubles(self.bme, verts=[self._unwrap(v) for v in verts], dist=dist)
+    def remove_by_distance(self, verts, dist, *, clamp_to_symmetry=False):
+        '''
+        welds verts within dist (local space) of each other using a spatial hash (see compute_weld_map).
+        if clamp_to_symmetry, verts near an enabled symmetry plane are moved onto it first, so they weld on the plane
+        '''
+        bmverts = [bmv for bmv in map(self._unwrap, verts) if bmv.is_valid]
+        if not bmverts: return []
+        co = np.array([tuple(bmv.co) for bmv in bmverts], dtype=np.float64)
+        clamp_axes, clamp_dist = (), 0.0
+        if clamp_to_symmetry:
+            mm = self.mirror_mod
+            clamp_axes = [axis for (axis, enabled) in enumerate((mm.x, mm.y, mm.z)) if enabled]
+            clamp_dist = mm.symmetry_threshold * self.unit_scaling_factor / 2.0
+        merge_map, clamped = compute_weld_map(co, dist, clamp_axes=clamp_axes, clamp_dist=clamp_dist)
+        for i in np.flatnonzero(np.any(clamped != co, axis=1)).tolist():
+            bmverts[i].co = clamped[i].tolist()
+            self.changes.touch((bmverts[i],))
+        welded = self.weld_verts({ bmverts[i]: bmverts[j] for (i, j) in enumerate(merge_map.tolist()) if i != j })
+        self.dirty()
+        return welded
+
+    def weld_verts(self, mapping, *, split_shared_faces=False):
+        '''
+        merges each vert (key) of mapping into the vert it maps to (value) with a single bmesh pass.
+        mapping must not have chains (see compute_weld_map).  returns list of merged-into verts
+        if split_shared_faces, faces shared by a pair of verts that are not connected by an edge are
+        first split between the two verts (as RFVert.merge_robust does), so welding collapses the new
+        edge rather than pinching the faces
+        '''
+        targetmap = {
+            bmv0: bmv1
+            for (bmv0, bmv1) in ((self._unwrap(v0), self._unwrap(v1)) for (v0, v1) in mapping.items())
+            if bmv0.is_valid and bmv1.is_valid and bmv0 != bmv1
+        }
+        if not targetmap: return []
+        if split_shared_faces:
+            for (bmv0, bmv1) in targetmap.items():
+                if any(bmv1 in bme.verts for bme in bmv0.link_edges): continue
+                for bmf in [bmf for bmf in bmv0.link_faces if bmv1 in bmf.verts]:
+                    face_split(bmf, bmv0, bmv1)
+        # edges and faces of welded verts get new verts (or are removed), so record both ends
+        welded = set(chain(targetmap.keys(), targetmap.values()))
+        self.changes.touch(chain(welded, (bme for bmv in welded for bme in bmv.link_edges), (bmf for bmv in welded for bmf in bmv.link_faces)))
+        weld_verts(self.bme, targetmap=targetmap)
+        bmverts = [bmv for bmv in set(targetmap.values()) if bmv.is_valid]
+        for bmv in bmverts:
+            self.remove_duplicate_bmfaces(bmv)
+            self.clean_duplicate_bmedges(bmv)
+        self.changes.touch(chain((bme for bmv in bmverts for bme in bmv.link_edges), (bmf for bmv in bmverts for bmf in bmv.link_faces)))
         self.dirty()
+        return [self._wrap_bmvert(bmv) for bmv in bmverts]
 
     def flip_face_normals(self):
         verts = set()
@@ -2034,6 +2436,7 @@ class RFTarget(RFMesh):
         for bmv in verts:
             if not bmv.is_wire:
                 bmv.normal_update()
+        self.changes.touch(verts)
         self.dirty()
 
     def recalculate_face_normals(self, *, verts=None, faces=None):
@@ -2041,5 +2444,7 @@ class RFTarget(RFMesh):
         else:             faces = { self._unwrap(bmf) for bmf in faces }
         if verts:         faces |= { self._unwrap(bmf) for bmv in verts for bmf in bmv.link_faces}
         recalc_face_normals(self.bme, faces=list(faces))
-        for bmv in (bmv for bmf in faces for bmv in bmf.verts): bmv.normal_update()
+        verts = { bmv for bmf in faces for bmv in bmf.verts }
+        for bmv in verts: bmv.normal_update()
+        self.changes.touch(verts)
         self.dirty()
@@ -47,7 +47,7 @@ from ...addon_common.common.debug import dprint, Debugger
 from ...addon_common.common.decorators import stats_wrapper
 from ...addon_common.common.globals import Globals
 from ...addon_common.common.hasher import hash_object, hash_bmesh
-from ...addon_common.common.profiler import profiler
+from ...addon_common.common.profiler import profiler, frametimer
 from ...addon_common.common.maths import (
     Point, Direction, Normal, Frame,
     Point2D, Vec2D, Direction2D,
@@ -395,7 +395,8 @@ class RFMeshRender():
             # )
             # make not dirty first in case bad things happen while drawing
             self.rfmesh_version = ver
-            self._gather_data()
+            with frametimer.phase('render gather'):
+                self._gather_data()
         except:
             Debugger.print_exception()
             profiler.add_note('--> exception')
@@ -20,6 +20,8 @@ Created by Jonathan Denning, Jonathan Williamson
 '''
 
 import math
+from operator import attrgetter
+from types import GetSetDescriptorType, MemberDescriptorType
 
 import bmesh
 from bmesh.types import BMesh, BMVert, BMEdge, BMFace
@@ -47,10 +49,15 @@ from ...config.options import options
 BMElemWrapper wraps BMverts, BMEdges, BMFaces to automagically handle
 world-to-local and local-to-world transformations.
 
-Must override any property that can be set (TODO: find more elegant
-way to handle this!) and function that returns a BMVert, BMEdge, or
-BMFace.  All functions and read-only properties are handled with
-__getattr__().
+Must override any property that needs transforming and function that
+returns a BMVert, BMEdge, or BMFace.  All other functions and properties
+of the BMesh type are forwarded by properties generated when the module
+is loaded (see _generate_forwarding_properties), with __getattr__() as
+fallback.
+
+Wrappers are pooled per class (keyed by BMesh element), so wrapping the
+same element twice returns the same wrapper.  Pools are reset whenever a
+target is (re)wrapped.
 
 user-writable properties:
 
@@ -59,29 +66,48 @@ user-writable properties:
     BMFace: material_index, normal, smooth
     common: hide, index. select, tag
 
-NOTE: RFVert, RFEdge, RFFace do NOT mark RFMesh as dirty!
+NOTE: RFVert, RFEdge, RFFace do NOT mark RFMesh as dirty!  but setters (except
+index and tag) do record the changed element in rftarget.changes
 '''
 
 
 class BMElemWrapper:
+    __slots__ = ('bmelem',)
+
+    _cache = {}
+    _cache_limit = 1_000_000    # cleared when larger than this, to not hold onto too many removed elements
+
     @staticmethod
     def wrap(rftarget):
         BMElemWrapper.rftarget = rftarget
         BMElemWrapper.xform = rftarget.xform
-        BMElemWrapper.l2w_point = rftarget.xform.l2w_point
-        BMElemWrapper.w2l_point = rftarget.xform.w2l_point
-        BMElemWrapper.l2w_normal = rftarget.xform.l2w_normal
-        BMElemWrapper.w2l_normal = rftarget.xform.w2l_normal
+        if rftarget.xform.is_identity:
+            # local space is world space, but still return copies
+            BMElemWrapper.l2w_point = BMElemWrapper.w2l_point = Point
+            BMElemWrapper.l2w_normal = BMElemWrapper.w2l_normal = Normal
+        else:
+            BMElemWrapper.l2w_point = rftarget.xform.l2w_point
+            BMElemWrapper.w2l_point = rftarget.xform.w2l_point
+            BMElemWrapper.l2w_normal = rftarget.xform.l2w_normal
+            BMElemWrapper.w2l_normal = rftarget.xform.w2l_normal
         BMElemWrapper.symmetry_real = rftarget.symmetry_real
         BMElemWrapper.mirror_mod = rftarget.mirror_mod
+        RFVert._cache, RFEdge._cache, RFFace._cache = {}, {}, {}
 
     @staticmethod
     def _unwrap(bmelem):
         try:    return bmelem.bmelem
         except: return bmelem
 
-    def __init__(self, bmelem):
-        self.bmelem = bmelem
+    def __new__(cls, bmelem):
+        cache = cls._cache
+        wrapper = cache.get(bmelem)
+        if wrapper is None:
+            if len(cache) > cls._cache_limit: cache.clear()
+            wrapper = object.__new__(cls)
+            wrapper.bmelem = bmelem
+            cache[bmelem] = wrapper
+        return wrapper
 
     def __repr__(self) -> str:
         return f'<{"" if self.is_valid else "XXX_"}{type(self).__name__}: {repr(self.bmelem)}>'
@@ -113,6 +139,7 @@ class BMElemWrapper:
     @hide.setter
     def hide(self, v) -> None:
         self.bmelem.hide = v
+        self.rftarget.changes.touch((self.bmelem,))
 
     @property
     def index(self) -> int:
@@ -129,6 +156,7 @@ class BMElemWrapper:
     @select.setter
     def select(self, v) -> None:
         self.bmelem.select = v
+        self.rftarget.changes.touch((self.bmelem,), selection=True)
 
     @property
     def unselect(self) -> bool:
@@ -143,12 +171,15 @@ class BMElemWrapper:
         self.bmelem.tag = v
 
     def __getattr__(self, k):
-        if k in self.__dict__:
-            return getattr(self, k)
+        # only called when k is not found on wrapper (see _generate_forwarding_properties)
+        if k == 'bmelem': raise AttributeError(k)
         return getattr(self.bmelem, k)
 
 
 class RFVert(BMElemWrapper):
+    __slots__ = ()
+    _cache = {}
+
     @staticmethod
     def get_link_edges(rfverts):
         return { RFEdge(bme) for bmv in rfverts for bme in bmv.bmelem.link_edges }
@@ -179,6 +210,7 @@ class RFVert(BMElemWrapper):
         #     if nx or ny or nz:
         #         co = rft.snap_to_symmetry(co, mm._symmetry, to_world=False, from_world=False)
         self.bmelem.co = co
+        self.rftarget.changes.touch((self.bmelem,))
 
     @property
     def pinned(self):
@@ -186,6 +218,7 @@ class RFVert(BMElemWrapper):
     @pinned.setter
     def pinned(self, v):
         self.bmelem[self.rftarget.layer_pin] = 1 if bool(v) else 0
+        self.rftarget.changes.touch((self.bmelem,))
 
     @property
     def seam(self):
@@ -198,6 +231,7 @@ class RFVert(BMElemWrapper):
     @normal.setter
     def normal(self, norm):
         self.bmelem.normal = self.w2l_normal(norm)
+        self.rftarget.changes.touch((self.bmelem,))
 
     @property
     def co_normal(self):
@@ -263,6 +297,7 @@ class RFVert(BMElemWrapper):
         if not (self.is_valid and f and f.is_valid): return None
         bmv = BMElemWrapper._unwrap(self)
         bmf = BMElemWrapper._unwrap(f)
+        self.rftarget.changes.touch_unknown()
         new_bmv = face_vert_separate(bmf, bmv)
         return RFVert(new_bmv)
 
@@ -275,6 +310,7 @@ class RFVert(BMElemWrapper):
         try:
             bmv0 = BMElemWrapper._unwrap(self)
             bmv1 = BMElemWrapper._unwrap(other)
+            self.rftarget.changes.touch_unknown()
             vert_splice(bmv1, bmv0)
             return RFVert(bmv0)
         except Exception as e:
@@ -320,6 +356,7 @@ class RFVert(BMElemWrapper):
 
     def dissolve(self):
         bmv = BMElemWrapper._unwrap(self)
+        self.rftarget.changes.touch_unknown()
         vert_dissolve(bmv)
 
     def compute_normal(self):
@@ -327,6 +364,9 @@ class RFVert(BMElemWrapper):
 
 
 class RFEdge(BMElemWrapper):
+    __slots__ = ()
+    _cache = {}
+
     @staticmethod
     def get_verts(rfedges):
         bmvs = { bmv for bme in rfedges for bmv in bme.bmelem.verts }
@@ -339,6 +379,7 @@ class RFEdge(BMElemWrapper):
     @seam.setter
     def seam(self, v):
         self.bmelem.seam = v
+        self.rftarget.changes.touch((self.bmelem,))
 
     @property
     def smooth(self):
@@ -347,6 +388,7 @@ class RFEdge(BMElemWrapper):
     @smooth.setter
     def smooth(self, v):
         self.bmelem.smooth = v
+        self.rftarget.changes.touch((self.bmelem,))
 
     def first_vert(self):
         return RFVert(self.bmelem.verts[0])
@@ -534,12 +576,14 @@ class RFEdge(BMElemWrapper):
     def split(self, vert=None, fac=0.5):
         bme = BMElemWrapper._unwrap(self)
         bmv = BMElemWrapper._unwrap(vert) or bme.verts[0]
+        self.rftarget.changes.touch_unknown()
         bme_new, bmv_new = edge_split(bme, bmv, fac)
         return RFEdge(bme_new), RFVert(bmv_new)
 
     def collapse(self):
         bme = BMElemWrapper._unwrap(self)
         bmv0, bmv1 = bme.verts
+        self.rftarget.changes.touch_unknown()
         del_faces = [f for f in bme.link_faces if len(f.verts) == 3]
         for bmf in del_faces:
             self.rftarget.bme.faces.remove(bmf)
@@ -559,6 +603,9 @@ class RFEdge(BMElemWrapper):
 
 
 class RFFace(BMElemWrapper):
+    __slots__ = ()
+    _cache = {}
+
     @staticmethod
     def get_verts(rffaces):
         bmvs = { bmv for bmf in rffaces for bmv in bmf.bmelem.verts }
@@ -571,6 +618,7 @@ class RFFace(BMElemWrapper):
     @material_index.setter
     def material_index(self, v):
         self.bmelem.material_index = v
+        self.rftarget.changes.touch((self.bmelem,))
 
     @property
     def normal(self):
@@ -579,6 +627,7 @@ class RFFace(BMElemWrapper):
     @normal.setter
     def normal(self, v):
         self.bmelem.normal = self.w2l_normal(v)
+        self.rftarget.changes.touch((self.bmelem,))
 
     @property
     def smooth(self):
@@ -587,6 +636,7 @@ class RFFace(BMElemWrapper):
     @smooth.setter
     def smooth(self, v):
         self.bmelem.smooth = v
+        self.rftarget.changes.touch((self.bmelem,))
 
     @property
     def edges(self):
@@ -730,6 +780,7 @@ class RFFace(BMElemWrapper):
         verts0, verts1 = list(self.bmelem.verts), list(other.bmelem.verts)
         l = len(verts0)
         assert l == len(verts1), 'RFFaces must have same vert count'
+        self.rftarget.changes.touch_unknown()
         self.rftarget.bme.faces.remove(self._unwrap(other))
         offset = min(range(l), key=lambda i: (
             verts1[i].co - verts0[0].co).length)
@@ -758,6 +809,7 @@ class RFFace(BMElemWrapper):
         bmva = BMElemWrapper._unwrap(vert_a)
         bmvb = BMElemWrapper._unwrap(vert_b)
         coords = [BMElemWrapper.w2l_point(c) for c in coords]
+        self.rftarget.changes.touch_unknown()
         bmf_new, bml_new = face_split(bmf, bmva, bmvb, coords=coords)
         return RFFace(bmf_new)
 
@@ -811,6 +863,30 @@ class RFFace(BMElemWrapper):
         return ret
 
 
+def _generate_forwarding_properties(cls, bmtype):
+    '''
+    adds a property to cls for each public attribute of bmtype that cls does not override,
+    so accessing them does not go through the (much slower) __getattr__.
+    setters record the change (ex: smooth, material_index), like the overridden setters do
+    '''
+    for name in dir(bmtype):
+        if name.startswith('_'): continue
+        if any(name in c.__dict__ for c in cls.__mro__): continue
+        getter = attrgetter(f'bmelem.{name}')
+        if isinstance(getattr(bmtype, name), (GetSetDescriptorType, MemberDescriptorType)):
+            def setter(self, v, name=name):
+                setattr(self.bmelem, name, v)
+                self.rftarget.changes.touch((self.bmelem,))
+            setattr(cls, name, property(getter, setter))
+        else:
+            # methods: returns method bound to BMesh element
+            setattr(cls, name, property(getter))
+
+_generate_forwarding_properties(RFVert, BMVert)
+_generate_forwarding_properties(RFEdge, BMEdge)
+_generate_forwarding_properties(RFFace, BMFace)
+
+
 class RFEdgeSequence:
     def __init__(self, sequence):
         if not sequence:
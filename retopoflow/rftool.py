@@ -19,6 +19,7 @@ Created by Jonathan Denning, Jonathan Williamson, and Patrick Moore
     along with this program.  If not, see <http://www.gnu.org/licenses/>.
 '''
 
+from collections import Counter
 from functools import wraps
 
 from ..addon_common.common.blender import BlenderIcon, tag_redraw_all
@@ -93,6 +94,16 @@ class RFTool:
         'not while navigating', # delay calling until after navigating
     }
 
+    # inputs that change callbacks can depend on (see depends_on)
+    _inputs = {
+        'geometry',             # rftarget geometry (ignores selection-only changes)
+        'selection',            # rftarget selection (also changes whenever geometry changes)
+        'view',                 # view
+    }
+
+    # events where callbacks with declared inputs are skipped if their inputs have not changed
+    _change_events = {'target change', 'view change'}
+
     @staticmethod
     def on_init(fn): return rftool_callback_decorator('init', fn)
     @staticmethod
@@ -124,6 +135,19 @@ class RFTool:
             return fn
         return wrapper
 
+    @staticmethod
+    def depends_on(*inputs):
+        '''
+        declares which inputs a callback depends on.  on target / view change, the callback is
+        skipped when none of its inputs changed since it was last called.
+        note: must be above any wrapping decorators (once_per_frame, not_while_navigating, etc.)
+        '''
+        assert inputs and not (unknown := set(inputs) - RFTool._inputs), f'Unhandled depends_on {unknown or inputs}'
+        def wrapper(fn):
+            fn._rftool_depends = tuple(sorted(inputs))
+            return fn
+        return wrapper
+
     @staticmethod
     def once_per_frame(fn):
         name, count = fn.__name__, None
@@ -158,11 +182,48 @@ class RFTool:
             mode: [fn for (modes, fn) in rftool_fns if mode in modes]
             for mode in self._events
         }
+        self._callback_depends = {
+            fn: fn._rftool_depends
+            for (_, fn) in rftool_fns
+            if hasattr(fn, '_rftool_depends')
+        }
+        self._callback_seen = {}
+        self._callback_counts = Counter()
 
+    def _get_input_version(self, input):
+        match input:
+            case 'geometry':  return self.rfcontext.get_target_version(selection=False)
+            case 'selection': return self.rfcontext.get_target_selection_version()
+            case 'view':      return self.rfcontext.get_view_version()
 
     def _callback(self, event, *args, **kwargs):
+        return self._dispatch(self._callbacks.get(event, []), event in self._change_events, *args, **kwargs)
+
+    def _callback_changes(self, events):
+        ''' coalesces change events, so callbacks registered for several of them are called once '''
+        fns = list(dict.fromkeys(fn for event in events for fn in self._callbacks.get(event, [])))
+        return self._dispatch(fns, True)
+
+    def _dispatch(self, fns, skip_unchanged, *args, **kwargs):
+        '''
+        calls fns, skipping (if skip_unchanged) those with declared inputs that have not changed
+        since last call.  versions are not recorded while recomputing is deferred, because
+        callbacks typically return early in that case.
+        '''
         ret = []
-        for fn in self._callbacks.get(event, []):
+        versions = {}
+        record = not self.defer_recomputing
+        for fn in fns:
+            inputs = self._callback_depends.get(fn, None)
+            if inputs:
+                for input in inputs:
+                    if input not in versions: versions[input] = self._get_input_version(input)
+                seen = tuple(versions[input] for input in inputs)
+                if skip_unchanged and self._callback_seen.get(fn, None) == seen:
+                    self._callback_counts[(fn.__name__, 'skipped')] += 1
+                    continue
+                if record: self._callback_seen[fn] = seen
+            self._callback_counts[(fn.__name__, 'called')] += 1
             ret.append(fn(self, *args, **kwargs))
         return ret
 
@@ -187,14 +248,14 @@ class RFTool:
         self._callback_after_navigating = {}
         self._callback_next_frame = {}
         RFTool._draw_count = -1
+        self._callback_seen.clear()
         self._fsm.force_reset()
         self._callback('reset')
         self._update_all()
 
     def _update_all(self):
         self._callback('timer')
-        self._callback('target change')
-        self._callback('view change')
+        self._callback_changes(['target change', 'view change'])
 
     def _fsm_update(self):
         if   self.actions.mousemove:      self._callback('mouse move')
@@ -50,6 +50,7 @@ from .contours_utils import (
     find_strings,
     loop_plane, loop_radius,
     Contours_Loop,
+    Contours_Analyzer,
     Contours_Utils,
 )
 
@@ -77,6 +78,7 @@ class Contours(RFTool, Contours_Ops, Contours_Props, Contours_Utils):
             'cut':     self.RFWidget_LineCut(self),
             'hover':   self.RFWidget_Move(self),
         }
+        self.analyzer = Contours_Analyzer()
         self.clear_widget()
 
     @RFTool.on_reset
@@ -103,20 +105,6 @@ class Contours(RFTool, Contours_Ops, Contours_Props, Contours_Utils):
         if self.ui_initial_count:
             self.ui_initial_count.disabled = bool(self.sel_edges)
 
-        # find verts along selected loops and strings
-        sel_loops = find_loops(self.sel_edges)
-        sel_strings = find_strings(self.sel_edges)
-
-        # filter out any loops or strings that are in the middle of a selected patch
-        def in_middle(bmvs, is_loop):
-            return any(len(bmv0.shared_edge(bmv1).link_faces) > 1 for bmv0,bmv1 in iter_pairs(bmvs, is_loop))
-        sel_loops = [loop for loop in sel_loops if not in_middle(loop, True)]
-        sel_strings = [string for string in sel_strings if not in_middle(string, False)]
-
-        # filter out long loops that wrap around patches, sharing edges with other strings
-        bmes = {bmv0.shared_edge(bmv1) for string in sel_strings for bmv0,bmv1 in iter_pairs(string,False)}
-        sel_loops = [loop for loop in sel_loops if not any(bmv0.shared_edge(bmv1) in bmes for bmv0,bmv1 in iter_pairs(loop,True))]
-
         mirror_mod = self.rfcontext.rftarget.mirror_mod
         symmetry_threshold = mirror_mod.symmetry_threshold
         def get_string_length(string):
@@ -140,20 +128,13 @@ class Contours(RFTool, Contours_Ops, Contours_Props, Contours_Utils):
             if not touches_mirror: c -= 1
             return c
 
-        self.loops_data = [{
-            'loop': loop,
-            'plane': loop_plane(loop),
-            'count': len(loop),
-            'radius': loop_radius(loop),
-            'cl': Contours_Loop(loop, True),
-            } for loop in sel_loops]
-        self.strings_data = [{
-            'string': string,
-            'plane': loop_plane(string),
-            'count': get_string_length(string),
-            'cl': Contours_Loop(string, False),
-            } for string in sel_strings]
-        self.sel_loops = [Contours_Loop(loop, True) for loop in sel_loops]
+        # find verts along selected loops and strings, only re-analyzing what changed
+        self.loops_data, self.strings_data = self.analyzer.update(
+            self.rfcontext.rftarget, self.sel_edges,
+            get_string_length,
+            string_key=(mirror_mod.x, mirror_mod.y, mirror_mod.z, symmetry_threshold),
+        )
+        self.sel_loops = [loop_data['cl'] for loop_data in self.loops_data]
 
         self._var_cut_count.disabled = True
         if len(self.loops_data) == 1 and len(self.strings_data) == 0:
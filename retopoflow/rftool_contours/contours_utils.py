@@ -454,3 +454,103 @@ class Contours_Loop:
 
     def move_2D(self, xy_delta:Vec2D):
         pass
+
+
+
+class Contours_Analyzer:
+    '''
+    Incrementally finds the selected loops and strings, along with their plane, count, etc.
+
+    Selected edges are split into connected components.  Loops and strings of a component
+    depend only on its edges and the topology around them, so each component's analysis is
+    cached by its edges and a signature of its local topology (faces per edge, edges per
+    vert).  The data of each loop / string is cached by its vert positions, so only the
+    loops / strings that moved are recomputed.
+    '''
+
+    def __init__(self):
+        self._components = {}   # frozenset of edges -> (signature, loops, strings)
+        self._data = {}         # (verts, is_loop) -> (key, data)
+
+    @staticmethod
+    def _signature(edges):
+        verts = {bmv for bme in edges for bmv in bme.verts}
+        return (
+            frozenset((bme, len(bme.link_faces)) for bme in edges),
+            frozenset((bmv, len(bmv.link_edges)) for bmv in verts),
+        )
+
+    @staticmethod
+    def _analyze(edges):
+        # loops and strings are made of component edges, so look those up rather than calling shared_edge
+        pair_edges = {frozenset(bme.verts): bme for bme in edges}
+        def get_edge(bmv0, bmv1):
+            bme = pair_edges.get(frozenset((bmv0, bmv1)), None)
+            return bmv0.shared_edge(bmv1) if bme is None else bme
+        def get_edges(bmvs, is_loop):
+            return [get_edge(bmv0, bmv1) for bmv0,bmv1 in iter_pairs(bmvs, is_loop)]
+
+        # filter out any loops or strings that are in the middle of a selected patch
+        def in_middle(bmvs, is_loop):
+            return any(len(bme.link_faces) > 1 for bme in get_edges(bmvs, is_loop))
+        loops = [loop for loop in find_loops(edges) if not in_middle(loop, True)]
+        strings = [string for string in find_strings(edges) if not in_middle(string, False)]
+
+        # filter out long loops that wrap around patches, sharing edges with other strings
+        bmes = {bme for string in strings for bme in get_edges(string, False)}
+        loops = [loop for loop in loops if not any(bme in bmes for bme in get_edges(loop, True))]
+
+        return (loops, strings)
+
+    def update(self, rftarget, sel_edges, fn_string_count, string_key=None):
+        '''
+        returns (loops data, strings data) for given selected edges.
+        fn_string_count computes the count of a string, and string_key should change whenever
+        fn_string_count could return a different value (ex: symmetry settings)
+        '''
+        components, sel_loops, sel_strings = {}, [], []
+        for edges in rftarget.get_edge_components(sel_edges):
+            edges = frozenset(edges)
+            signature = self._signature(edges)
+            cached = self._components.get(edges, None)
+            if cached and cached[0] == signature:
+                _, loops, strings = cached
+            else:
+                loops, strings = self._analyze(edges)
+            components[edges] = (signature, loops, strings)
+            sel_loops += loops
+            sel_strings += strings
+        self._components = components
+
+        data = {}
+        def get_data(verts, is_loop, fn_create, extra_key=None):
+            key = (tuple(tuple(bmv.co) for bmv in verts), extra_key)
+            cache_key = (tuple(verts), is_loop)
+            cached = self._data.get(cache_key, None)
+            if not cached or cached[0] != key:
+                cached = (key, fn_create(verts))
+            data[cache_key] = cached
+            return cached[1]
+
+        loops_data = [
+            get_data(loop, True, lambda loop: {
+                'loop':   loop,
+                'plane':  loop_plane(loop),
+                'count':  len(loop),
+                'radius': loop_radius(loop),
+                'cl':     Contours_Loop(loop, True),
+            })
+            for loop in sel_loops
+        ]
+        strings_data = [
+            get_data(string, False, lambda string: {
+                'string': string,
+                'plane':  loop_plane(string),
+                'count':  fn_string_count(string),
+                'cl':     Contours_Loop(string, False),
+            }, extra_key=string_key)
+            for string in sel_strings
+        ]
+        self._data = data
+
+        return (loops_data, strings_data)
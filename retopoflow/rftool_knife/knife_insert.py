@@ -38,6 +38,7 @@ from ...addon_common.common.drawing import (
 from ...addon_common.common import gpustate
 from ...addon_common.common.profiler import profiler
 from ...addon_common.common.maths import Point, Point2D, Vec2D, Vec, Direction2D, intersection2d_line_line, closest2d_point_segment
+from ...addon_common.common.maths_accel import SegmentGrid2D
 from ...addon_common.common.globals import Globals
 from ...addon_common.common.fsm import FSM
 from ...addon_common.common.utils import iter_pairs
@@ -53,6 +54,7 @@ from ...config.options import options, themes
 class Knife_Insert():
     skip_edges: set = set()
     split_edge_vert = None
+    vis_edges_grid = None
 
     @RFTool.on_quickswitch_start
     def quickswitch_start(self):
@@ -60,16 +62,29 @@ class Knife_Insert():
         self._fsm.force_set_state('insert')
 
     @RFTool.on_events('target change')
+    @RFTool.depends_on('selection')
     @FSM.onlyinstate('insert')
     @RFTool.not_while_navigating
     def gather_selection(self):
         self.sel_verts, self.sel_edges, self.sel_faces = self.rfcontext.get_selected_geom()
 
     @RFTool.on_events('target change', 'view change')
+    @RFTool.depends_on('geometry', 'view')
     @FSM.onlyinstate('insert')
     @RFTool.not_while_navigating
     def gather_visible(self):
         self.vis_verts, self.vis_edges, self.vis_faces = self.rfcontext.get_vis_geom()
+        self.vis_edges_grid = None
+
+    def get_vis_edges_grid(self):
+        # projected visible edges, built when first needed after target or view changes
+        if not self.vis_edges_grid:
+            Point_to_Point2D = self.rfcontext.Point_to_Point2D
+            self.vis_edges_grid = SegmentGrid2D(
+                (e, Point_to_Point2D(e.verts[0].co), Point_to_Point2D(e.verts[1].co))
+                for e in self.vis_edges if e.is_valid
+            )
+        return self.vis_edges_grid
 
     def gather_all(self):
         self.gather_selection()
@@ -405,8 +420,9 @@ class Knife_Insert():
         if p0v and not p0v.link_edges:
             add(p0, p0v)
 
-        for e in self.vis_edges:
-            if e in self.skip_edges:
+        # only edges in grid bins along knife line (grown by snap dist) can cross or snap
+        for e,_,_ in self.get_vis_edges_grid().get(p0, p1, within=dist):
+            if not e.is_valid or e in self.skip_edges:
                 continue
             v0, v1 = e.verts
             c0, c1 = Point_to_Point2D(v0.co), Point_to_Point2D(v1.co)
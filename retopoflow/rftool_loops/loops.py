@@ -407,14 +407,16 @@ class Loops(RFTool, Loops_Insert):
         mouse_delta = self.actions.mouse - self.mouse_down
         a,b = self.slide_vector, mouse_delta.project(self.slide_direction)
         percent = clamp(self.percent_start + a.dot(b) / a.dot(a), -1, 1)
+        slide_verts, slide_cos = [], []
         for bmv in self.slide_data.keys():
             mp = percent if not self.slide_data[bmv]['flip'] else -percent
             vecs = self.slide_data[bmv]['left' if mp > 0 else 'right']
             if len(vecs) == 0: continue
             co = self.slide_data[bmv]['orig']
             delta = sum((v * mp for v in vecs), Vec((0,0,0))) / len(vecs)
-            bmv.co = co + delta
-            self.rfcontext.snap_vert(bmv)
+            slide_verts.append(bmv)
+            slide_cos.append(co + delta)
+        self.rfcontext.set_verts_co(slide_verts, slide_cos, snap=True)
 
         self.rfcontext.dirty()
 
@@ -34,6 +34,7 @@ from ...addon_common.common.drawing import (
     CC_2D_TRIANGLES, CC_2D_TRIANGLE_FAN,
 )
 from ...addon_common.common.profiler import profiler
+from ...addon_common.common.maths_graph import label_components, group_labels
 from ...addon_common.common.maths import (
     Point, Vec, Direction,
     Point2D, Vec2D,
@@ -431,31 +432,30 @@ class Patches(RFTool):
 
         ###################
         # find strips
-        remaining_edges = set(edges)
-        strips = []
+        edges = list(edges)
+        edge_indices = { e:i for (i,e) in enumerate(edges) }
         neighbors = { e:[] for e in edges }
-        while remaining_edges:
-            strip = set()
-            working = { next(iter(remaining_edges)) }
-            while working:
-                edge = working.pop()
-                strip.add(edge)
-                remaining_edges.remove(edge)
-                v0,v1 = edge.verts
-                for e in chain(v0.link_edges, v1.link_edges):
-                    if e not in remaining_edges: continue
-                    bmv1 = edge.shared_vert(e)
-                    if self.corners.get(bmv1, False): continue
-                    bmv0 = edge.other_vert(bmv1)
-                    bmv2 = e.other_vert(bmv1)
-                    d10 = Direction(bmv0.co-bmv1.co)
-                    d12 = Direction(bmv2.co-bmv1.co)
-                    angle = math.degrees(math.acos(mid(-1,1,d10.dot(d12))))
-                    if self.corners.get(bmv1, True) and angle < min_angle: continue
-                    neighbors[edge].append(e)
-                    neighbors[e].append(edge)
-                    working.add(e)
-            strips += [strip]
+        pairs = []
+        for i0,edge in enumerate(edges):
+            v0,v1 = edge.verts
+            for e in chain(v0.link_edges, v1.link_edges):
+                i1 = edge_indices.get(e)
+                if i1 is None or i1 <= i0: continue
+                bmv1 = edge.shared_vert(e)
+                if self.corners.get(bmv1, False): continue
+                bmv0 = edge.other_vert(bmv1)
+                bmv2 = e.other_vert(bmv1)
+                d10 = Direction(bmv0.co-bmv1.co)
+                d12 = Direction(bmv2.co-bmv1.co)
+                angle = math.degrees(math.acos(mid(-1,1,d10.dot(d12))))
+                if self.corners.get(bmv1, True) and angle < min_angle: continue
+                neighbors[edge].append(e)
+                neighbors[e].append(edge)
+                pairs.append((i0, i1))
+        strips = [
+            set(edges[i] for i in group.tolist())
+            for group in group_labels(label_components(len(edges), pairs))
+        ]
 
 
         ##############################################
@@ -105,6 +105,7 @@ class PolyPen(RFTool, PolyPen_Insert):
 
     @RFTool.on_reset
     @RFTool.on_target_change
+    @RFTool.depends_on('selection')
     @FSM.onlyinstate('main')
     def update_selection(self):
         self.sel_verts, self.sel_edges, self.sel_faces = self.rfcontext.get_selected_geom()
@@ -52,6 +52,7 @@ from ...config.options import options, themes
 
 class PolyPen_Insert():
     @RFTool.on_events('target change')
+    @RFTool.depends_on('selection')
     @FSM.onlyinstate('previs insert')
     @RFTool.not_while_navigating
     def gather_selection(self):
@@ -59,6 +60,7 @@ class PolyPen_Insert():
         self.num_sel_verts, self.num_sel_edges, self.num_sel_faces = len(self.sel_verts), len(self.sel_edges), len(self.sel_faces)
 
     @RFTool.on_events('target change', 'view change')
+    @RFTool.depends_on('geometry', 'view')
     @FSM.onlyinstate('previs insert')
     @RFTool.not_while_navigating
     def gather_visible(self):
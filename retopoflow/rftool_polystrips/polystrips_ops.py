@@ -21,13 +21,13 @@ Created by Jonathan Denning, Jonathan Williamson, and Patrick Moore
 
 import math
 from mathutils import Vector
-from mathutils.geometry import intersect_point_tri_2d, intersect_point_tri_2d
 
 from ..rftool import RFTool
 
 from ...addon_common.common.bezier import CubicBezierSpline, CubicBezier
 from ...addon_common.common.debug import dprint
 from ...addon_common.common.drawing import Drawing, Cursors
+from ...addon_common.common.maths_accel import TriangleIndex2D
 from ...addon_common.common.profiler import profiler
 from ...addon_common.common.utils import iter_pairs
 
@@ -56,20 +56,15 @@ class PolyStrips_Ops:
         vis_verts = self.rfcontext.visible_verts()
         vis_edges = self.rfcontext.visible_edges(verts=vis_verts)
         vis_faces = self.rfcontext.visible_faces(verts=vis_verts)
-        vis_edges2D,vis_faces2D = [],[]
+        vis_edges2D = []
+        forward = self.rfcontext.Vec_forward()
         new_geom = []
 
         def add_edge(bme): vis_edges2D.append((bme, [Point_to_Point2D(bmv.co) for bmv in bme.verts]))
-        def add_face(bmf): vis_faces2D.append((bmf, [Point_to_Point2D(bmv.co) for bmv in bmf.verts]))
+        def add_face(bmf): vis_faces2D.insert(bmf, [Point_to_Point2D(bmv.co) for bmv in bmf.verts], forward.dot(bmf.center()))
 
         def intersect_face(pt):
-            # todo: rewrite! inefficient!
-            nonlocal vis_faces2D
-            for f,vs in vis_faces2D:
-                v0 = vs[0]
-                for v1,v2 in iter_pairs(vs[1:], False):
-                    if intersect_point_tri_2d(pt, v0, v1, v2): return f
-            return None
+            return vis_faces2D.get_first(pt)
 
         def snap_point(p2D_init, dist):
             p = raycast(p2D_init)[0]
@@ -139,7 +134,10 @@ class PolyStrips_Ops:
 
 
         for bme in vis_edges: add_edge(bme)
-        for bmf in vis_faces: add_face(bmf)
+        vis_faces2D = TriangleIndex2D(
+            (bmf, [Point_to_Point2D(bmv.co) for bmv in bmf.verts], forward.dot(bmf.center()))
+            for bmf in vis_faces
+        )
 
         self.rfcontext.undo_push('stroke')
 
@@ -319,8 +317,8 @@ class PolyStrips_Ops:
             max_error = min(min(lengths0),min(lengths1)) / 100.0   # arbitrary!
             spline0 = CubicBezierSpline.create_from_points([pts0], max_error, min_count_split=3)
             spline1 = CubicBezierSpline.create_from_points([pts1], max_error, min_count_split=3)
-            spline0.tessellate_uniform(lambda a,b: (a-b).length, 50)
-            spline1.tessellate_uniform(lambda a,b: (a-b).length, 50)
+            spline0.tessellate_uniform(split=50)
+            spline1.tessellate_uniform(split=50)
             len0,len1 = len(spline0), len(spline1)
             self.count_data['splines'] += [spline0, spline1]
             self.count_data['points'] += pts0 + pts1
@@ -88,6 +88,51 @@ def strip_centers(strip):
 def hash_face_pair(bmf0, bmf1):
     return str(bmf0.__hash__()) + str(bmf1.__hash__())
 
+def find_strips(bmquads):
+    ''' returns list of strips (lists of quads) found between junctions of given quads '''
+    # find junctions at corners
+    junctions = set()
+    for bmf in bmquads:
+        # skip if in middle of a selection
+        if not any(is_boundaryvert(bmv, bmquads) for bmv in bmf.verts): continue
+        # skip if in middle of possible strip
+        edge0,edge1,edge2,edge3 = [is_boundaryedge(bme, bmquads) for bme in bmf.edges]
+        if (edge0 or edge2) and not (edge1 or edge3): continue
+        if (edge1 or edge3) and not (edge0 or edge2): continue
+        junctions.add(bmf)
+
+    # find junctions that might be in middle of strip but are ends to other strips
+    boundaries = set((bme,bmf) for bmf in bmquads for bme in bmf.edges if is_boundaryedge(bme, bmquads))
+    while boundaries:
+        bme,bmf = boundaries.pop()
+        for bme_ in bmf.neighbor_edges(bme):
+            strip = crawl_strip(bmf, bme_, bmquads, junctions)
+            if strip is None: continue
+            junctions.add(strip[-1])
+
+    # find strips between junctions
+    strips = []
+    touched = set()
+    for bmf0 in junctions:
+        bme0,bme1,bme2,bme3 = bmf0.edges
+        edge0,edge1,edge2,edge3 = [is_boundaryedge(bme, bmquads) for bme in bmf0.edges]
+
+        def add_strip(bme):
+            strip = crawl_strip(bmf0, bme, bmquads, junctions)
+            if not strip:
+                return
+            bmf1 = strip[-1]
+            if len(strip) > 1 and hash_face_pair(bmf0, bmf1) not in touched:
+                touched.add(hash_face_pair(bmf0,bmf1))
+                touched.add(hash_face_pair(bmf1,bmf0))
+                strips.append(strip)
+
+        if not edge0: add_strip(bme0)
+        if not edge1: add_strip(bme1)
+        if not edge2: add_strip(bme2)
+        if not edge3: add_strip(bme3)
+    return strips
+
 
 def process_stroke_filter(stroke, min_distance=1.0, max_distance=2.0):
     ''' filter stroke to pts that are at least min_distance apart '''
@@ -289,7 +334,7 @@ class RFTool_PolyStrips_Strip:
     def recompute_curve(self):
         pts = strip_centers(self.bmf_strip)
         self.curve = CubicBezier.create_from_points(pts)
-        self.curve.tessellate_uniform(lambda p,q:(p-q).length, split=50)
+        self.curve.tessellate_uniform(split=50)
 
     def capture_edges(self):
         self.bmes = []
@@ -307,7 +352,7 @@ class RFTool_PolyStrips_Strip:
             diffdir = halfdiff.normalized()
             center = bmvs[0].co + halfdiff
 
-            t = self.curve.approximate_t_at_point_tessellation(center, lambda p,q:(p-q).length)
+            t = self.curve.approximate_t_at_point_tessellation(center)
             pos,der = self.curve.eval(t),self.curve.eval_derivative(t).normalized()
 
             rad = halfdiff.length
@@ -319,7 +364,7 @@ class RFTool_PolyStrips_Strip:
             self.bmes += [(bme, t, rad, rot, off_cross, off_der, off_norm)]
 
     def update(self, nearest_sources_Point, raycast_sources_Point, update_face_normal):
-        self.curve.tessellate_uniform(lambda p,q:(p-q).length, split=50)
+        self.curve.tessellate_uniform(split=50)
         length = self.curve.approximate_totlength_tessellation()
         for bme,t,rad,rot,off_cross,off_der,off_norm in self.bmes:
             pos,norm,_,_ = raycast_sources_Point(self.curve.eval(t))
@@ -339,3 +384,55 @@ class RFTool_PolyStrips_Strip:
             if v1: bmv1.co_normal = (v1, n1)
         for bmf in self.bmf_strip:
             update_face_normal(bmf)
+
+
+class RFTool_PolyStrips_StripCache:
+    '''
+    Incrementally finds strips of selected quads, keeping the RFTool_PolyStrips_Strip objects
+    (and their fitted curves) of strips that did not change.
+
+    Quads are split into components of quads sharing verts.  Whether a quad is a junction or
+    boundary depends only on the quads around its verts, so the strips of a component are
+    re-crawled only if the component's quads or their local topology changed.  Strip objects of
+    an unchanged component are kept as long as the positions of their verts have not changed.
+    '''
+
+    def __init__(self):
+        self._components = {}   # frozenset of quads -> (signature, {strip tuple: (positions, strip)})
+
+    def clear(self):
+        self._components = {}
+
+    @staticmethod
+    def _signature(bmfs):
+        bmvs = {bmv for bmf in bmfs for bmv in bmf.verts}
+        return (
+            frozenset((bmf, tuple(bmf.edges)) for bmf in bmfs),
+            frozenset((bmv, frozenset(bmv.link_faces), bmv.is_boundary) for bmv in bmvs),
+        )
+
+    @staticmethod
+    def _positions(strip):
+        return tuple(tuple(bmv.co) for bmf in strip for bmv in bmf.verts)
+
+    def update(self, rftarget, bmquads):
+        ''' returns list of RFTool_PolyStrips_Strip for given selected quads '''
+        components, strips = {}, []
+        for bmfs in rftarget.get_face_components(bmquads):
+            bmfs = frozenset(bmfs)
+            signature = self._signature(bmfs)
+            cached = self._components.get(bmfs, None)
+            if cached and cached[0] == signature:
+                prev_strips = cached[1]
+            else:
+                prev_strips = { tuple(strip): (None, None) for strip in find_strips(bmfs) }
+            cur_strips = {}
+            for key, (positions, strip) in prev_strips.items():
+                cur_positions = self._positions(key)
+                if strip is None or positions != cur_positions:
+                    strip = RFTool_PolyStrips_Strip(list(key))
+                cur_strips[key] = (cur_positions, strip)
+                strips.append(strip)
+            components[bmfs] = (signature, cur_strips)
+        self._components = components
+        return strips
@@ -431,6 +431,7 @@ class Relax(RFTool):
                 mult = 1.0
 
             # update
+            update_verts, update_cos = [], []
             for bmv in displace:
                 co = bmv.co + displace[bmv] * (opt_mult * vert_strength[bmv]) * mult
 
@@ -447,8 +448,9 @@ class Relax(RFTool):
                     if p is not None:
                         co = p
 
-                bmv.co = co
-                self.rfcontext.snap_vert(bmv)
+                update_verts.append(bmv)
+                update_cos.append(co)
+            self.rfcontext.set_verts_co(update_verts, update_cos, snap=True)
             self.rfcontext.update_verts_faces(displace)
         # print(f'relaxed {len(verts)} ({len(chk_verts)}) in {time.time() - st} with {strength}')
 
@@ -170,6 +170,7 @@ class Strokes(RFTool, Strokes_Insert):
 
     @RFTool.on_target_change
     @RFTool.on_view_change
+    @RFTool.depends_on('selection')
     def update(self):
         if self.defer_recomputing: return
 
@@ -336,24 +337,14 @@ class Strokes(RFTool, Strokes_Insert):
         # TODO: remove colocated faces
         if self.mousedown is None: return
         delta = Vec2D(self.actions.mouse - self.mousedown)
-        set2D_vert = self.rfcontext.set2D_vert
-        update_verts = []
         merge_dist = self.rfcontext.drawing.scale(options['strokes merge dist'])
-        for bmv,xy in self.bmverts:
-            if not xy: continue
-            xy_updated = xy + delta
-            for bmv1,xy1 in self.vis_bmverts:
-                if not xy1: continue
-                if bmv1 == bmv: continue
-                if not bmv1.is_valid: continue
-                d = (xy_updated - xy1).length
-                if (xy_updated - xy1).length > merge_dist:
-                    continue
-                bmv1.merge_robust(bmv)
-                self.rfcontext.select(bmv1)
-                update_verts += [bmv1]
-                break
+        update_verts = self.rfcontext.weld_verts_2D(
+            ((bmv, xy + delta) for (bmv, xy) in self.bmverts if xy),
+            self.vis_bmverts,
+            merge_dist,
+        )
         if update_verts:
+            self.rfcontext.select(update_verts, only=False)
             self.rfcontext.update_verts_faces(update_verts)
             #self.set_next_state()
 
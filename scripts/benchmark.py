@@ -0,0 +1,496 @@
+'''
+Copyright (C) 2023 CG Cookie
+http://cgcookie.com
+hello@cgcookie.com
+
+Created by Jonathan Denning, Jonathan Williamson, and Patrick Moore
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+'''
+Headless benchmark suite for RetopoFlow internals
+
+Runs inside Blender in background mode (no window, no GPU drawing), builds
+seeded synthetic sources and targets, times the hot paths of RetopoFlow, and
+writes the results to a JSON file so that runs can be compared over time.
+
+usage:
+
+    blender -b --factory-startup --python scripts/benchmark.py -- [options]
+
+options:
+
+    --faces N [N ...]       approximate source face counts (default: 10000 100000 1000000 2000000)
+    --noise F               noisy-scan displacement as fraction of radius (default: 0.01)
+    --target-ratio R        target faces per source face (default: 0.05)
+    --repeats N             number of timed repeats per benchmark (default: 5)
+    --queries N             number of queries per query benchmark (default: 1000)
+    --seed N                random seed (default: 0)
+    --only NAME [NAME ...]  run only benchmarks whose name contains any NAME
+    --replay FILENAME       replay a recorded instrumentation file (options['instrument']) instead of synthetic targets
+    --out FILENAME          JSON output (default: RetopoFlow_benchmark.json)
+
+each benchmark reports min / median / mean / max seconds over the repeats.
+benchmarks that fail (ex: due to missing GPU in background mode) are
+recorded with their error rather than aborting the whole run.
+'''
+
+import os
+import sys
+import copy
+import json
+import math
+import time
+import random
+import argparse
+import inspect
+import platform
+import importlib
+import statistics
+import traceback
+from types import SimpleNamespace
+
+import bpy
+import bmesh
+
+
+###############################################################################
+# import RetopoFlow as a package (add-on folder name may vary)
+
+path_addon = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+name_addon = os.path.basename(path_addon)
+if os.path.dirname(path_addon) not in sys.path:
+    sys.path.insert(0, os.path.dirname(path_addon))
+
+def rf_import(module):
+    return importlib.import_module(f'{name_addon}.{module}')
+
+time_import = time.perf_counter()
+importlib.import_module(name_addon)    # in background mode, add-on registration is skipped
+maths       = rf_import('addon_common.common.maths')
+maths_accel = rf_import('addon_common.common.maths_accel')
+bezier      = rf_import('addon_common.common.bezier')
+rfmesh      = rf_import('retopoflow.rfmesh.rfmesh')
+instrument  = rf_import('retopoflow.rf.rf_instrument')
+time_import = time.perf_counter() - time_import
+
+Point, Point2D, Vec2D, Direction = maths.Point, maths.Point2D, maths.Vec2D, maths.Direction
+Ray = maths.Ray
+Accel2D = maths_accel.Accel2D
+RFSource, RFTarget = rfmesh.RFSource, rfmesh.RFTarget
+
+
+###############################################################################
+# arguments
+
+def parse_args():
+    argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else []
+    parser = argparse.ArgumentParser(prog='benchmark.py', description='RetopoFlow headless benchmarks')
+    parser.add_argument('--faces', type=int, nargs='+', default=[10_000, 100_000, 1_000_000, 2_000_000])
+    parser.add_argument('--noise', type=float, default=0.01)
+    parser.add_argument('--target-ratio', type=float, default=0.05)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--only', type=str, nargs='*', default=None)
+    parser.add_argument('--replay', type=str, default=None)
+    parser.add_argument('--out', type=str, default='RetopoFlow_benchmark.json')
+    return parser.parse_args(argv)
+
+
+###############################################################################
+# synthetic scenes
+
+def clear_scene():
+    for obj in list(bpy.data.objects):
+        bpy.data.objects.remove(obj, do_unlink=True)
+    for mesh in list(bpy.data.meshes):
+        bpy.data.meshes.remove(mesh, do_unlink=True)
+
+def link_bmesh(name, bm):
+    mesh = bpy.data.meshes.new(name)
+    bm.to_mesh(mesh)
+    bm.free()
+    obj = bpy.data.objects.new(name, mesh)
+    bpy.context.scene.collection.objects.link(obj)
+    return obj
+
+def create_source(faces, noise, rng):
+    '''
+    subdivided icosphere with at least the given number of faces (20 * 4^n).
+    when noise > 0, verts are pushed along their normals by low-frequency bumps
+    plus high-frequency jitter to resemble a scan.
+    '''
+    subdivisions = max(1, math.ceil(math.log(max(faces, 20) / 20, 4)))
+    bm = bmesh.new()
+    bmesh.ops.create_icosphere(bm, subdivisions=subdivisions, radius=1.0)
+    if noise > 0:
+        freq = [rng.uniform(2, 6) for _ in range(3)]
+        phase = [rng.uniform(0, math.tau) for _ in range(3)]
+        for bmv in bm.verts:
+            co = bmv.co
+            bump = sum(math.sin(f * c + p) for (f, c, p) in zip(freq, co, phase)) / 3
+            jitter = rng.gauss(0, 0.25)
+            bmv.co = co + co.normalized() * (noise * (bump + jitter))
+    bm.normal_update()
+    return link_bmesh(f'Source {len(bm.faces)}', bm)
+
+def create_target(faces):
+    ''' UV sphere slightly outside the source, with displace modifier pre-added '''
+    v_segments = max(4, int(math.sqrt(max(faces, 32) / 2)))
+    bm = bmesh.new()
+    bmesh.ops.create_uvsphere(bm, u_segments=v_segments * 2, v_segments=v_segments, radius=1.02)
+    bm.normal_update()
+    obj = link_bmesh(f'Target {len(bm.faces)}', bm)
+    # adding displace here so RFTarget.setup_displace does not need bpy.ops (no active object in background)
+    mod = obj.modifiers.new('RetopoFlow Displace', 'DISPLACE')
+    mod.show_viewport = False
+    mod.show_render = False
+    bpy.context.view_layer.objects.active = obj
+    return obj
+
+def random_direction(rng):
+    return Direction((rng.gauss(0, 1), rng.gauss(0, 1), rng.gauss(0, 1)))
+
+def random_rays(count, rng):
+    rays = []
+    for _ in range(count):
+        d = random_direction(rng)
+        rays.append(Ray(Point(d * -3.0), d))
+    return rays
+
+def random_points(count, rng, radius=1.5):
+    return [Point(random_direction(rng) * rng.uniform(0, radius)) for _ in range(count)]
+
+def noisy_stroke(count, rng, noise=0.01):
+    return [
+        Point((
+            math.cos(t) * (1 + 0.2 * math.sin(3 * t)) + rng.gauss(0, noise),
+            math.sin(t) * (1 + 0.2 * math.sin(3 * t)) + rng.gauss(0, noise),
+            0.1 * math.sin(5 * t) + rng.gauss(0, noise),
+        ))
+        for i in range(count)
+        for t in [math.tau * 0.8 * i / (count - 1)]
+    ]
+
+
+###############################################################################
+# headless stand-ins for view-dependent pieces
+
+# fake orthographic camera looking down -Z, with 500 pixels per unit
+view_forward = Direction((0, 0, -1))
+view_scale = 500
+
+def is_visible(point, normal):
+    return normal.dot(view_forward) < 0
+
+def Point_to_Point2Ds(co, normal):
+    return [Point2D((co.x * view_scale, co.y * view_scale))]
+
+
+def create_headless_rfcontext(rfsource, rftarget):
+    '''
+    creates an object built from the real RetopoFlow target, sources, and spaces mixins,
+    so that tool code runs against the same rfcontext methods it uses in Blender.
+    only the view (fake orthographic camera above) and viewport settings are stood in.
+    '''
+    RetopoFlow_Target  = rf_import('retopoflow.rf.rf_target').RetopoFlow_Target
+    RetopoFlow_Sources = rf_import('retopoflow.rf.rf_sources').RetopoFlow_Sources
+    RetopoFlow_Spaces  = rf_import('retopoflow.rf.rf_spaces').RetopoFlow_Spaces
+
+    class HeadlessRFContext(RetopoFlow_Target, RetopoFlow_Sources, RetopoFlow_Spaces):
+        def __init__(self):
+            self.rfsources = [rfsource]
+            self.rftarget = rftarget
+            self.accel_recompute = True
+            self.drawing = SimpleNamespace(space=SimpleNamespace(clip_start=0.0))
+            self.actions = SimpleNamespace(mouse=None, mouse_prev=None, hit_pos=None)
+        def Point2D_to_Origin(self, xy):
+            if xy is None: return None
+            return Point((xy.x / view_scale, xy.y / view_scale, 10))
+        def Point2D_to_Direction(self, xy):
+            if xy is None: return None
+            return view_forward
+        def Point_to_Point2D(self, xyz):
+            if not xyz: return None
+            return Point2D((xyz.x * view_scale, xyz.y * view_scale))
+        def ray_ignore_backface_sources(self):
+            return False
+
+    return HeadlessRFContext()
+
+def create_headless_brush(widget_class, radius, strength=0.5, falloff=1.5):
+    '''
+    stand-in for brush widget with radius in world units.
+    strength falloff comes from the real widget class.
+    '''
+    brush = SimpleNamespace(radius=radius, hit_scale=1.0, strength=strength, falloff=falloff)
+    brush.get_scaled_radius = lambda: widget_class.get_scaled_radius(brush)
+    brush.get_strength_dist = lambda dist: widget_class.get_strength_dist(brush, dist)
+    return brush
+
+
+def create_headless_render(rftarget):
+    '''
+    creates an RFMeshRender that gathers data synchronously without creating GPU batches.
+    the buffered render batches are replaced with vertex counts, so only the data
+    gathering (triangulation, per-vertex attribute lists) is timed.
+    '''
+    RFMeshRender = rf_import('retopoflow.rfmesh.rfmesh_render').RFMeshRender
+
+    class HeadlessRFMeshRender(RFMeshRender):
+        def __init__(self, rfmesh):
+            self.async_load = False
+            self._is_loading = False
+            self._is_loaded = False
+            self.load_verts = self.load_edges = self.load_faces = True
+            self.buffered_renders_static  = []
+            self.buffered_renders_dynamic = []
+            self.split = None
+            self.opts = {}
+            self.replace_rfmesh(rfmesh)
+        def add_buffered_render(self, draw_type, data, static):
+            (self.buffered_renders_static if static else self.buffered_renders_dynamic).append(len(data['vco']))
+        def __del__(self):
+            pass
+
+    return HeadlessRFMeshRender(rftarget)
+
+
+###############################################################################
+# benchmark runner
+
+class Benchmarks:
+    def __init__(self, args):
+        self.args = args
+        self.results = []
+
+    def should_run(self, name):
+        return not self.args.only or any(o in name for o in self.args.only)
+
+    def run(self, name, size, fn, *, setup=None, repeats=None, count=None):
+        if not self.should_run(name): return None
+        repeats = repeats or self.args.repeats
+        times, error, value = [], None, None
+        try:
+            for _ in range(repeats):
+                arg = setup() if setup else None
+                start = time.perf_counter()
+                value = fn(arg) if setup else fn()
+                times.append(time.perf_counter() - start)
+        except Exception as e:
+            error = f'{type(e).__name__}: {e}'
+            traceback.print_exc()
+        result = {
+            'name':    name,
+            'faces':   size,
+            'repeats': len(times),
+            'count':   count,
+        }
+        if times:
+            result.update({
+                'min':    min(times),
+                'median': statistics.median(times),
+                'mean':   statistics.fmean(times),
+                'max':    max(times),
+            })
+            if count: result['per_item'] = result['median'] / count
+        if error: result['error'] = error
+        if isinstance(value, (int, float)): result['value'] = value
+        self.results.append(result)
+        summary = f'{result["median"]*1000:10.3f}ms' if times else f'  FAILED: {error}'
+        print(f'  {name:40s} {summary}')
+        return value
+
+    def run_size(self, faces):
+        args = self.args
+        rng = random.Random(args.seed)
+
+        clear_scene()
+        time_start = time.perf_counter()
+        obj_source = create_source(faces, args.noise, rng)
+        obj_target = create_target(int(faces * args.target_ratio))
+        time_scene = time.perf_counter() - time_start
+        size = len(obj_source.data.polygons)
+        print(f'Source: {size} faces, Target: {len(obj_target.data.polygons)} faces ({time_scene:0.2f}s to build)')
+
+        # startup stages
+        self.run('startup: RFSource.new', size, lambda: RFSource.new(obj_source), repeats=1)
+        rfsource = RFSource.new(obj_source)
+        self.run('startup: RFSource BVH', size, lambda: rfsource.get_bvh(), repeats=1)
+        self.run('startup: RFTarget.new', size, lambda: RFTarget.new(obj_target, 1.0), repeats=1)
+        rftarget = RFTarget.new(obj_target, 1.0)
+
+        def symmetry_accel():
+            w2l_point = rftarget.w2l_point
+            edges = [(w2l_point(v0), w2l_point(v1)) for (v0, v1) in rfsource.plane_intersection(rftarget.get_yz_plane())]
+            return Accel2D.simple_edges('RFSource edges', edges, lambda p,_:[Point2D((p.y,p.z))])
+        self.run('startup: symmetry accel', size, symmetry_accel, repeats=1)
+        self.run('source: plane_intersection', size, lambda: len(list(rfsource.plane_intersection(rftarget.get_yz_plane()))))
+
+        # source queries
+        rays = random_rays(args.queries, rng)
+        points = random_points(args.queries, rng)
+        self.run('source: raycast', size, lambda: sum(1 for ray in rays if rfsource.raycast(ray)[0]), count=len(rays))
+        self.run('source: nearest', size, lambda: sum(1 for p in points if rfsource.nearest(p)[0]), count=len(points))
+        self.run('source: visible_verts', size, lambda: len(rfsource.visible_verts(is_visible)))
+
+        # target accel structure
+        def accel_setup():
+            verts = rftarget.visible_verts(is_visible)
+            edges = rftarget.visible_edges(is_visible, verts=verts)
+            faces = rftarget.visible_faces(is_visible, verts=verts)
+            return (verts, edges, faces)
+        self.run('target: visible geometry', size, accel_setup)
+        visible = accel_setup()
+        accel = self.run('target: Accel2D build', size, lambda: Accel2D('benchmark', *visible, Point_to_Point2Ds))
+        if accel:
+            points2D = [Point2D((rng.uniform(-500, 500), rng.uniform(-500, 500))) for _ in range(args.queries)]
+            self.run('target: Accel2D get_verts', size, lambda: sum(len(accel.get_verts(p, 10)) for p in points2D), count=len(points2D))
+            self.run('target: Accel2D get_faces', size, lambda: sum(len(accel.get_faces(p, 10)) for p in points2D), count=len(points2D))
+
+        # rendering data
+        def gather(rfmr):
+            rfmr._gather_data()
+            return sum(rfmr.buffered_renders_static)
+        self.run('target: RFMeshRender gather', size, gather, setup=lambda: create_headless_render(rftarget))
+
+        # tool steps: run the real per-frame code of Tweak and Relax on a headless rfcontext.
+        # FSM, event, and frame decorators are unwrapped, as they need a running RetopoFlow instance
+        brush_center, brush_radius = Point((0, 0, 1)), 0.5
+
+        def tweak_setup():
+            Tweak = rf_import('retopoflow.rftool_tweak.tweak').Tweak
+            rfcontext = create_headless_rfcontext(rfsource, rftarget)
+            brush = create_headless_brush(Tweak.RFWidget_BrushFalloff, brush_radius)
+            mousedown = rfcontext.Point_to_Point2D(brush_center)
+            rfcontext.actions.mouse_prev = mousedown
+            rfcontext.actions.mouse = mousedown + Vec2D((0.5, 0))
+            nearest = rfcontext.nearest_verts_point(brush_center, brush_radius)
+            tool = SimpleNamespace(
+                rfcontext=rfcontext,
+                actions=rfcontext.actions,
+                mousedown=mousedown,
+                bmvert_data=[
+                    (bmv, rfcontext.symmetry_planes_for_point(bmv.co), rfcontext.Point_to_Point2D(bmv.co), Point(bmv.co), brush.get_strength_dist(d))
+                    for (bmv, d) in nearest
+                ],
+                bmfaces={bmf for (bmv, _) in nearest for bmf in bmv.link_faces},
+                _boundary=[],
+            )
+            return (inspect.unwrap(Tweak.move_doit), tool)
+        def tweak_step(setup):
+            move_doit, tool = setup
+            move_doit(tool)
+            tool.rfcontext.dirty()      # done by RFTool.dirty_when_done
+            return len(tool.bmvert_data)
+        self.run('tool: tweak step', size, tweak_step, setup=tweak_setup)
+
+        def relax_setup():
+            Relax = rf_import('retopoflow.rftool_relax.relax').Relax
+            rfcontext = create_headless_rfcontext(rfsource, rftarget)
+            rfcontext.actions.hit_pos = brush_center
+            tool = SimpleNamespace(
+                rfcontext=rfcontext,
+                actions=rfcontext.actions,
+                rfwidgets={'brushstroke': create_headless_brush(Relax.RFWidget_BrushFalloff, brush_radius)},
+                _bmverts=list(rfcontext.iter_verts()),
+                _boundary=[],
+                _time=time.time() - 1 / 60,     # one frame
+            )
+            return (inspect.unwrap(Relax.relax_doit), tool)
+        def relax_step(setup):
+            relax_doit, tool = setup
+            relax_doit(tool)
+            return len(tool._bmverts)
+        self.run('tool: relax step', size, relax_step, setup=relax_setup)
+
+        # undo stack
+        self.run('undo: push (deepcopy)', size, lambda: copy.deepcopy(rftarget))
+        def undo_pop(state):
+            state.rewrap()
+            state.dirty()
+        self.run('undo: pop (rewrap)', size, undo_pop, setup=lambda: copy.deepcopy(rftarget))
+
+        # bezier fitting (independent of mesh size, but included per size to keep rows comparable)
+        for count in (100, 1000):
+            stroke = noisy_stroke(count, rng)
+            self.run(f'bezier: fit spline ({count} pts)', size, lambda: len(bezier.CubicBezierSpline.create_from_points([stroke], 0.01)))
+
+        clear_scene()
+
+    def run_replay(self, filename):
+        '''
+        replays recorded session, timing the work RetopoFlow does on the target after each action.
+        uses the first size in --faces for the source mesh.
+        '''
+        args = self.args
+        rng = random.Random(args.seed)
+        reader = instrument.InstrumentReader(filename)
+        self.run('replay: decode all records', None, lambda: sum(1 for _ in reader), repeats=1)
+
+        clear_scene()
+        create_source(args.faces[0], args.noise, rng)
+        obj_target = create_target(0)
+        for i, state in enumerate(reader):
+            print(f'Record {i}: {state.action} (v={len(state.verts)} e={len(state.edges)} f={len(state.face_sizes)})')
+            bm = state.to_bmesh()
+            bm.to_mesh(obj_target.data)
+            bm.free()
+            obj_target.data.update()
+            size = len(state.face_sizes)
+            name = f'replay {i:04d} {state.action}'
+            rftarget = self.run(f'{name}: RFTarget.new', size, lambda: RFTarget.new(obj_target, 1.0), repeats=1)
+            if not rftarget: continue
+            visible = self.run(f'{name}: visible geometry', size, lambda: (
+                (verts := rftarget.visible_verts(is_visible)),
+                rftarget.visible_edges(is_visible, verts=verts),
+                rftarget.visible_faces(is_visible, verts=verts),
+            ))
+            if visible:
+                self.run(f'{name}: Accel2D build', size, lambda: Accel2D('replay', *visible, Point_to_Point2Ds))
+            self.run(f'{name}: RFMeshRender gather', size, lambda rfmr: (rfmr._gather_data(), sum(rfmr.buffered_renders_static))[1], setup=lambda: create_headless_render(rftarget))
+            self.run(f'{name}: undo push (deepcopy)', size, lambda: copy.deepcopy(rftarget))
+        clear_scene()
+
+    def write(self, filename):
+        data = {
+            'blender':   bpy.app.version_string,
+            'python':    platform.python_version(),
+            'platform':  platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'arguments': vars(self.args),
+            'import':    time_import,
+            'results':   self.results,
+        }
+        with open(filename, 'wt') as f:
+            json.dump(data, f, indent=2)
+        print(f'Wrote {len(self.results)} results to {filename}')
+
+
+def main():
+    args = parse_args()
+    benchmarks = Benchmarks(args)
+    print(f'RetopoFlow benchmarks (import: {time_import:0.2f}s)')
+    if args.replay:
+        benchmarks.run_replay(args.replay)
+    else:
+        for faces in args.faces:
+            benchmarks.run_size(faces)
+    benchmarks.write(args.out)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,479 @@
+'''
+Copyright (C) 2023 CG Cookie
+http://cgcookie.com
+hello@cgcookie.com
+
+Created by Jonathan Denning, Jonathan Williamson, and Patrick Moore
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+'''
+Headless tests for RetopoFlow internals
+
+Runs inside Blender in background mode (no window, no GPU drawing), checking
+optimized code paths against simple reference implementations.
+
+usage:
+
+    blender -b --factory-startup --python scripts/headless_tests.py -- [unittest options]
+
+ex: `-- -k weld` runs only the tests with "weld" in their name.
+'''
+
+import os
+import sys
+import random
+import tempfile
+import unittest
+import importlib
+from itertools import chain
+from types import SimpleNamespace
+
+import bpy
+import bmesh
+import numpy as np
+from mathutils import Vector
+
+
+###############################################################################
+# import RetopoFlow as a package (add-on folder name may vary)
+
+path_addon = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+name_addon = os.path.basename(path_addon)
+if os.path.dirname(path_addon) not in sys.path:
+    sys.path.insert(0, os.path.dirname(path_addon))
+
+def rf_import(module):
+    return importlib.import_module(f'{name_addon}.{module}')
+
+importlib.import_module(name_addon)    # in background mode, add-on registration is skipped
+maths       = rf_import('addon_common.common.maths')
+maths_accel = rf_import('addon_common.common.maths_accel')
+rfmesh      = rf_import('retopoflow.rfmesh.rfmesh')
+instrument  = rf_import('retopoflow.rf.rf_instrument')
+blender_save = rf_import('retopoflow.rf.rf_blender_save')
+utils       = rf_import('addon_common.common.utils')
+benchmark   = rf_import('scripts.benchmark')     # synthetic scenes and headless stand-ins
+
+Point, Normal = maths.Point, maths.Normal
+RFSource, RFTarget = rfmesh.RFSource, rfmesh.RFTarget
+
+
+###############################################################################
+# helpers
+
+def canonical_mesh(verts, edges, faces):
+    '''
+    mesh as sorted lists of vert coords, independent of element order.
+    verts are (float32) coords, edges are vert index pairs, faces are lists of vert indices
+    '''
+    co = [tuple(c) for c in np.array(verts, dtype=np.float32).reshape((-1, 3)).tolist()]
+    def face_key(face):
+        face = [co[i] for i in face]
+        i = face.index(min(face))
+        return tuple(face[i:] + face[:i])
+    return (
+        sorted(co),
+        sorted(tuple(sorted((co[i0], co[i1]))) for (i0, i1) in edges),
+        sorted(face_key(face) for face in faces),
+    )
+
+def canonical_bmesh(bme):
+    bme.verts.index_update()
+    return canonical_mesh(
+        [tuple(bmv.co) for bmv in bme.verts],
+        [[bmv.index for bmv in bme.verts] for bme in bme.edges],
+        [[bmv.index for bmv in bmf.verts] for bmf in bme.faces],
+    )
+
+def create_rftarget(faces=200):
+    benchmark.clear_scene()
+    return RFTarget.new(benchmark.create_target(faces), 1.0)
+
+def create_rftarget_from_bmesh(name, bm):
+    ''' links (and frees) bm, and creates RFTarget from it (see benchmark.create_target) '''
+    obj = benchmark.link_bmesh(name, bm)
+    mod = obj.modifiers.new('RetopoFlow Displace', 'DISPLACE')
+    mod.show_viewport = False
+    mod.show_render = False
+    bpy.context.view_layer.objects.active = obj
+    return RFTarget.new(obj, 1.0)
+
+def create_headless_view_rfcontext(rfsource, rftarget):
+    '''
+    headless rfcontext (see benchmark.create_headless_rfcontext) with the state needed to build accel
+    structs and raycast from the mouse.  the view never changes, and visibility only tests facing
+    '''
+    rfcontext = benchmark.create_headless_rfcontext(rfsource, rftarget)
+    rfcontext.accel_defer_recomputing = False
+    rfcontext.accel_data_all   = utils.Dict(get_default=None)
+    rfcontext.accel_data_sel   = utils.Dict(get_default=None)
+    rfcontext.accel_data_unsel = utils.Dict(get_default=None)
+    rfcontext._draw_count, rfcontext._nav, rfcontext._nav_time = 0, False, 0.0
+    rfcontext._source_generation, rfcontext._mouse_hit_cache = 0, (None, None)
+    rfcontext.actions.r3d = SimpleNamespace(is_perspective=False)
+    rfcontext.get_view_version = lambda: 0
+    rfcontext.Vec_forward = lambda: benchmark.view_forward
+    rfcontext.Point2D_in_area = lambda p2D: p2D is not None
+    rfcontext.gen_is_visible = lambda **kwargs: benchmark.is_visible
+    return rfcontext
+
+def create_grid(segments, size):
+    ''' grid in XY plane (z = 0), so snapping to a larger grid source does not move its verts '''
+    bm = bmesh.new()
+    bmesh.ops.create_grid(bm, x_segments=segments, y_segments=segments, size=size)
+    return bm
+
+
+###############################################################################
+# maths_accel
+
+def brute_force_weld_map(points, dist, sources, targets):
+    ''' O(n^2) reference for compute_weld_map '''
+    count = len(points)
+    parent = list(range(count))
+    def find(i):
+        while parent[i] != i: i = parent[i]
+        return i
+    linked = set()
+    for i in range(count):
+        if not sources[i]: continue
+        for j in range(count):
+            if i == j or not targets[j]: continue
+            if np.sum((points[i] - points[j]) ** 2) > dist * dist: continue
+            linked |= {i, j}
+            ri, rj = find(i), find(j)
+            if ri != rj: parent[max(ri, rj)] = min(ri, rj)
+    clusters = {}
+    for i in sorted(linked):
+        clusters.setdefault(find(i), []).append(i)
+    merge_map = list(range(count))
+    for cluster in clusters.values():
+        anchors = [j for j in cluster if targets[j] and not sources[j]] or [next(j for j in cluster if targets[j])]
+        for i in cluster:
+            if not sources[i] or i == anchors[0]: continue
+            merge_map[i] = min(anchors, key=lambda j: (float(np.sum((points[i] - points[j]) ** 2)), j))
+    return merge_map
+
+class TestWeldMap(unittest.TestCase):
+    def random_cases(self, count=300):
+        rng = np.random.default_rng(0)
+        for case in range(count):
+            n, dims = int(rng.integers(1, 100)), int(rng.integers(1, 4))
+            points, dist = rng.random((n, dims)), float(rng.uniform(0.01, 0.3))
+            if case % 3 == 0:
+                # remove doubles: all points can merge into each other
+                sources, targets = np.ones(n, dtype=bool), np.ones(n, dtype=bool)
+            elif case % 3 == 1:
+                # screen-space weld: moved verts into other verts
+                sources = rng.random(n) < 0.5
+                targets = ~sources
+            else:
+                # overlapping sources and targets
+                sources, targets = rng.random(n) < 0.6, rng.random(n) < 0.6
+            yield (points, dist, sources, targets)
+
+    def test_weld_map_matches_brute_force(self):
+        for (points, dist, sources, targets) in self.random_cases():
+            merge_map, _ = maths_accel.compute_weld_map(points, dist, sources=sources, targets=targets)
+            self.assertEqual(merge_map.tolist(), brute_force_weld_map(points, dist, sources, targets))
+
+    def test_weld_map_is_maximal_without_chains(self):
+        for (points, dist, sources, targets) in self.random_cases():
+            merge_map, _ = maths_accel.compute_weld_map(points, dist, sources=sources, targets=targets)
+            kept = np.flatnonzero(merge_map == np.arange(len(points))).tolist()
+            for (i, j) in enumerate(merge_map.tolist()):
+                self.assertEqual(merge_map[j], j, 'merged into a point that was merged away')
+                if i != j: self.assertTrue(sources[i] and targets[j])
+            for i in kept:
+                for j in kept:
+                    if i == j or not (sources[i] and targets[j]): continue
+                    self.assertGreater(np.sum((points[i] - points[j]) ** 2), dist * dist, 'kept points within dist')
+
+    def test_weld_map_clamps_to_planes(self):
+        points = [(0.001, 1.0, 0.0), (-0.001, 1.0, 0.0), (0.5, 0.0, 0.0)]
+        merge_map, clamped = maths_accel.compute_weld_map(points, 0.0001, clamp_axes=[0], clamp_dist=0.01)
+        self.assertEqual(clamped[:,0].tolist(), [0.0, 0.0, 0.5])
+        self.assertEqual(merge_map.tolist(), [0, 0, 2])
+
+
+###############################################################################
+# rf_instrument
+
+class TestInstrumentation(unittest.TestCase):
+    def test_replay_round_trips_recorded_session(self):
+        rftarget = create_rftarget()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, 'instrument.bin')
+            recorder = instrument.InstrumentRecorder(filename)
+            expected = []
+            def record(action):
+                recorder.record(action, rftarget)
+                expected.append((action, canonical_bmesh(rftarget.bme)))
+
+            record('start')
+            verts = list(rftarget.iter_verts())[:10]
+            rftarget.set_verts_co(verts, [(v.co.x, v.co.y, v.co.z + 0.1) for v in verts])
+            record('move')
+            v0 = rftarget.new_vert(Point((3, 0, 0)), Normal((0, 0, 1)))
+            v1 = rftarget.new_vert(Point((3, 1, 0)), Normal((0, 0, 1)))
+            v2 = rftarget.new_vert(Point((4, 1, 0)), Normal((0, 0, 1)))
+            v3 = rftarget.new_vert(Point((4, 0, 0)), Normal((0, 0, 1)))
+            rftarget.new_face([v0, v1, v2])
+            rftarget.new_edge([v0, v3])
+            record('new face')
+            rftarget.delete_verts(verts[:3])
+            record('delete')
+            rftarget.weld_verts({v3: v2})
+            record('weld')
+            rftarget.triangulate()      # changes are unknown, so snapshot is recorded
+            record('triangulate')
+            recorder.close()
+
+            states = list(instrument.InstrumentReader(filename))
+        R_SNAPSHOT, R_DELTA = instrument.RECORD_SNAPSHOT, instrument.RECORD_DELTA
+        self.assertEqual([state.kind for state in states], [R_SNAPSHOT, R_DELTA, R_DELTA, R_DELTA, R_DELTA, R_SNAPSHOT])
+        for state, (action, mesh) in zip(states, expected):
+            self.assertEqual(state.action, action)
+            self.assertEqual(canonical_mesh(state.verts, state.edges.tolist(), [f.tolist() for f in state.iter_faces()]), mesh, action)
+            # replayed state can be loaded back into a BMesh
+            bme = state.to_bmesh()
+            self.assertEqual(canonical_bmesh(bme), mesh, action)
+            bme.free()
+
+
+###############################################################################
+# rf_target
+
+def smooth_edge_flow_reference(bm, iterations):
+    '''
+    previous RetopoFlow_Target.smooth_edge_flow (Gauss-Seidel, in place) on the selected edges of bm,
+    with its edges1 typo fixed and without snapping
+    '''
+    sel_edges = [bme for bme in bm.edges if bme.select]
+    for _ in range(iterations):
+        for bme in sel_edges:
+            for bmv in bme.verts:
+                bmv_other = bme.other_vert(bmv)
+                neighbors = [
+                    edge.other_vert(bmv)
+                    for bmf in bme.link_faces for edge in bmf.edges
+                    if not edge.select and edge != bme and bmv in edge.verts
+                ]
+                neighbors = [v for v in neighbors if v != bmv_other]
+                if len(neighbors) > 1:
+                    bmv.co = sum((v.co for v in neighbors), Vector()) / len(neighbors)
+
+class TestSmoothEdgeFlow(unittest.TestCase):
+    def smooth_both(self, rows, reference_iterations, **kwargs):
+        '''
+        selects the edges along the given rows of a jittered grid, then smooths a copy with smooth_edge_flow
+        (kwargs) and a copy with smooth_edge_flow_reference.  returns both coords as arrays, in vert order
+        '''
+        benchmark.clear_scene()
+        rng = random.Random(0)
+        bm = create_grid(8, 1.0)
+        ys = sorted({round(bmv.co.y, 5) for bmv in bm.verts})
+        row_ys = {ys[row] for row in rows}
+        for bme in bm.edges:
+            y0, y1 = (round(bmv.co.y, 5) for bmv in bme.verts)
+            bme.select = y0 == y1 and y0 in row_ys
+        spacing = ys[1] - ys[0]
+        for bmv in bm.verts:
+            if bmv.is_boundary: continue
+            bmv.co.x += rng.uniform(-0.2, 0.2) * spacing
+            bmv.co.y += rng.uniform(-0.2, 0.2) * spacing
+        bm_reference = bm.copy()
+
+        rfsource = RFSource.new(benchmark.link_bmesh('Source', create_grid(8, 2.0)))
+        rftarget = create_rftarget_from_bmesh('Target', bm)
+        rfcontext = benchmark.create_headless_rfcontext(rfsource, rftarget)
+        rfcontext.undo_push = lambda *args, **kwargs: None
+        rfcontext.smooth_edge_flow(**kwargs)
+        smoothed = np.array([tuple(bmv.co) for bmv in rftarget.bme.verts])
+
+        smooth_edge_flow_reference(bm_reference, reference_iterations)
+        reference = np.array([tuple(bmv.co) for bmv in bm_reference.verts])
+        bm_reference.free()
+        return (smoothed, reference)
+
+    def test_single_strip_matches_single_pass(self):
+        # neighbors of a single strip are not selected, so they do not move and one pass is enough
+        smoothed, reference = self.smooth_both([3], 1, iterations=10)
+        np.testing.assert_allclose(smoothed, reference, atol=1e-6)
+
+    def test_coupled_strips_converge_to_reference(self):
+        # verts of adjacent strips are neighbors of each other, so both need to iterate to converge
+        smoothed, reference = self.smooth_both([3, 4], 2000, iterations=2000, tolerance=0.0)
+        np.testing.assert_allclose(smoothed, reference, atol=1e-5)
+
+
+###############################################################################
+# rf_sources
+
+class TestMouseRaycastCache(unittest.TestCase):
+    def test_repeated_mouse_raycasts_skip_bvh(self):
+        benchmark.clear_scene()
+        rfsource = RFSource.new(benchmark.link_bmesh('Source', create_grid(8, 2.0)))
+        rftarget = create_rftarget_from_bmesh('Target', create_grid(4, 1.0))
+        rfcontext = create_headless_view_rfcontext(rfsource, rftarget)
+
+        bvh_calls = 0
+        get_bvh = rfsource.get_bvh
+        def counted_get_bvh():
+            nonlocal bvh_calls
+            bvh_calls += 1
+            return get_bvh()
+        rfsource.get_bvh = counted_get_bvh
+
+        def raycast(count):
+            hits = [rfcontext.raycast_sources_mouse() for _ in range(count)]
+            for hit in hits[1:]: self.assertEqual(hit, hits[0])
+            return hits[0]
+
+        rfcontext.actions.mouse = maths.Point2D((100, 150))
+        p, n, _, _ = raycast(5)
+        self.assertIsNotNone(p)
+        self.assertEqual(bvh_calls, 1)      # same mouse, view, and sources: only first call hits BVH
+
+        # returned hits are copies, so modifying them does not change cached hit
+        p.x += 1
+        self.assertEqual(raycast(1)[0].x, p.x - 1)
+        self.assertEqual(bvh_calls, 1)
+
+        rfcontext.actions.mouse = maths.Point2D((120, 150))
+        raycast(3)
+        self.assertEqual(bvh_calls, 2)      # mouse moved
+
+        rfcontext.get_view_version = lambda: 1
+        raycast(3)
+        self.assertEqual(bvh_calls, 3)      # view changed
+
+        rfcontext.invalidate_source_hits()
+        raycast(3)
+        self.assertEqual(bvh_calls, 4)      # sources changed
+
+
+###############################################################################
+# rf_blender_save
+
+def bmesh_elem_attributes(bme):
+    ''' per-element attributes stored by target auto save, in element order '''
+    layer_uv = bme.loops.layers.uv.active
+    return (
+        [(tuple(bmv.co), bmv.select, bmv.hide) for bmv in bme.verts],
+        [(tuple(bmv.index for bmv in bme_.verts), bme_.select, bme_.hide, bme_.seam) for bme_ in bme.edges],
+        [
+            (bmf.select, bmf.hide, bmf.smooth, bmf.material_index, [tuple(bml[layer_uv].uv) for bml in bmf.loops])
+            for bmf in bme.faces
+        ],
+    )
+
+class TestTargetAutoSave(unittest.TestCase):
+    def test_target_save_round_trips(self):
+        benchmark.clear_scene()
+        rng = random.Random(0)
+        bm = create_grid(6, 1.0)
+        layer_uv = bm.loops.layers.uv.new('UVMap')
+        for bmf in bm.faces:
+            bmf.material_index = rng.randrange(3)
+            bmf.smooth = rng.random() < 0.5
+            for bml in bmf.loops: bml[layer_uv].uv = (bml.vert.co.x + 0.5, bml.vert.co.y + 0.5)
+        for bmelem in chain(bm.verts, bm.edges, bm.faces):
+            bmelem.select = rng.random() < 0.5
+        for bme_ in bm.edges: bme_.seam = rng.random() < 0.25
+        rftarget = create_rftarget_from_bmesh('Target', bm)
+        for name in ['A', 'B', 'C']: rftarget.obj.data.materials.append(bpy.data.materials.new(name))
+        bme = rftarget.bme
+        bme.verts.index_update()
+
+        header, arrays = blender_save.encode_target_save(rftarget, scaling_factor=2.0)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, f'target{blender_save.TARGET_SAVE_EXT}')
+            blender_save.write_target_save(filepath, header, arrays)
+            header_read, arrays_read = blender_save.read_target_save(filepath)
+        self.assertEqual(header_read, header)
+        self.assertEqual(header_read['materials'], ['A', 'B', 'C'])
+        self.assertEqual(header_read['uv layer'], 'UVMap')
+
+        bme_read = blender_save.target_save_to_bmesh(header_read, arrays_read)
+        bme_read.verts.index_update()
+        self.assertEqual(canonical_bmesh(bme_read), canonical_bmesh(bme))
+        self.assertEqual(bmesh_elem_attributes(bme_read), bmesh_elem_attributes(bme))
+        bme_read.free()
+
+class TestAccelDeltas(unittest.TestCase):
+    def test_delta_updates_match_rebuild(self):
+        benchmark.clear_scene()
+        rfsource = RFSource.new(benchmark.link_bmesh('Source', create_grid(8, 2.0)))
+        bm = create_grid(12, 1.0)
+        bm.normal_update()
+        rftarget = create_rftarget_from_bmesh('Target', bm)
+        rfcontext = create_headless_view_rfcontext(rfsource, rftarget)
+
+        accels = {}
+        def update(step):
+            for selected_only in [None, True, False]:
+                accel_data = rfcontext._generate_accel_data_struct(selected_only=selected_only, force=True)
+                accels.setdefault(selected_only, accel_data.accel)
+                # target changes are applied as deltas, so accel struct is not rebuilt
+                self.assertIs(accel_data.accel, accels[selected_only], step)
+                self.assertEqual(rfcontext.check_accel_data_struct(selected_only=selected_only), [], step)
+
+        update('build')
+        self.assertTrue(accels[None].verts)
+        verts = list(rftarget.iter_verts())
+        rng = random.Random(0)
+        rng.shuffle(verts)
+        moved = verts[:20]
+        rftarget.set_verts_co(moved, [(v.co.x + 0.05, v.co.y - 0.03, v.co.z) for v in moved])
+        update('move')
+        v0 = rftarget.new_vert(Point((0.1, 0.1, 0.01)), Normal((0, 0, 1)))
+        v1 = rftarget.new_vert(Point((0.2, 0.1, 0.01)), Normal((0, 0, 1)))
+        v2 = rftarget.new_vert(Point((0.2, 0.2, 0.01)), Normal((0, 0, 1)))
+        rftarget.new_face([v0, v1, v2])
+        update('new face')
+        rftarget.select(verts[20:30], only=False)
+        update('select')
+        rftarget.delete_verts(verts[30:35])
+        update('delete')
+        rftarget.set_verts_co([v0, v1], [(5.0, 5.0, 0.01), (0.3, 0.3, 0.01)])     # v0 moves out of bbox when built
+        update('move outside')
+
+    def test_wrapper_setters_record_changes(self):
+        rftarget = create_rftarget()
+        changes = rftarget.changes
+        vert = next(iter(rftarget.iter_verts()))
+        edge = next(iter(rftarget.iter_edges()))
+        face = next(iter(rftarget.iter_faces()))
+        for elem, name, value in [
+            (vert, 'pinned', True),
+            (edge, 'seam', True), (edge, 'smooth', False),
+            (face, 'smooth', True), (face, 'material_index', 1),
+        ]:
+            cursor = changes.get_cursor()
+            setattr(elem, name, value)
+            changed, _ = changes.get_changes(cursor, selection=False)
+            self.assertEqual(changed, {elem.bmelem}, name)
+
+
+def main():
+    argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else []
+    result = unittest.main(module=__name__, argv=['headless_tests.py', *argv], exit=False).result
+    sys.exit(0 if result.wasSuccessful() else 1)
+
+
+if __name__ == '__main__':
+    main()